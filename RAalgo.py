@@ -1,16 +1,19 @@
-import pandas as pd
 import numpy as np
 import sqlite3
 import json
-from openai import OpenAI
-from sklearn.metrics.pairwise import cosine_similarity
+import logging
+
+from embeddings import OpenAIEmbeddings
+from tracing import log_event, span, traced
+
+logger = logging.getLogger(__name__)
 
 class ResearchMatcher:
-    def __init__(self, csv_path, openai_api_key="YOUR_OPENAI_API_KEY"):
-        """Initialize the matcher with faculty data and OpenAI API."""
+    def __init__(self, csv_path, openai_api_key="YOUR_OPENAI_API_KEY", embedding_provider=None):
+        """Initialize the matcher with faculty data and an embedding provider (OpenAI by default)."""
         print("🔧 Initializing ResearchMatcher...")
         self.csv_path = csv_path
-        self.client = OpenAI(api_key=openai_api_key)
+        self.embedder = embedding_provider or OpenAIEmbeddings("text-embedding-ada-002", api_key=openai_api_key)
         self.conn = sqlite3.connect(':memory:')  # In-memory database
         self.professor_embeddings = []
         self.professor_names = []
@@ -19,6 +22,8 @@ class ResearchMatcher:
 
     def _load_data(self):
         """Loads faculty research data from CSV into memory."""
+        import pandas as pd  # deferred: only the CSV load needs it
+
         df = pd.read_csv(self.csv_path, quotechar='"', escapechar='\\')
         df.to_sql('faculty', self.conn, index=False, if_exists='replace')
         
@@ -32,26 +37,19 @@ class ResearchMatcher:
     def _generate_embeddings(self):
         """Generate embeddings for all faculty research descriptions."""
         print("🧠 Generating faculty embeddings...")
-        response = self.client.embeddings.create(
-            input=self.combined_texts,
-            model="text-embedding-ada-002"
-        )
-        self.professor_embeddings = [np.array(e.embedding) for e in response.data]
+        self.embedder.fit(self.combined_texts)
+        self.professor_embeddings = list(self.embedder.embed(self.combined_texts))
 
+    @traced("embedding", source="research")
     def _get_embedding(self, text):
         """Generate embedding for a given text input."""
-        response = self.client.embeddings.create(
-            input=[text],
-            model="text-embedding-ada-002"
-        )
-        return np.array(response.data[0].embedding)
+        return self.embedder.embed_one(text)
 
     def _parse_multiple_dars_reports(self, dars_list):
         """
         Extracts completed and required courses from multiple DARS JSON reports.
         Ensures unique courses across multiple reports.
         """
-        print("📄 Parsing multiple DARS reports...")
         completed_courses = set()
         required_courses = set()
 
@@ -70,7 +68,8 @@ class ResearchMatcher:
         # Filter placeholders like "SELECT FROM" or "NEEDS"
         required_courses = {course for course in required_courses if not course.startswith("SELECT FROM") and "NEEDS" not in course}
 
-        print(f"✔ Extracted {len(completed_courses)} unique completed and {len(required_courses)} required courses from multiple DARS.")
+        log_event(logger, "dars_aggregated", reports=len(dars_list),
+                  completed=len(completed_courses), required=len(required_courses))
         return {
             "completed": completed_courses,
             "required": required_courses
@@ -87,54 +86,53 @@ class ResearchMatcher:
             f"Required Future Courses: {required_courses}"
         )
 
-        print("🔍 Generating embedding for CV + DARS courses...")
         return self._get_embedding(combined_text)
 
     def get_matches(self, dars_list, cv_text, top_n=5):
         """Find top matches based on multiple DARS reports + CV using cosine similarity."""
-        print("🚀 Running professor matching system with multiple DARS reports...")
-
         # Merge multiple DARS reports
         parsed_dars = self._parse_multiple_dars_reports(dars_list)
 
         # Generate a combined embedding
         combined_embedding = self._get_combined_embedding(parsed_dars, cv_text)
 
-        # Compute cosine similarities
-        similarities = [
-            cosine_similarity([combined_embedding], [prof_emb])[0][0]
-            for prof_emb in self.professor_embeddings
-        ]
-
-        # Sort indices based on similarity score
-        sorted_indices = sorted(
-            range(len(similarities)),
-            key=lambda i: similarities[i],
-            reverse=True
-        )
+        with span("similarity", source="research"):
+            # Compute cosine similarities (plain numpy: sklearn costs ~1 s to import)
+            profs = np.asarray(self.professor_embeddings, dtype=np.float32)
+            query = np.asarray(combined_embedding, dtype=np.float32)
+            norms = np.linalg.norm(profs, axis=1) * np.linalg.norm(query)
+            similarities = (profs @ query / np.where(norms > 0, norms, 1.0)).tolist() if len(profs) else []
+
+            # Sort indices based on similarity score
+            sorted_indices = sorted(
+                range(len(similarities)),
+                key=lambda i: similarities[i],
+                reverse=True
+            )
 
         # Retrieve matching professors from the SQLite database
         cursor = self.conn.cursor()
         results = []
 
         for idx in sorted_indices[:top_n]:
-            cursor.execute(
-                'SELECT Name, Faculty, "Summary of Research", "Fields of Research", Email, "Link to Page" '
-                'FROM faculty WHERE Name=?',
-                (self.professor_names[idx],)
-            )
-            result = cursor.fetchone()
+            with span("db", op="SELECT"):
+                cursor.execute(
+                    'SELECT Name, Faculty, "Summary of Research", "Fields of Research", Email, "Link to Page" '
+                    'FROM faculty WHERE Name=?',
+                    (self.professor_names[idx],)
+                )
+                result = cursor.fetchone()
             results.append({
                 'name': result[0],
                 'faculty': result[1],
                 'summary': result[2],
                 'fields': result[3],
-                'score': similarities[idx],
+                'score': float(similarities[idx]),
                 'email': result[4],
                 'link': result[5]
             })
 
-        print("✅ Matching complete.")
+        log_event(logger, "matches", top_n=top_n, returned=len(results))
         return results
 
 # === Example Usage ===
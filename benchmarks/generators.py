@@ -0,0 +1,218 @@
+"""
+Deterministic synthetic inputs for the offline benchmarks.
+
+Everything here is shaped like the real data the algorithms see (DARS
+audit text, catalog CSV rows, requisite strings, the faculty table) but is
+generated from a seeded RNG, so runs are comparable across machines and
+commits without any student data or API keys.
+"""
+from __future__ import annotations
+
+import csv
+import random
+from functools import lru_cache
+from itertools import accumulate
+from pathlib import Path
+from typing import Dict, List
+
+DEPTS = [
+    "COMP SCI", "MATH", "STAT", "E C E", "L I S", "PHYSICS", "CHEM", "BIOCHEM",
+    "ECON", "PSYCH", "ASTRON", "I SY E", "M E", "GEOG", "LING", "PHILOS",
+]
+TERMS = ["FA22", "SP23", "SU23", "FA23", "SP24", "FA24", "SP25", "FA25"]
+GRADES = ["A", "AB", "B", "BC", "C", "CR", "INP"]
+WORDS = (
+    "learning data systems theory analysis statistical models networks design "
+    "computation optimization algebra probability inference biology physics "
+    "language vision security databases graphics robotics signals control "
+    "markets behavior cognition ecology climate genomics chemistry quantum"
+).split()
+
+SIZES = {"small": 1, "medium": 8, "large": 40}
+
+
+def _rng(seed: int) -> random.Random:
+    return random.Random(seed)
+
+
+def course_code(rng: random.Random) -> str:
+    return f"{rng.choice(DEPTS)} {rng.randint(100, 799)}"
+
+
+def sentence(rng: random.Random, n: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(n)).capitalize()
+
+
+@lru_cache(maxsize=None)
+def _zipf_cum_weights(vocab: int) -> List[float]:
+    return list(accumulate(1.0 / (rank + 1) for rank in range(vocab)))
+
+
+def research_text(rng: random.Random, n: int, vocab: int = 5_000) -> str:
+    """Zipf-distributed pseudo-terms, so lexical indexes see realistic posting lengths."""
+    picks = rng.choices(range(vocab), cum_weights=_zipf_cum_weights(vocab), k=n)
+    return " ".join(f"topic{t}" for t in picks)
+
+
+# ----------------------------------------------------------------------------
+#  DARS
+# ----------------------------------------------------------------------------
+def _course_line(rng: random.Random, grade: str | None = None) -> str:
+    return (
+        f"{rng.choice(TERMS)} {course_code(rng)} {rng.choice([1, 2, 3, 4])}.00 "
+        f"{grade or rng.choice(GRADES[:-1])} {sentence(rng, 4)}"
+    )
+
+
+def _requirement_block(rng: random.Random, header: str, subsections: int, courses: int) -> List[str]:
+    out = [header]
+    for i in range(1, subsections + 1):
+        out.append(f"{rng.choice('+-')} {i}) {sentence(rng, 3)} - {rng.randint(1, 4) * 3} credits")
+        out += [_course_line(rng) for _ in range(courses)]
+        out.append(f"NEEDS: {rng.randint(1, 3)} COURSE")
+        out.append("SELECT FROM: " + " OR ".join(course_code(rng) for _ in range(rng.randint(2, 6))))
+    return out
+
+
+def dars_text(scale: int = 1, seed: int = 0) -> str:
+    """One audit; `scale` multiplies sections and course lines."""
+    rng = _rng(seed)
+    lines = [
+        "UNIVERSITY OF WISCONSIN-MADISON  DEGREE AUDIT REPORTING SYSTEM",
+        f"Student{seed},Synthetic Catalog Year: 2023{rng.randint(1, 2)}",
+        "PREPARED: 01/19/25",
+        "DATA SCIENCE major",
+        "-" * 72,
+        "NO TOTAL CREDITS for the DEGREE",
+        f"EARNED: {rng.randint(30, 110)}.00 CREDITS",
+        f"IN-PROGRESS {rng.randint(6, 18)}.00 CREDITS",
+        f"--> NEEDS: {rng.randint(1, 40)}.00 CREDITS",
+    ]
+    lines += [_course_line(rng) for _ in range(12 * scale)]
+    lines += ["-" * 72, "COURSES currently IN-PROGRESS"]
+    lines += [_course_line(rng, "INP") for _ in range(4 * scale)]
+    lines.append("-" * 72)
+    for _ in range(2 * scale):
+        lines += _requirement_block(
+            rng, f"{rng.choice(['OK', 'NO'])} University GENERAL EDUCATION: {sentence(rng, 2)}", 3, 2
+        )
+    for _ in range(3 * scale):
+        lines += _requirement_block(
+            rng, f"{rng.choice(['OK', 'NO'])} DATA SCIENCE major: {sentence(rng, 3)}", 3, 2
+        )
+    lines.append("-" * 72)
+    return "\n".join(lines)
+
+
+# ----------------------------------------------------------------------------
+#  Requisites
+# ----------------------------------------------------------------------------
+def requisite_expression(leaves: int, seed: int = 0) -> str:
+    """
+    A requisite string in catalog style with roughly `leaves` course codes,
+    mixing "and", "or", commas and parentheses. AND fan-out is kept small so
+    generate_sequences stays tractable at the larger sizes.
+    """
+    rng = _rng(seed)
+
+    def build(n: int, depth: int) -> str:
+        if n <= 1 or depth > 3:
+            return course_code(rng)
+        parts = rng.randint(2, min(4, n))
+        sizes = [n // parts] * parts
+        sizes[0] += n - sum(sizes)
+        inner = [build(s, depth + 1) for s in sizes]
+        if depth % 2 == 0 and parts <= 3:
+            joined = " and ".join(inner)
+        else:
+            joined = rng.choice([" or ", ", "]).join(inner)
+        return f"({joined})" if depth else joined
+
+    return build(leaves, 0)
+
+
+def requirement_line(codes: int, seed: int = 0) -> str:
+    rng = _rng(seed)
+    return "SELECT FROM: " + " OR ".join(course_code(rng) for _ in range(codes))
+
+
+def raw_course_titles(n: int, seed: int = 0) -> List[str]:
+    rng = _rng(seed)
+    out = []
+    for _ in range(n):
+        dept, num = rng.choice(DEPTS), rng.randint(100, 799)
+        sep = rng.choice([" ", "\xa0", ""])
+        out.append(f"{dept.lower() if rng.random() < 0.3 else dept}{sep}{num} ")
+    return out
+
+
+# ----------------------------------------------------------------------------
+#  Catalog
+# ----------------------------------------------------------------------------
+CATALOG_FIELDS = [
+    "Course Title", "Credits", "Description", "Requisites", "Learning Outcomes",
+    "Repeatable for Credit", "Last Taught", "Course Designation",
+]
+
+
+def catalog_rows(n: int, seed: int = 0) -> List[Dict[str, str]]:
+    rng = _rng(seed)
+    rows, seen = [], set()
+    while len(rows) < n:
+        code = course_code(rng)
+        if code in seen:
+            continue
+        seen.add(code)
+        roll = rng.random()
+        if roll < 0.2:
+            req = ""
+        elif roll < 0.25:
+            req = "Graduate/professional standing"
+        else:
+            req = requisite_expression(rng.randint(1, 6), seed=rng.randrange(1 << 30))
+        rows.append({
+            "Course Title": f"{code} — {sentence(rng, 3)}",
+            "Credits": f"{rng.randint(1, 4)} credits.",
+            "Description": sentence(rng, 40),
+            "Requisites": req,
+            "Learning Outcomes": sentence(rng, 20),
+            "Repeatable for Credit": rng.choice(["Yes", "No"]),
+            "Last Taught": rng.choice(["Fall 2024", "Spring 2025"]),
+            "Course Designation": rng.choice(["Breadth - Natural Science", "Level - Advanced", ""]),
+        })
+    return rows
+
+
+def write_catalog_csv(path: Path, n: int, seed: int = 0) -> Path:
+    with open(path, "w", newline="", encoding="utf-8") as fh:
+        writer = csv.DictWriter(fh, fieldnames=CATALOG_FIELDS)
+        writer.writeheader()
+        writer.writerows(catalog_rows(n, seed))
+    return path
+
+
+# ----------------------------------------------------------------------------
+#  Faculty
+# ----------------------------------------------------------------------------
+def faculty_rows(n: int, seed: int = 0) -> List[Dict[str, str]]:
+    rng = _rng(seed)
+    return [
+        {
+            "Name": f"Professor {i}",
+            "Email": f"prof{i}@wisc.edu",
+            "Faculty": f"{rng.choice(DEPTS).title()} (Professor)",
+            "Summary of Research": research_text(rng, 25),
+            "Fields of Research": ", ".join(research_text(rng, 2) for _ in range(4)),
+            "Link to Page": f"https://example.wisc.edu/~prof{i}",
+        }
+        for i in range(n)
+    ]
+
+
+def embedding_matrix(n: int, dim: int, seed: int = 0):
+    """Unit-norm float64 rows, like what the embeddings API hands back."""
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    m = rng.standard_normal((n, dim))
+    return m / np.linalg.norm(m, axis=1, keepdims=True)
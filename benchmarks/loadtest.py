@@ -0,0 +1,351 @@
+"""
+End-to-end HTTP load test for mh-backend, fully offline.
+
+Starts the embeddings/Weaviate stand-ins (benchmarks/standins.py), seeds a
+throwaway data.db with a synthetic faculty table, boots the real Flask app
+in a subprocess pointed at the stand-ins, then drives a weighted mix of
+
+    signup · login · /api/faculty · /api/user/documents · /api/ra/match
+
+from concurrent virtual users and reports throughput and p50/p95/p99 per
+endpoint.
+
+Example
+-------
+    python benchmarks/loadtest.py --users 32 --seconds 30 --embed-latency-ms 250
+    python benchmarks/loadtest.py --mix login=1,faculty=4,documents=4,match=2 --json
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import sqlite3
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import uuid
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+ROOT = Path(__file__).resolve().parents[1]
+BACKEND = ROOT / "mh-backend"
+sys.path.insert(0, str(ROOT))
+
+from benchmarks import generators as gen  # noqa: E402
+from benchmarks.standins import FakeEmbeddings, FakeWeaviate  # noqa: E402
+
+DEFAULT_MIX = "signup=1,login=2,faculty=4,documents=4,match=3"
+
+
+# ───────────────────────────────────────────────────────────────────────────────
+#  Fixtures
+# ───────────────────────────────────────────────────────────────────────────────
+def minimal_pdf(text: str, lines_per_page: int = 60) -> bytes:
+    """A valid multi-page PDF whose pages show `text` in Helvetica."""
+    rows = text.splitlines() or [""]
+    pages = [rows[i:i + lines_per_page] for i in range(0, len(rows), lines_per_page)]
+    esc = lambda s: s.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+    objects: List[bytes] = [b"", b""]  # 1: catalog, 2: pages (filled in below)
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")  # 3
+    kids = []
+    for page in pages:
+        stream = "BT /F1 9 Tf 11 TL 36 756 Td " + " ".join(f"({esc(r)}) Tj T*" for r in page) + " ET"
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream.encode("latin-1", "replace")))
+        content_id = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id
+        )
+        kids.append(len(objects))
+    objects[0] = b"<< /Type /Catalog /Pages 2 0 R >>"
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % k for k in kids), len(kids)
+    )
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for i, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (i, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % off for off in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+def seed_database(workdir: Path, faculty: int) -> None:
+    cols = ["Name", "Email", "Faculty", "Summary of Research", "Fields of Research", "Link to Page"]
+    con = sqlite3.connect(workdir / "data.db")
+    con.execute("CREATE TABLE faculty (%s)" % ", ".join(f'"{c}" TEXT' for c in cols))
+    con.executemany(
+        "INSERT INTO faculty VALUES (%s)" % ", ".join("?" * len(cols)),
+        [tuple(row[c] for c in cols) for row in gen.faculty_rows(faculty)],
+    )
+    con.commit()
+    con.close()
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+BOOTSTRAP = """
+import sys
+sys.path.insert(0, {backend!r})
+from werkzeug.serving import make_server
+import app as backend
+make_server("127.0.0.1", {port}, backend.app, threaded=True).serve_forever()
+"""
+
+
+def start_backend(workdir: Path, port: int, env: Dict[str, str], timeout: float = 120.0) -> subprocess.Popen:
+    proc = subprocess.Popen(
+        [sys.executable, "-c", BOOTSTRAP.format(backend=str(BACKEND), port=port)],
+        cwd=workdir,
+        env={**os.environ, **env},
+        stdout=subprocess.DEVNULL,
+        stderr=open(workdir / "backend.log", "wb"),
+    )
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"backend exited early; see {workdir / 'backend.log'}")
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/health/ready", timeout=1).read()
+            return proc
+        except OSError:
+            time.sleep(0.25)
+    proc.kill()
+    raise RuntimeError("backend did not come up in time")
+
+
+# ───────────────────────────────────────────────────────────────────────────────
+#  Client
+# ───────────────────────────────────────────────────────────────────────────────
+def multipart(fields: Dict[str, str], files: List[Tuple[str, str, bytes]]) -> Tuple[bytes, str]:
+    boundary = uuid.uuid4().hex
+    parts = []
+    for name, value in fields.items():
+        parts.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode()
+        )
+    for name, filename, data in files:
+        parts.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+            f"Content-Type: application/pdf\r\n\r\n".encode() + data + b"\r\n"
+        )
+    parts.append(f"--{boundary}--\r\n".encode())
+    return b"".join(parts), f"multipart/form-data; boundary={boundary}"
+
+
+class Client:
+    def __init__(self, base: str, stats: "Stats"):
+        self.base = base
+        self.stats = stats
+
+    def call(self, label: str, method: str, path: str, *, data: bytes | None = None,
+             headers: Dict[str, str] | None = None) -> Tuple[int, bytes]:
+        req = urllib.request.Request(self.base + path, data=data, method=method, headers=headers or {})
+        t0 = time.perf_counter()
+        try:
+            with urllib.request.urlopen(req, timeout=120) as resp:
+                status, body = resp.status, resp.read()
+        except urllib.error.HTTPError as e:
+            status, body = e.code, e.read()
+        except OSError:
+            status, body = 0, b""
+        self.stats.record(label, status, time.perf_counter() - t0)
+        return status, body
+
+
+class Stats:
+    def __init__(self):
+        self.latency: Dict[str, List[float]] = defaultdict(list)
+        self.status: Dict[str, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+        self._lock = threading.Lock()
+
+    def record(self, label: str, status: int, seconds: float) -> None:
+        with self._lock:
+            self.latency[label].append(seconds)
+            self.status[label][status] += 1
+
+    def report(self, elapsed: float) -> Dict[str, dict]:
+        def pct(values, p):
+            return values[min(len(values) - 1, int(p / 100 * len(values)))] * 1000
+
+        out = {}
+        for label, values in sorted(self.latency.items()):
+            values = sorted(values)
+            out[label] = {
+                "requests": len(values),
+                "rps": round(len(values) / elapsed, 2),
+                "p50_ms": round(pct(values, 50), 1),
+                "p95_ms": round(pct(values, 95), 1),
+                "p99_ms": round(pct(values, 99), 1),
+                "status": dict(self.status[label]),
+            }
+        return out
+
+
+class VirtualUser:
+    def __init__(self, idx: int, client: Client, cv_pdf: bytes, dars_pdf: bytes, rng: random.Random):
+        self.idx, self.client, self.rng = idx, client, rng
+        self.cv_pdf, self.dars_pdf = cv_pdf, dars_pdf
+        self.email = self.password = None
+        self.token: Optional[str] = None
+
+    def _auth(self) -> Dict[str, str]:
+        return {"Authorization": f"Bearer {self.token}"}
+
+    def signup(self) -> None:
+        name = f"lt{self.idx}_{uuid.uuid4().hex[:8]}"
+        self.email, self.password = f"{name}@example.edu", "correct horse battery"
+        body, ctype = multipart(
+            {"username": name, "email": self.email, "password": self.password,
+             "confirm_password": self.password},
+            [("cv", "cv.pdf", self.cv_pdf), ("dars", "dars.pdf", self.dars_pdf)],
+        )
+        status, resp = self.client.call("signup", "POST", "/api/signup", data=body,
+                                        headers={"Content-Type": ctype})
+        if status == 201:
+            self.token = json.loads(resp)["access_token"]
+
+    def login(self) -> None:
+        if self.email is None:
+            return self.signup()
+        body = urllib.parse.urlencode({"email": self.email, "password": self.password}).encode()
+        status, resp = self.client.call("login", "POST", "/api/login", data=body,
+                                        headers={"Content-Type": "application/x-www-form-urlencoded"})
+        if status == 200:
+            self.token = json.loads(resp)["access_token"]
+
+    def faculty(self) -> None:
+        self.client.call("faculty", "GET", "/api/faculty", headers=self._auth())
+
+    def documents(self) -> None:
+        self.client.call("documents", "GET", "/api/user/documents", headers=self._auth())
+
+    def match(self) -> None:
+        self.client.call("match", "POST", "/api/ra/match", data=b"", headers=self._auth())
+
+    def step(self, mix: List[Tuple[str, float]]) -> None:
+        if self.token is None:
+            return self.signup()
+        action = self.rng.choices([a for a, _ in mix], weights=[w for _, w in mix])[0]
+        getattr(self, action)()
+
+
+# ───────────────────────────────────────────────────────────────────────────────
+#  Main
+# ───────────────────────────────────────────────────────────────────────────────
+def parse_mix(spec: str) -> List[Tuple[str, float]]:
+    mix = []
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        if name not in {"signup", "login", "faculty", "documents", "match"}:
+            raise SystemExit(f"unknown endpoint in --mix: {name}")
+        mix.append((name, float(weight or 1)))
+    return mix
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Offline end-to-end load test for mh-backend.")
+    ap.add_argument("--users", type=int, default=16, help="concurrent virtual users")
+    ap.add_argument("--seconds", type=float, default=20.0)
+    ap.add_argument("--mix", default=DEFAULT_MIX, help="endpoint=weight,... ")
+    ap.add_argument("--think-ms", type=float, default=0.0, help="pause between a user's requests")
+    ap.add_argument("--faculty", type=int, default=300, help="rows in the synthetic faculty table")
+    ap.add_argument("--embed-latency-ms", type=float, default=200.0)
+    ap.add_argument("--embed-jitter-ms", type=float, default=50.0)
+    ap.add_argument("--embed-dim", type=int, default=3072)
+    ap.add_argument("--weaviate-latency-ms", type=float, default=40.0)
+    ap.add_argument("--bcrypt-rounds", type=int, default=None, help="override BCRYPT_ROUNDS for the run")
+    ap.add_argument("--json", action="store_true")
+    ap.add_argument("--keep", action="store_true", help="keep the temp working directory")
+    args = ap.parse_args(argv)
+    mix = parse_mix(args.mix)
+
+    workdir = Path(tempfile.mkdtemp(prefix="mh-loadtest-"))
+    seed_database(workdir, args.faculty)
+    cv_pdf = minimal_pdf("Jane Student\n" + "\n".join(gen.sentence(random.Random(i), 12) for i in range(40)))
+    dars_pdf = minimal_pdf(gen.dars_text(scale=2))
+
+    emb = FakeEmbeddings(dim=args.embed_dim, latency_ms=args.embed_latency_ms,
+                         jitter_ms=args.embed_jitter_ms).start()
+    wv = FakeWeaviate(latency_ms=args.weaviate_latency_ms).start()
+    env = {
+        "OPENAI_API_KEY": "offline",
+        "OPENAI_BASE_URL": emb.url,
+        "WEAVIATE_URL": wv.url,
+        "LOG_LEVEL": "WARNING",
+    }
+    if args.bcrypt_rounds is not None:
+        env["BCRYPT_ROUNDS"] = str(args.bcrypt_rounds)
+
+    port = free_port()
+    proc = start_backend(workdir, port, env)
+    stats = Stats()
+    client = Client(f"http://127.0.0.1:{port}", stats)
+    stop = threading.Event()
+
+    def run_user(i: int) -> None:
+        rng = random.Random(i)
+        user = VirtualUser(i, client, cv_pdf, dars_pdf, rng)
+        while not stop.is_set():
+            user.step(mix)
+            if args.think_ms:
+                time.sleep(args.think_ms / 1000)
+
+    threads = [threading.Thread(target=run_user, args=(i,)) for i in range(args.users)]
+    started = time.perf_counter()
+    try:
+        for t in threads:
+            t.start()
+        time.sleep(args.seconds)
+    finally:
+        stop.set()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - started
+        proc.terminate()
+        proc.wait(timeout=10)
+        emb.stop()
+        wv.stop()
+
+    report = {
+        "users": args.users,
+        "seconds": round(elapsed, 2),
+        "total_rps": round(sum(len(v) for v in stats.latency.values()) / elapsed, 2),
+        "upstream": {"embedding_requests": emb.requests, "embedding_inputs": emb.inputs,
+                     "weaviate_requests": wv.requests},
+        "endpoints": stats.report(elapsed),
+    }
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"{args.users} users, {report['seconds']}s, {report['total_rps']} req/s total")
+        print(f"{'endpoint':<10} {'reqs':>7} {'rps':>8} {'p50':>9} {'p95':>9} {'p99':>9}  status")
+        for label, r in report["endpoints"].items():
+            print(f"{label:<10} {r['requests']:>7} {r['rps']:>8} {r['p50_ms']:>7}ms {r['p95_ms']:>7}ms "
+                  f"{r['p99_ms']:>7}ms  {r['status']}")
+        print(f"upstream: {report['upstream']}")
+    if args.keep:
+        print(f"workdir kept at {workdir}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,163 @@
+"""
+Login-storm benchmark: p99 latency of a non-auth endpoint while many
+clients hammer login at once.
+
+Runs a throwaway threaded Flask server with two routes:
+
+  /login  – checks a bcrypt hash, either inline on the request thread
+            (the old behaviour) or through mh-backend's PasswordHasher
+  /ping   – a cheap JSON endpoint standing in for /api/faculty & friends
+
+Example
+-------
+    python benchmarks/login_storm.py --mode inline
+    python benchmarks/login_storm.py --mode executor --json
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "mh-backend"))
+
+import bcrypt  # noqa: E402
+from flask import Flask, jsonify, request  # noqa: E402
+from werkzeug.serving import make_server  # noqa: E402
+
+from passwords import HasherBusy, PasswordHasher  # noqa: E402
+
+
+def build_app(mode: str, rounds: int, workers: int) -> Flask:
+    app = Flask("login-storm")
+    stored = bcrypt.hashpw(b"hunter2", bcrypt.gensalt(rounds=rounds)).decode()
+    hasher = PasswordHasher(rounds=rounds, max_workers=workers, max_pending=workers * 2)
+    rows = [{"id": i, "name": f"Prof {i}"} for i in range(50)]
+
+    @app.route("/login", methods=["POST"])
+    def login():
+        pw = request.form.get("password", "")
+        if mode == "inline":
+            ok = bcrypt.checkpw(pw.encode(), stored.encode())
+        else:
+            try:
+                ok = hasher.verify(pw, stored)
+            except HasherBusy:
+                return jsonify(error="busy"), 503
+        return (jsonify(ok=True), 200) if ok else (jsonify(error="bad"), 401)
+
+    @app.route("/ping")
+    def ping():
+        return jsonify(rows), 200
+
+    return app
+
+
+def percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    k = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[k]
+
+
+def summarize(samples: list[float]) -> dict:
+    return {
+        "n": len(samples),
+        "p50_ms": round(percentile(samples, 50) * 1000, 2),
+        "p95_ms": round(percentile(samples, 95) * 1000, 2),
+        "p99_ms": round(percentile(samples, 99) * 1000, 2),
+        "mean_ms": round(statistics.fmean(samples) * 1000, 2) if samples else None,
+    }
+
+
+def run(mode: str, *, rounds: int, workers: int, storm: int, probes: int, seconds: float) -> dict:
+    server = make_server("127.0.0.1", 0, build_app(mode, rounds, workers), threaded=True)
+    base = f"http://127.0.0.1:{server.server_port}"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    stop = threading.Event()
+    ping_lat: list[float] = []
+    login_lat: list[float] = []
+    statuses: dict[int, int] = {}
+    lock = threading.Lock()
+
+    def hit(req, sink):
+        t0 = time.perf_counter()
+        try:
+            with urllib.request.urlopen(req) as resp:
+                code = resp.status
+                resp.read()
+        except urllib.error.HTTPError as e:
+            code = e.code
+        dt = time.perf_counter() - t0
+        with lock:
+            sink.append(dt)
+            statuses[code] = statuses.get(code, 0) + 1
+
+    def stormer():
+        body = b"password=hunter2"
+        while not stop.is_set():
+            hit(urllib.request.Request(f"{base}/login", data=body), login_lat)
+
+    def prober():
+        while not stop.is_set():
+            hit(f"{base}/ping", ping_lat)
+            time.sleep(0.005)
+
+    threads = [threading.Thread(target=stormer) for _ in range(storm)]
+    threads += [threading.Thread(target=prober) for _ in range(probes)]
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    server.shutdown()
+
+    return {
+        "mode": mode,
+        "rounds": rounds,
+        "storm_clients": storm,
+        "ping": summarize(ping_lat),
+        "login": summarize(login_lat),
+        "statuses": statuses,
+    }
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--mode", choices=["inline", "executor", "both"], default="both")
+    ap.add_argument("--rounds", type=int, default=12, help="bcrypt cost factor")
+    ap.add_argument("--workers", type=int, default=2, help="hasher pool size")
+    ap.add_argument("--storm", type=int, default=32, help="concurrent login clients")
+    ap.add_argument("--probes", type=int, default=4, help="concurrent /ping clients")
+    ap.add_argument("--seconds", type=float, default=10.0)
+    ap.add_argument("--json", action="store_true", help="emit machine-readable results")
+    args = ap.parse_args(argv)
+
+    modes = ["inline", "executor"] if args.mode == "both" else [args.mode]
+    results = [
+        run(m, rounds=args.rounds, workers=args.workers, storm=args.storm,
+            probes=args.probes, seconds=args.seconds)
+        for m in modes
+    ]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for r in results:
+            p, l = r["ping"], r["login"]
+            print(f"[{r['mode']:>8}] /ping  p50={p['p50_ms']}ms p95={p['p95_ms']}ms p99={p['p99_ms']}ms (n={p['n']})")
+            print(f"{'':>10} /login p50={l['p50_ms']}ms p99={l['p99_ms']}ms statuses={r['statuses']}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,349 @@
+"""
+Offline microbenchmarks for the CPU hot paths.
+
+No network, no API keys: inputs come from benchmarks/generators.py and the
+embedding calls inside the matchers are replaced by fixed vectors, so only
+the local work (parsing, regex, CSV loading, similarity loops) is timed.
+
+Examples
+--------
+    python benchmarks/micro.py                              # all cases, table
+    python benchmarks/micro.py -k prereq -k dars            # name filters
+    python benchmarks/micro.py --json > bench.json          # machine-readable
+    python benchmarks/micro.py --save baseline.json
+    python benchmarks/micro.py --compare baseline.json      # exit 1 on regression
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+sys.path.append(str(ROOT / "mh-backend"))
+
+from benchmarks import generators as gen  # noqa: E402
+
+
+@dataclass
+class Result:
+    name: str
+    size: str
+    rounds: int
+    median_s: float
+    p95_s: float
+    min_s: float
+
+    @property
+    def key(self) -> str:
+        return f"{self.name}[{self.size}]"
+
+
+# name -> (setup(size) -> zero-arg callable)
+CASES: Dict[str, Callable[[str], Callable[[], object]]] = {}
+
+
+def case(name: str):
+    def register(setup):
+        CASES[name] = setup
+        return setup
+    return register
+
+
+def measure(fn: Callable[[], object], *, min_time: float, max_rounds: int) -> List[float]:
+    fn()  # warm-up (regex compile caches, lazy imports, ...)
+    samples: List[float] = []
+    started = time.perf_counter()
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        while len(samples) < max_rounds and (len(samples) < 5 or time.perf_counter() - started < min_time):
+            t0 = time.perf_counter()
+            fn()
+            samples.append(time.perf_counter() - t0)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return samples
+
+
+# ───────────────────────────────────────────────────────────────────────────────
+#  Cases
+# ───────────────────────────────────────────────────────────────────────────────
+REQ_LEAVES = {"small": 4, "medium": 16, "large": 48}
+CATALOG_ROWS = {"small": 200, "medium": 2_000, "large": 10_000}
+FACULTY_ROWS = {"small": 100, "medium": 1_000, "large": 5_000}
+LEXICAL_DOCS = {"small": 1_000, "medium": 10_000, "large": 50_000}
+EMBED_DIM = 3072
+
+
+def _helper():
+    from course_search_algo import CourseSearchHelper
+
+    return CourseSearchHelper(openai_api_key="offline")
+
+
+@case("prereq.parse")
+def _prereq_parse(size):
+    from course_search_algo import PreReqParser
+
+    exprs = [gen.requisite_expression(REQ_LEAVES[size], seed=s) for s in range(50)]
+    return lambda: [PreReqParser(e).parse() for e in exprs]
+
+
+@case("prereq.generate_sequences")
+def _prereq_sequences(size):
+    from course_search_algo import PreReqParser
+
+    trees = [PreReqParser(gen.requisite_expression(REQ_LEAVES[size], seed=s)).parse() for s in range(50)]
+    return lambda: [t.generate_sequences() for t in trees]
+
+
+@case("dars.parse_dars_report")
+def _dars_parse(size):
+    import dars
+
+    text = gen.dars_text(scale=gen.SIZES[size])
+    return lambda: dars.parse_dars_report(text)
+
+
+@case("course.extract_course_codes")
+def _extract_codes(size):
+    helper = _helper()
+    lines = [gen.requirement_line({"small": 3, "medium": 12, "large": 40}[size], seed=s) for s in range(100)]
+    return lambda: [helper.extract_course_codes(line) for line in lines]
+
+
+@case("course.normalize_course_code")
+def _normalize(size):
+    helper = _helper()
+    titles = gen.raw_course_titles({"small": 500, "medium": 5_000, "large": 50_000}[size])
+    return lambda: [helper.normalize_course_code(t) for t in titles]
+
+
+@case("course.load_courses_csv")
+def _load_csv(size):
+    import contextlib
+    import io
+
+    helper = _helper()
+    tmp = Path(tempfile.mkdtemp(prefix="mh-bench-"))
+    path = gen.write_catalog_csv(tmp / "courses.csv", CATALOG_ROWS[size])
+
+    def run():
+        with contextlib.redirect_stdout(io.StringIO()):
+            return helper.load_courses_csv(str(path))
+    return run
+
+
+@case("course.eligibility")
+def _eligibility(size):
+    import contextlib
+    import io
+
+    from course_search_algo import CourseSearchHelper
+
+    tmp = Path(tempfile.mkdtemp(prefix="mh-bench-"))
+    path = gen.write_catalog_csv(tmp / "courses.csv", CATALOG_ROWS[size])
+    with contextlib.redirect_stdout(io.StringIO()):
+        index = CourseSearchHelper(openai_api_key="offline", courses_csv_path=str(path)).eligibility
+    rng = random.Random(0)
+    completed = set(rng.sample(index.codes, len(index.codes) // 3))
+    return lambda: index.eligible(completed)
+
+
+RARE_TERMS = ("axolotl", "tardigrade", "lichenometry", "speleothem", "stromatolite")
+
+
+def _bm25_rare_case(size, *, edited=False):
+    from lexical_index import BM25Index
+
+    # Every rare term lands in the same 40 documents at every size, so the
+    # postings a query walks stay fixed while the corpus grows around them.
+    rng = random.Random(3)
+    n = LEXICAL_DOCS[size]
+    docs = [gen.research_text(rng, 60) for _ in range(n)]
+    for i in rng.sample(range(n), 40):
+        docs[i] += " " + " ".join(RARE_TERMS)
+    index = BM25Index(docs)
+    if edited:
+        index = index.edited(update={i: gen.research_text(rng, 60) for i in range(0, n, n // 20)},
+                             append=[gen.research_text(rng, 60) for _ in range(20)])
+    query = " ".join(RARE_TERMS)
+    return lambda: index.search(query, top_n=100)
+
+
+@case("lexical.bm25_search.rare_terms")
+def _bm25_rare(size):
+    return _bm25_rare_case(size)
+
+
+@case("lexical.bm25_search.rare_terms_edited")
+def _bm25_rare_edited(size):
+    return _bm25_rare_case(size, edited=True)
+
+
+def _ra_matcher(size, *, prefilter=None, hybrid_weight=0.0, **index_options):
+    from lexical_index import BM25Index
+    from ra_matcher import RAMatcher, faculty_text
+    from vector_index import VectorIndex
+
+    n = FACULTY_ROWS[size]
+    m = RAMatcher.__new__(RAMatcher)
+    m.prefilter, m.hybrid_weight, m.cv_chunking = prefilter, hybrid_weight, None
+    m._state = None
+    meta = gen.faculty_rows(n)
+    texts = [faculty_text(r) for r in meta]
+    m._publish(meta, texts, VectorIndex(gen.embedding_matrix(n, EMBED_DIM), **index_options),
+               BM25Index(texts) if prefilter else None, 0)
+    return m
+
+
+def _ra_match_case(size, **options):
+    m = _ra_matcher(size, **options)
+    cv = gen.research_text(random.Random(7), 300)
+    query = gen.embedding_matrix(1, EMBED_DIM, seed=99)[0]
+    m._embed = lambda text: query
+    return lambda: m.match(cv, top_n=5)
+
+
+@case("ra.match.similarity")
+def _ra_match(size):
+    return _ra_match_case(size)
+
+
+@case("ra.match.similarity_int8_512")
+def _ra_match_compressed(size):
+    return _ra_match_case(size, dim=512, quantize=True)
+
+
+@case("ra.match.bm25_prefilter")
+def _ra_match_prefilter(size):
+    return _ra_match_case(size, prefilter=100)
+
+
+@case("ra.match.bm25_hybrid")
+def _ra_match_hybrid(size):
+    return _ra_match_case(size, prefilter=100, hybrid_weight=0.3)
+
+
+@case("ra.match_many.64")
+def _ra_match_many(size):
+    m = _ra_matcher(size)
+    queries = gen.embedding_matrix(64, EMBED_DIM, seed=99)
+    m._embed_many = lambda texts: queries
+    cvs = ["synthetic cv"] * len(queries)
+    return lambda: m.match_many(cvs, top_n=5)
+
+
+@case("research.get_matches.similarity")
+def _research_matches(size):
+    import sqlite3
+
+    import pandas as pd
+    from RAalgo import ResearchMatcher
+
+    n = FACULTY_ROWS[size]
+    rows = gen.faculty_rows(n)
+    r = ResearchMatcher.__new__(ResearchMatcher)
+    r.conn = sqlite3.connect(":memory:")
+    pd.DataFrame(rows).to_sql("faculty", r.conn, index=False)
+    r.professor_names = [row["Name"] for row in rows]
+    r.professor_embeddings = list(gen.embedding_matrix(n, EMBED_DIM))
+    query = gen.embedding_matrix(1, EMBED_DIM, seed=99)[0]
+    r._get_embedding = lambda text: query
+    dars_list = [{"completed_courses": [{"course_code": "COMP SCI 200"}], "major_requirements": {}}]
+    return lambda: r.get_matches(dars_list, "synthetic cv", top_n=5)
+
+
+# ───────────────────────────────────────────────────────────────────────────────
+#  Runner
+# ───────────────────────────────────────────────────────────────────────────────
+def run(filters: List[str], sizes: List[str], *, min_time: float, max_rounds: int) -> List[Result]:
+    results = []
+    for name, setup in CASES.items():
+        if filters and not any(f in name for f in filters):
+            continue
+        for size in sizes:
+            fn = setup(size)
+            samples = sorted(measure(fn, min_time=min_time, max_rounds=max_rounds))
+            results.append(Result(
+                name=name,
+                size=size,
+                rounds=len(samples),
+                median_s=statistics.median(samples),
+                p95_s=samples[min(len(samples) - 1, int(0.95 * len(samples)))],
+                min_s=samples[0],
+            ))
+            print(f"  {results[-1].key:<45} {results[-1].median_s * 1e3:10.3f} ms", file=sys.stderr)
+    return results
+
+
+def compare(results: List[Result], baseline: dict, threshold: float) -> List[str]:
+    """Return a message per case whose median got slower than `threshold`×."""
+    old = {f"{r['name']}[{r['size']}]": r for r in baseline["results"]}
+    regressions = []
+    for r in results:
+        prev = old.get(r.key)
+        if prev is None:
+            continue
+        ratio = r.median_s / prev["median_s"] if prev["median_s"] else float("inf")
+        flag = "REGRESSION" if ratio > threshold else ("faster" if ratio < 1 / threshold else "ok")
+        print(f"{r.key:<45} {prev['median_s'] * 1e3:10.3f} → {r.median_s * 1e3:10.3f} ms  x{ratio:5.2f}  {flag}")
+        if flag == "REGRESSION":
+            regressions.append(f"{r.key} x{ratio:.2f}")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Offline microbenchmarks for the CPU hot paths.")
+    ap.add_argument("-k", dest="filters", action="append", default=[], help="substring filter on case names")
+    ap.add_argument("--sizes", default="small,medium,large")
+    ap.add_argument("--min-time", type=float, default=0.5, help="seconds to sample each case")
+    ap.add_argument("--max-rounds", type=int, default=200)
+    ap.add_argument("--json", action="store_true", help="print results as JSON on stdout")
+    ap.add_argument("--save", type=Path, help="write results to this JSON file")
+    ap.add_argument("--compare", type=Path, help="baseline JSON to compare against")
+    ap.add_argument("--threshold", type=float, default=1.25, help="slowdown ratio that counts as a regression")
+    ap.add_argument("--list", action="store_true", help="list case names and exit")
+    args = ap.parse_args(argv)
+
+    if args.list:
+        print("\n".join(CASES))
+        return 0
+
+    results = run(args.filters, args.sizes.split(","), min_time=args.min_time, max_rounds=args.max_rounds)
+    payload = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "results": [asdict(r) for r in results],
+    }
+    if args.save:
+        args.save.write_text(json.dumps(payload, indent=2))
+    if args.json:
+        print(json.dumps(payload, indent=2))
+
+    if args.compare:
+        regressions = compare(results, json.loads(args.compare.read_text()), args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s): " + ", ".join(regressions), file=sys.stderr)
+            return 1
+    elif not args.json:
+        for r in results:
+            print(f"{r.key:<45} median {r.median_s * 1e3:10.3f} ms  p95 {r.p95_s * 1e3:10.3f} ms  (n={r.rounds})")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,156 @@
+"""
+Memory / latency / recall trade-off of the compressed VectorIndex modes.
+
+Every mode is compared against exact float32 cosine scoring over the same
+corpus: recall@k is the fraction of the exact top-k that the mode returns.
+
+The synthetic corpus is clustered and has a decaying per-dimension
+spectrum, which is roughly how Matryoshka-trained models (text-embedding-3)
+front-load information; pass `--from-npy` to measure on real embeddings.
+
+    python benchmarks/quantization.py --on-disk
+    python benchmarks/quantization.py --rows 20000 --dims 1024,512,256 -k 10
+    python benchmarks/quantization.py --from-npy faculty.npy --json
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from vector_index import VectorIndex  # noqa: E402
+
+
+@dataclass
+class Row:
+    mode: str
+    dim: int
+    int8: bool
+    mib: float
+    compression: float
+    build_s: float
+    p50_ms: float
+    p95_ms: float
+    recall: float
+
+
+def synthetic_corpus(rows: int, dim: int, *, clusters: int = 64, decay: float = 0.6, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    spectrum = (1.0 + np.arange(dim)) ** -decay
+    centres = rng.standard_normal((clusters, dim)) * spectrum
+    assign = rng.integers(0, clusters, rows)
+    corpus = centres[assign] + 0.5 * rng.standard_normal((rows, dim)) * spectrum
+    return corpus.astype(np.float32)
+
+
+def noisy_queries(corpus: np.ndarray, n: int, *, noise: float = 1.0, seed: int = 1):
+    rng = np.random.default_rng(seed)
+    base = corpus[rng.integers(0, len(corpus), n)]
+    scale = np.abs(corpus).mean(axis=0)
+    return (base + noise * rng.standard_normal(base.shape) * scale).astype(np.float32)
+
+
+def evaluate(index: VectorIndex, queries: np.ndarray, truth: List[set], k: int):
+    latencies, hits = [], 0
+    for q, expected in zip(queries, truth):
+        t0 = time.perf_counter()
+        idxs, _ = index.search(q, k)
+        latencies.append(time.perf_counter() - t0)
+        hits += len(expected.intersection(idxs.tolist()))
+    latencies.sort()
+    return (
+        statistics.median(latencies),
+        latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))],
+        hits / (k * len(queries)),
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Recall@k, memory and latency of compressed vector storage.")
+    ap.add_argument("--rows", type=int, default=5_000)
+    ap.add_argument("--dim", type=int, default=3072)
+    ap.add_argument("--from-npy", type=Path, help="real (rows, dim) embedding matrix instead of synthetic")
+    ap.add_argument("--queries", type=int, default=200)
+    ap.add_argument("--dims", default="1024,512,256", help="truncation dimensions to try")
+    ap.add_argument("-k", type=int, default=5)
+    ap.add_argument("--rerank-factor", type=int, default=10)
+    ap.add_argument("--on-disk", action="store_true",
+                    help="keep the float32 re-rank copy in a memmap (otherwise it stays resident "
+                         "next to the compressed copy and memory goes up, not down)")
+    ap.add_argument("--json", action="store_true")
+    args = ap.parse_args(argv)
+
+    if args.from_npy:
+        corpus = np.load(args.from_npy).astype(np.float32)
+    else:
+        corpus = synthetic_corpus(args.rows, args.dim)
+    queries = noisy_queries(corpus, args.queries)
+
+    exact = VectorIndex(corpus)
+    truth = [set(exact.search(q, args.k)[0].tolist()) for q in queries]
+    baseline_bytes = exact.nbytes
+
+    modes = [("float32", None, False), ("int8", None, True)]
+    for d in (int(x) for x in args.dims.split(",") if x):
+        modes += [(f"trunc{d}", d, False), (f"trunc{d}+int8", d, True)]
+
+    tmp = tempfile.TemporaryDirectory(prefix="mh-quant-")
+    rows: List[Row] = []
+    for name, dim, int8 in modes:
+        t0 = time.perf_counter()
+        index = VectorIndex(
+            corpus,
+            dim=dim,
+            quantize=int8,
+            rerank_factor=args.rerank_factor,
+            rerank_path=Path(tmp.name) / f"{name}.npy" if args.on_disk else None,
+        )
+        build = time.perf_counter() - t0
+        p50, p95, recall = evaluate(index, queries, truth, args.k)
+        rows.append(Row(
+            mode=name,
+            dim=index.dim,
+            int8=int8,
+            mib=index.nbytes / 2**20,
+            compression=baseline_bytes / max(index.nbytes, 1),
+            build_s=build,
+            p50_ms=p50 * 1e3,
+            p95_ms=p95 * 1e3,
+            recall=recall,
+        ))
+        del index
+    tmp.cleanup()
+
+    if args.json:
+        print(json.dumps({
+            "rows": len(corpus),
+            "dim": corpus.shape[1],
+            "k": args.k,
+            "rerank_factor": args.rerank_factor,
+            "on_disk": args.on_disk,
+            "results": [asdict(r) for r in rows],
+        }, indent=2))
+        return 0
+
+    print(f"{len(corpus)} x {corpus.shape[1]}, {len(queries)} queries, recall@{args.k}, "
+          f"rerank x{args.rerank_factor}{', float32 on disk' if args.on_disk else ''}")
+    print(f"{'mode':<16} {'MiB':>9} {'x smaller':>9} {'build s':>8} {'p50 ms':>8} {'p95 ms':>8} {'recall':>7}")
+    for r in rows:
+        print(f"{r.mode:<16} {r.mib:9.2f} {r.compression:9.1f} {r.build_s:8.3f} "
+              f"{r.p50_ms:8.3f} {r.p95_ms:8.3f} {r.recall:7.3f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
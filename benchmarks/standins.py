@@ -0,0 +1,150 @@
+"""
+Local stand-ins for the upstream services the backend talks to.
+
+  • FakeEmbeddings – speaks enough of POST /v1/embeddings for the openai
+                     client (float and base64 encodings), with deterministic
+                     vectors per input and configurable latency
+  • FakeWeaviate   – answers the UWCourse nearVector GraphQL query used by
+                     CourseSearchHelper.search_recommended_courses
+
+Both run on a ThreadingHTTPServer in a daemon thread:
+
+    with FakeEmbeddings(latency_ms=150) as emb:
+        os.environ["OPENAI_BASE_URL"] = emb.url   # http://127.0.0.1:NNNN/v1
+"""
+from __future__ import annotations
+
+import base64
+import hashlib
+import json
+import random
+import re
+import struct
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List
+
+from benchmarks import generators as gen
+
+
+class _StandIn:
+    path_prefix = "/v1"
+
+    def __init__(self, *, latency_ms: float = 0.0, jitter_ms: float = 0.0, seed: int = 0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.requests = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_port}{self.path_prefix}"
+
+    def start(self) -> "_StandIn":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _sleep(self) -> None:
+        with self._lock:
+            self.requests += 1
+            delay = self.latency_ms + self._rng.uniform(-self.jitter_ms, self.jitter_ms)
+        if delay > 0:
+            time.sleep(delay / 1000)
+
+    def respond(self, path: str, body: dict) -> tuple[int, dict]:
+        raise NotImplementedError
+
+    def _handler(self):
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length) or b"{}")
+                stand_in._sleep()
+                status, payload = stand_in.respond(self.path, body)
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+class FakeEmbeddings(_StandIn):
+    def __init__(self, *, dim: int = 3072, **kwargs):
+        super().__init__(**kwargs)
+        self.dim = dim
+        self.inputs = 0
+
+    def vector(self, text: str) -> List[float]:
+        seed = int.from_bytes(hashlib.blake2b(text.encode(), digest_size=8).digest(), "little")
+        rng = random.Random(seed)
+        v = [rng.gauss(0.0, 1.0) for _ in range(self.dim)]
+        norm = sum(x * x for x in v) ** 0.5
+        return [x / norm for x in v]
+
+    def respond(self, path, body):
+        if not path.rstrip("/").endswith("/embeddings"):
+            return 404, {"error": {"message": f"unknown path {path}"}}
+        inputs = body.get("input", [])
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        with self._lock:
+            self.inputs += len(inputs)
+        data = []
+        for i, text in enumerate(inputs):
+            vec = self.vector(str(text))
+            if body.get("encoding_format") == "base64":
+                vec = base64.b64encode(struct.pack(f"<{len(vec)}f", *vec)).decode()
+            data.append({"object": "embedding", "index": i, "embedding": vec})
+        tokens = sum(len(str(t).split()) for t in inputs)
+        return 200, {
+            "object": "list",
+            "data": data,
+            "model": body.get("model", "fake"),
+            "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+        }
+
+
+class FakeWeaviate(_StandIn):
+    _LIMIT = re.compile(r"limit:\s*(\d+)")
+
+    def __init__(self, *, catalog_size: int = 500, **kwargs):
+        super().__init__(**kwargs)
+        self.catalog = gen.catalog_rows(catalog_size)
+
+    def respond(self, path, body):
+        if not path.rstrip("/").endswith("/graphql"):
+            return 404, {"errors": [{"message": f"unknown path {path}"}]}
+        m = self._LIMIT.search(body.get("query", ""))
+        limit = int(m.group(1)) if m else 10
+        with self._lock:
+            picks = self._rng.sample(self.catalog, min(limit, len(self.catalog)))
+        hits = [
+            {"courseTitle": row["Course Title"], "oneLinerDescription": row["Description"][:80]}
+            for row in picks
+        ]
+        return 200, {"data": {"Get": {"UWCourse": hits}}}
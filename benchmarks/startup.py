@@ -0,0 +1,105 @@
+"""
+Startup profile: how long each entry point takes to import, how much
+memory a fresh process holds afterwards, and where the import time goes.
+
+Each target is imported in a clean subprocess under `python -X importtime`
+(three times by default; the median wall time is reported). `app` and
+`asgi` boot against a throwaway data.db with a synthetic faculty table and
+the local hashing embeddings, so nothing leaves the machine.
+
+    python benchmarks/startup.py                     # all targets
+    python benchmarks/startup.py app --top 20        # one target, deeper breakdown
+    python benchmarks/startup.py --json > startup.json
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parents[1]
+BACKEND = ROOT / "mh-backend"
+sys.path.insert(0, str(ROOT))
+
+from benchmarks.loadtest import seed_database  # noqa: E402
+
+TARGETS = ["app", "asgi", "course_search_algo", "RAalgo", "dars"]
+
+PROBE = """
+import resource, sys, time, json
+sys.path[:0] = {paths!r}
+t0 = time.perf_counter()
+import {module}
+wall = time.perf_counter() - t0
+print(json.dumps({{"wall_s": wall, "maxrss_kib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}}))
+"""
+
+_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+def probe(module: str, workdir: Path) -> dict:
+    env = {**os.environ, "EMBEDDING_PROVIDER_RA": "hashing", "LOG_LEVEL": "WARNING"}
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c",
+         PROBE.format(paths=[str(BACKEND), str(ROOT)], module=module)],
+        cwd=workdir, env=env, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"importing {module} failed:\n{proc.stderr[-2000:]}")
+
+    by_package: Dict[str, int] = defaultdict(int)
+    for line in proc.stderr.splitlines():
+        m = _LINE.match(line)
+        if m:
+            by_package[m.group(4).split(".")[0]] += int(m.group(1))  # self time, µs
+    return {**json.loads(proc.stdout.strip().splitlines()[-1]), "packages": dict(by_package)}
+
+
+def profile(module: str, runs: int, top: int) -> dict:
+    with tempfile.TemporaryDirectory(prefix="mh-startup-") as tmp:
+        workdir = Path(tmp)
+        seed_database(workdir, faculty=200)
+        samples = [probe(module, workdir) for _ in range(runs)]
+    last = samples[-1]
+    heaviest = sorted(last["packages"].items(), key=lambda kv: kv[1], reverse=True)[:top]
+    return {
+        "module": module,
+        "wall_s": statistics.median(s["wall_s"] for s in samples),
+        "maxrss_mib": statistics.median(s["maxrss_kib"] for s in samples) / 1024,
+        "import_s": sum(last["packages"].values()) / 1e6,
+        "packages": len(last["packages"]),
+        "top": [{"package": name, "self_ms": us / 1e3} for name, us in heaviest],
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Import-time and RSS profile of the entry points.")
+    ap.add_argument("targets", nargs="*", default=TARGETS)
+    ap.add_argument("--runs", type=int, default=3)
+    ap.add_argument("--top", type=int, default=8, help="heaviest top-level packages to list")
+    ap.add_argument("--json", action="store_true")
+    args = ap.parse_args(argv)
+
+    reports = [profile(t, args.runs, args.top) for t in args.targets]
+    if args.json:
+        print(json.dumps({"python": sys.version.split()[0], "results": reports}, indent=2))
+        return 0
+
+    for r in reports:
+        print(f"{r['module']:<20} wall {r['wall_s'] * 1e3:8.1f} ms   RSS {r['maxrss_mib']:7.1f} MiB   "
+              f"({r['packages']} top-level packages)")
+        for p in r["top"]:
+            print(f"    {p['package']:<24} {p['self_ms']:8.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
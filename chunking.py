@@ -0,0 +1,83 @@
+"""
+Split CV text into stable chunks for embedding.
+
+    chunks = split_cv(cv_text)          # ["EDUCATION\\nB.S. ...", "EXPERIENCE\\n...", ...]
+
+Chunks never cross a section heading, and inside a section the cut points
+are chosen by the content of the lines themselves (a line whose hash hits
+a fixed residue ends a chunk once it is past `min_chars`). An edit
+therefore changes only the chunk it lands in (and occasionally the one
+after); everything else keeps the same text, hence the same content hash,
+so cached chunk embeddings stay valid across re-uploads.
+"""
+from __future__ import annotations
+
+import re
+import zlib
+from typing import List
+
+SECTION_NAMES = {
+    "education", "experience", "work experience", "professional experience",
+    "research experience", "research", "research interests", "projects",
+    "skills", "technical skills", "publications", "presentations", "awards",
+    "honors", "honors and awards", "activities", "leadership", "coursework",
+    "relevant coursework", "certifications", "volunteer", "interests",
+    "summary", "objective", "references",
+}
+
+_BOUNDARY_DIVISOR = 4  # ~1 in 4 lines may end a chunk once it is long enough
+_MIN_SECTION_CHARS = 80  # a name/contact header is folded into the next section
+
+
+def is_heading(line: str) -> bool:
+    text = line.strip().rstrip(":").strip()
+    if not text or len(text) > 40:
+        return False
+    if text.lower() in SECTION_NAMES:
+        return True
+    letters = [c for c in text if c.isalpha()]
+    return len(letters) >= 3 and all(c.isupper() for c in letters)
+
+
+def _sections(text: str) -> List[List[str]]:
+    sections: List[List[str]] = [[]]
+    for line in text.splitlines():
+        if is_heading(line) and sum(len(s) for s in sections[-1]) >= _MIN_SECTION_CHARS:
+            sections.append([])
+        if line.strip():
+            sections[-1].append(line.strip())
+    return [s for s in sections if s]
+
+
+def _wrap(line: str, max_chars: int) -> List[str]:
+    """Break an over-long line at word boundaries (or mid-word if it must)."""
+    out, cur = [], ""
+    words = [w[i:i + max_chars] for w in line.split() for i in range(0, len(w), max_chars)]
+    for word in words:
+        if cur and len(cur) + 1 + len(word) > max_chars:
+            out.append(cur)
+            cur = word
+        else:
+            cur = f"{cur} {word}" if cur else word
+    return out + ([cur] if cur else [])
+
+
+def split_cv(text: str, *, min_chars: int = 400, max_chars: int = 2000) -> List[str]:
+    """Section-aligned, content-defined chunks of at most `max_chars` characters."""
+    chunks: List[str] = []
+    for section in _sections(text):
+        cur: List[str] = []
+        size = 0
+        for raw in section:
+            for line in _wrap(raw, max_chars) if len(raw) > max_chars else [raw]:
+                if cur and size + len(line) + 1 > max_chars:
+                    chunks.append("\n".join(cur))
+                    cur, size = [], 0
+                cur.append(line)
+                size += len(line) + 1
+                if size >= min_chars and zlib.crc32(line.encode()) % _BOUNDARY_DIVISOR == 0:
+                    chunks.append("\n".join(cur))
+                    cur, size = [], 0
+        if cur:
+            chunks.append("\n".join(cur))
+    return chunks
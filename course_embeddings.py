@@ -0,0 +1,180 @@
+"""
+Precomputed embedding for every catalog course, looked up by course code.
+
+Build once per catalog (or model) change:
+
+    python course_embeddings.py courses_output.csv -o course_embeddings.npz
+    python course_embeddings.py courses_output.csv -o course_embeddings.npz --provider hashing:1024
+
+That writes one uncompressed .npz holding the float32 (courses, dim) matrix
+and, as JSON, the row order, provider spec and per-row text hashes. It is
+replaced in one rename, so a reader always gets a matrix and codes from the
+same build. Rebuilding re-embeds only the courses whose title or
+description changed. At request time:
+
+    table = CourseEmbeddingTable.load("course_embeddings.npz")
+    table.lookup(["MATH 222", "COMP SCI 400"])    # (vectors, codes not in the table)
+
+The matrix is memory-mapped straight out of the archive, so a worker only
+pages in the rows it reads.
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+import zipfile
+from pathlib import Path
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from embeddings import EmbeddingProvider, make_provider, provider_spec
+
+
+def course_text(info: Mapping[str, str]) -> str:
+    """What gets embedded for one catalog row (title already starts with the code)."""
+    return f"{info['title']}. {info['description']}".strip()
+
+
+def _digest(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+class CourseEmbeddingTable:
+    def __init__(self, codes: Sequence[str], vectors: np.ndarray, *, spec: str,
+                 hashes: Optional[Sequence[str]] = None):
+        if len(codes) != len(vectors):
+            raise ValueError(f"{len(codes)} codes but {len(vectors)} vectors")
+        self.codes = list(codes)
+        self.vectors = vectors
+        self.spec = spec
+        self.hashes = list(hashes) if hashes is not None else [""] * len(self.codes)
+        self.rows: Dict[str, int] = {c: i for i, c in enumerate(self.codes)}
+        self.reused = 0  # rows copied from a previous table by build()
+
+    @property
+    def dim(self) -> int:
+        return self.vectors.shape[1] if self.vectors.ndim == 2 else 0
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __contains__(self, code: str) -> bool:
+        return code in self.rows
+
+    # ------------------------------------------------------------------ #
+    @classmethod
+    def build(cls, catalog: Mapping[str, Mapping[str, str]], provider: EmbeddingProvider, *,
+              previous: Optional["CourseEmbeddingTable"] = None) -> "CourseEmbeddingTable":
+        """
+        Embed every course in `catalog` (code -> load_courses_csv row). Rows of
+        `previous` with the same provider and text hash are reused as-is.
+        """
+        spec = provider_spec(provider)
+        codes = list(catalog)
+        texts = [course_text(catalog[c]) for c in codes]
+        hashes = [_digest(t) for t in texts]
+        if previous is not None and previous.spec != spec:
+            previous = None
+        reuse = {}
+        if previous is not None:
+            reuse = {
+                i: previous.rows[c] for i, c in enumerate(codes)
+                if c in previous.rows and previous.hashes[previous.rows[c]] == hashes[i]
+            }
+        todo = [i for i in range(len(codes)) if i not in reuse]
+        fresh = provider.embed([texts[i] for i in todo]) if todo else None
+        dim = fresh.shape[1] if fresh is not None else previous.dim if previous is not None else 0
+        vectors = np.zeros((len(codes), dim), dtype=np.float32)
+        if reuse:
+            vectors[list(reuse)] = previous.vectors[list(reuse.values())]
+        if todo:
+            vectors[todo] = fresh
+        table = cls(codes, vectors, spec=spec, hashes=hashes)
+        table.reused = len(reuse)
+        return table
+
+    def save(self, path: str | Path) -> None:
+        """Write the whole table to a temporary and rename it over `path`, so readers never see a mix."""
+        path = Path(path)
+        tmp = path.with_name(path.name + ".tmp")
+        meta = json.dumps({
+            "spec": self.spec,
+            "dim": self.dim,
+            "codes": self.codes,
+            "hashes": self.hashes,
+            "built": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }).encode("utf-8")
+        with open(tmp, "wb") as fh:
+            np.savez(fh, vectors=np.ascontiguousarray(self.vectors, dtype=np.float32),
+                     meta=np.frombuffer(meta, dtype=np.uint8))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str | Path) -> "CourseEmbeddingTable":
+        path = Path(path)
+        with np.load(path) as archive:
+            meta = json.loads(archive["meta"].tobytes().decode("utf-8"))
+        return cls(meta["codes"], _mmap_member(path, "vectors.npy"), spec=meta["spec"], hashes=meta.get("hashes"))
+
+    # ------------------------------------------------------------------ #
+    def lookup(self, codes: Sequence[str]) -> Tuple[np.ndarray, List[str]]:
+        """Vectors for the codes in the table (in input order) and the codes that are not."""
+        found = [self.rows[c] for c in codes if c in self.rows]
+        missing = [c for c in codes if c not in self.rows]
+        return np.asarray(self.vectors[found], dtype=np.float32), missing
+
+
+def _mmap_member(path: Path, name: str) -> np.ndarray:
+    """Memory-map one array stored uncompressed in an .npz (np.load would read it whole)."""
+    with zipfile.ZipFile(path) as zf:
+        info = zf.getinfo(name)
+    if info.compress_type != zipfile.ZIP_STORED:
+        raise ValueError(f"{path}: {name} is compressed and cannot be memory-mapped")
+    with open(path, "rb") as fh:
+        fh.seek(info.header_offset)
+        local = fh.read(30)  # zip local file header; name and extra field lengths at 26..30
+        fh.seek(info.header_offset + 30 + int.from_bytes(local[26:28], "little")
+                + int.from_bytes(local[28:30], "little"))
+        version = np.lib.format.read_magic(fh)
+        read_header = (np.lib.format.read_array_header_1_0 if version == (1, 0)
+                       else np.lib.format.read_array_header_2_0)
+        shape, fortran, dtype = read_header(fh)
+        offset = fh.tell()
+    return np.memmap(path, dtype=dtype, mode="r", shape=shape, offset=offset,
+                     order="F" if fortran else "C")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Embed every catalog course into a lookup table.")
+    ap.add_argument("catalog", help="courses CSV in load_courses_csv format")
+    ap.add_argument("-o", "--output", type=Path, default=Path("course_embeddings.npz"))
+    ap.add_argument("--provider", default=os.environ.get("EMBEDDING_PROVIDER_COURSES")
+                    or os.environ.get("EMBEDDING_PROVIDER"),
+                    help="make_provider spec; must match the one that embeds queries (default: openai)")
+    ap.add_argument("--full", action="store_true", help="re-embed everything, ignoring the existing table")
+    args = ap.parse_args(argv)
+
+    from course_search_algo import CourseSearchHelper
+
+    catalog = CourseSearchHelper(openai_api_key=None, courses_csv_path=args.catalog).course_prereq_dict
+    provider = make_provider(args.provider, api_key=os.environ.get("OPENAI_API_KEY"))
+    previous = None
+    if args.output.exists() and not args.full:
+        previous = CourseEmbeddingTable.load(args.output)
+
+    t0 = time.perf_counter()
+    table = CourseEmbeddingTable.build(catalog, provider, previous=previous)
+    table.save(args.output)
+    print(f"{len(table)} courses x {table.dim} ({table.spec}) -> {args.output}: "
+          f"{len(table) - table.reused} embedded, {table.reused} reused, "
+          f"{time.perf_counter() - t0:.1f}s", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
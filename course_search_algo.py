@@ -1,14 +1,24 @@
 import re
 import json
+import asyncio
 import csv
+import logging
+import time
 from datetime import date
-import openai
 import numpy as np
-import requests
-import networkx as nx
 from itertools import product
-import matplotlib.pyplot as plt
-import pdfplumber
+
+# matplotlib, networkx, pdfplumber and requests are imported where they are
+# used: together they cost ~1 s of import time most callers never need.
+from course_embeddings import CourseEmbeddingTable
+from dars import compact_dars
+from eligibility import EligibilityIndex
+from embeddings import make_provider, provider_spec
+from lexical_index import BM25Index
+from unlocks import UnlocksIndex
+from tracing import HOT_PATH_SAMPLE, log_event, span, traced
+
+logger = logging.getLogger(__name__)
 
 # ----------- Boolean Expression Tree Classes -----------
 class Node:
@@ -16,6 +26,8 @@ class Node:
         raise NotImplementedError("Subclasses must implement generate_sequences.")
 
 class AndNode(Node):
+    op = "and"
+
     def __init__(self, children):
         self.children = children
 
@@ -28,6 +40,8 @@ class AndNode(Node):
         return sequences
 
 class OrNode(Node):
+    op = "or"
+
     def __init__(self, children):
         self.children = children
 
@@ -112,17 +126,71 @@ class PreReqParser:
 
 # ------------------ CourseSearchHelper Class ------------------
 class CourseSearchHelper:
-    def __init__(self, openai_api_key, weaviate_url="http://localhost:8080/v1", courses_csv_path=None):
+    def __init__(self, openai_api_key, weaviate_url="http://localhost:8080/v1", courses_csv_path=None,
+                 embedding_provider=None, lexical_prefilter=None, course_embeddings=None,
+                 search_cache=None, deadline=None, dars_token_budget=256):
         print("🔧 Initializing CourseSearchHelper...")
         self.openai_api_key = openai_api_key
         self.weaviate_url = weaviate_url
-        openai.api_key = self.openai_api_key
+        # Query vectors must live in the same space as the UWCourse index, so a
+        # local provider only makes sense against an index built with it.
+        self.embedder = embedding_provider or make_provider("openai", api_key=openai_api_key)
         if courses_csv_path:
             self.course_prereq_dict = self.load_courses_csv(courses_csv_path)
         else:
             self.course_prereq_dict = {}
+        # lexical_prefilter=N restricts the first Weaviate query to the N catalog
+        # courses whose title/description best match the interests (BM25).
+        self.lexical_prefilter = lexical_prefilter
+        self.course_lexical = None
+        if lexical_prefilter and self.course_prereq_dict:
+            self.course_lexical_codes = list(self.course_prereq_dict)
+            self.course_lexical = BM25Index([
+                f"{info['title']}. {info['description']}" for info in self.course_prereq_dict.values()
+            ])
+        # Every requisite compiled once into a circuit over course bits, so
+        # "what can this student take now" is a few array ops, not a parse
+        # per course (see eligibility.EligibilityIndex).
+        # The same pass records which courses each requisite mentions; the
+        # reverse of that (what a course unlocks) feeds rank_by_unlocks.
+        self.eligibility = None
+        self.unlocks = None
+        if self.course_prereq_dict:
+            with span("eligibility", op="build"):
+                self.eligibility = EligibilityIndex(
+                    {code: info["requisites"] for code, info in self.course_prereq_dict.items()},
+                    parse=lambda text: PreReqParser(text).parse(),
+                    normalize=self.normalize_course_code,
+                )
+            with span("unlocks", op="build"):
+                self.unlocks = UnlocksIndex(self.eligibility.prerequisites)
+        # course_embeddings: a table built offline by course_embeddings.py (path
+        # or CourseEmbeddingTable). Required courses found in it cost no API call.
+        self.course_table = None
+        if course_embeddings is not None:
+            table = course_embeddings
+            if not isinstance(table, CourseEmbeddingTable):
+                table = CourseEmbeddingTable.load(course_embeddings)
+            if table.spec == provider_spec(self.embedder):
+                self.course_table = table
+            else:
+                log_event(logger, "course_table_ignored", level=logging.WARNING,
+                          table=table.spec, provider=provider_spec(self.embedder))
+        # search_cache: a SearchCache in front of Weaviate, so re-running the
+        # same recommendation does not repeat the GraphQL query. Call
+        # invalidate_search_cache() after the UWCourse index is rebuilt.
+        self.search_cache = search_cache
+        # deadline (seconds) bounds each recommendation run unless the caller
+        # passes its own. What is left of it becomes the request timeout of
+        # each embedding call and Weaviate search, so nothing queues for it.
+        self.deadline = deadline
+        # Each DARS is embedded as a compact summary of at most this many
+        # tokens (dars.compact_dars); None embeds the full report JSON.
+        self.dars_token_budget = dars_token_budget
 
     def convert_dars_pdf_to_text(self, pdf_path, output_txt_path):
+        import pdfplumber
+
         text_output = []
         with pdfplumber.open(pdf_path) as pdf:
             for page in pdf.pages:
@@ -175,6 +243,10 @@ class CourseSearchHelper:
     def parse_dars_report(self, dars_text):
         if isinstance(dars_text, dict):
             return dars_text
+        with span("dars_parse"):
+            return self._parse_dars_text(dars_text)
+
+    def _parse_dars_text(self, dars_text):
         today = date(2025, 1, 19)
         data = {
             "student_info": {"student_name": "", "catalog_year": "", "program": ""},
@@ -302,13 +374,27 @@ class CourseSearchHelper:
                     })
         return data
 
+    @traced("embedding", source="course")
     def generate_embedding(self, text):
-        print(f"🧠 Generating embedding for: {text[:50]}...")
-        response = openai.embeddings.create(input=[text], model="text-embedding-3-large")
-        return response.data[0].embedding
+        log_event(logger, "embedding", sample=HOT_PATH_SAMPLE, chars=len(text), preview=text[:50])
+        return self.embedder.embed_one(text).tolist()
+
+    @traced("embedding", source="course")
+    def generate_embeddings(self, texts, timeout=None):
+        """One batched provider call for many texts; returns a list of vectors."""
+        texts = list(texts)
+        if not texts:
+            return []
+        return self.embedder.embed(texts, timeout=timeout).tolist()
+
+    @traced("embedding", source="course")
+    async def agenerate_embeddings(self, texts, timeout=None):
+        texts = list(texts)
+        if not texts:
+            return []
+        return (await self.embedder.aembed(texts, timeout=timeout)).tolist()
 
     def parse_multiple_dars_reports(self, dars_reports):
-        print(f"📄 Parsing {len(dars_reports)} DARS reports...")
         completed_courses = set()
         for dars_json in dars_reports:
             parsed_data = self.parse_dars_report(dars_json)
@@ -318,7 +404,8 @@ class CourseSearchHelper:
         for dars_json in dars_reports:
             parsed_data = self.parse_dars_report(dars_json)
             required_from_dars.update(self.extract_required_courses_from_dars(parsed_data))
-        print(f"✔ Aggregated courses: Completed: {len(completed_courses)}, Required: {len(required_from_dars)}")
+        log_event(logger, "dars_aggregated", reports=len(dars_reports),
+                  completed=len(completed_courses), required=len(required_from_dars))
         return {"completed": completed_courses, "required": required_from_dars}
 
     def extract_required_courses_from_dars(self, dars_data):
@@ -338,25 +425,83 @@ class CourseSearchHelper:
         matches = re.findall(pattern, text, flags=re.IGNORECASE)
         return {match.strip() for match in matches}
 
+    def lookup_required_embeddings(self, required_courses):
+        """(vectors from the course table, codes it does not have and that still need embedding)."""
+        codes = [self.normalize_course_code(c) for c in required_courses]
+        if self.course_table is None:
+            return [], codes
+        vectors, missing = self.course_table.lookup(codes)
+        log_event(logger, "course_table_lookup", sample=HOT_PATH_SAMPLE,
+                  found=len(vectors), missing=len(missing))
+        return vectors.tolist(), missing
+
     def generate_required_course_embeddings(self, required_courses):
-        print(f"🔎 Generating embeddings for {len(required_courses)} required courses...")
-        return [self.generate_embedding(course) for course in required_courses]
+        found, missing = self.lookup_required_embeddings(required_courses)
+        return found + self.generate_embeddings(missing)
+
+    def dars_embedding_text(self, dars_json):
+        if self.dars_token_budget is None:
+            return json.dumps(dars_json)
+        return compact_dars(dars_json, self.dars_token_budget)
 
     def compute_combined_embedding(self, dars_embeddings, interest_embedding, required_embeddings):
-        print("🧬 Computing combined embedding...")
         all_embeddings = dars_embeddings + [interest_embedding] + required_embeddings
         combined_vector = np.mean(all_embeddings, axis=0).tolist()
         return combined_vector
 
-    def search_recommended_courses(self, combined_embedding, top_k=10):
-        print(f"🔍 Querying Weaviate for course recommendations... (top_k={top_k})")
+    @traced("lexical", source="courses")
+    def lexical_candidates(self, query_text, required_courses=()):
+        """
+        Course titles to restrict the vector search to, or None when the
+        prefilter is off. Required courses in the catalog are always kept,
+        since filter_recommendations would discard anything else anyway.
+        They come straight from extract_course_codes, so they are normalised
+        to the catalog's key format first.
+        """
+        if self.course_lexical is None:
+            return None
+        idxs, _ = self.course_lexical.search(query_text, self.lexical_prefilter)
+        codes = [self.course_lexical_codes[i] for i in idxs]
+        seen = set(codes)
+        for code in sorted({self.normalize_course_code(c) for c in required_courses}):
+            if code in self.course_prereq_dict and code not in seen:
+                codes.append(code)
+                seen.add(code)
+        return [self.course_prereq_dict[c]["title"] for c in codes] or None
+
+    def invalidate_search_cache(self):
+        if self.search_cache is None:
+            return None
+        return self.search_cache.invalidate()
+
+    def search_recommended_courses(self, combined_embedding, top_k=10, candidates=None, timeout=None):
+        if self.search_cache is None:
+            return self._search_weaviate(combined_embedding, top_k, candidates, timeout)
+        key = self.search_cache.key(combined_embedding, top_k=top_k, candidates=candidates)
+        results = self.search_cache.get(key)
+        if results is None:
+            results = self._search_weaviate(combined_embedding, top_k, candidates, timeout)
+            if results is not None:  # failures are retried, not cached
+                self.search_cache.put(key, results)
+        return results
+
+    @traced("weaviate")
+    def _search_weaviate(self, combined_embedding, top_k=10, candidates=None, timeout=None):
         url = f"{self.weaviate_url}/graphql"
+        where = ""
+        if candidates:
+            operands = ", ".join(
+                '{ path: ["courseTitle"], operator: Equal, valueText: %s }' % json.dumps(title)
+                for title in candidates
+            )
+            where = "where: { operator: Or, operands: [%s] }" % operands
         payload = {
             "query": """
             {
               Get {
                 UWCourse(
                   nearVector: { vector: %s }
+                  %s
                   limit: %d
                 ) {
                   courseTitle
@@ -364,16 +509,22 @@ class CourseSearchHelper:
                 }
               }
             }
-            """ % (json.dumps(combined_embedding), top_k)
+            """ % (json.dumps(combined_embedding), where, top_k)
         }
+        import requests
+
         headers = {"Content-Type": "application/json"}
-        response = requests.post(url, headers=headers, json=payload)
+        try:
+            response = requests.post(url, headers=headers, json=payload, timeout=timeout)
+        except requests.Timeout:
+            raise TimeoutError(f"Weaviate did not answer within {timeout:.1f}s") from None
         if response.status_code == 200:
             results = response.json().get("data", {}).get("Get", {}).get("UWCourse", [])
-            print(f"✔ Weaviate returned {len(results)} results.")
+            log_event(logger, "weaviate_results", top_k=top_k, returned=len(results))
             return results
         else:
-            print(f"❌ Weaviate query failed: {response.text}")
+            log_event(logger, "weaviate_failed", level=logging.WARNING,
+                      status=response.status_code, body=response.text[:500])
             return None
 
     def normalize_course_code(self, course_title):
@@ -398,63 +549,180 @@ class CourseSearchHelper:
         lower_req = req_text.lower().strip()
         return lower_req == "graduate/professional standing"
 
-    def recommend_courses(self, dars_reports, interest_text, top_k=10):
-        print("🚀 Running course recommendation system...")
+    @staticmethod
+    def _deadline_at(deadline):
+        """Seconds from now -> a time.monotonic() instant (None stays None)."""
+        return time.monotonic() + deadline if deadline is not None else None
+
+    @staticmethod
+    def _remaining(deadline):
+        if deadline is None:
+            return None
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError("recommendation deadline exceeded")
+        return remaining
+
+    def _query_texts(self, parsed_dars, dars_reports, interest_text):
+        """Texts for the one batched embedding call (DARS, interests, required courses not in the table) and the table's vectors."""
+        table_vectors, to_embed = self.lookup_required_embeddings(parsed_dars["required"])
+        texts = [self.dars_embedding_text(dars_json) for dars_json in dars_reports] + [interest_text] + to_embed
+        return texts, table_vectors
+
+    def _combine(self, vectors, table_vectors, n_dars):
+        return self.compute_combined_embedding(
+            vectors[:n_dars], vectors[n_dars], table_vectors + vectors[n_dars + 1:]
+        )
+
+    def _query_vector(self, parsed_dars, dars_reports, interest_text, deadline=None):
+        """The combined query vector and lexical candidates."""
+        texts, table_vectors = self._query_texts(parsed_dars, dars_reports, interest_text)
+        vectors = self.generate_embeddings(texts, timeout=self._remaining(deadline))
+        combined_embedding = self._combine(vectors, table_vectors, len(dars_reports))
+        return combined_embedding, self.lexical_candidates(interest_text, parsed_dars["required"])
+
+    def recommend_courses(self, dars_reports, interest_text, top_k=10, rank_by_unlocks=False, deadline=None):
+        """
+        All texts are embedded in one batched call, then Weaviate is searched.
+        `deadline` (seconds, default self.deadline) bounds the whole call,
+        upstream requests included; exceeding it raises TimeoutError.
+        """
+        deadline = self._deadline_at(deadline if deadline is not None else self.deadline)
         parsed_dars = self.parse_multiple_dars_reports(dars_reports)
         required_courses = parsed_dars["required"]
-
-        dars_embeddings = [self.generate_embedding(json.dumps(dars_json)) for dars_json in dars_reports]
-        interest_embedding = self.generate_embedding(interest_text)
-        required_embeddings = self.generate_required_course_embeddings(required_courses)
-        combined_embedding = self.compute_combined_embedding(dars_embeddings, interest_embedding, required_embeddings)
-        recommended_courses = self.search_recommended_courses(combined_embedding, top_k)
+        combined_embedding, candidates = self._query_vector(parsed_dars, dars_reports, interest_text, deadline)
+        recommended_courses = self.search_recommended_courses(
+            combined_embedding, top_k, candidates, timeout=self._remaining(deadline)
+        )
         if recommended_courses is None:
-            print("⚠ No courses retrieved.")
+            log_event(logger, "no_courses_retrieved", level=logging.WARNING)
             return []
         completed_set = parsed_dars["completed"]
-        print(parsed_dars)
-        filtered = []
-        for course in recommended_courses:
-            norm_code = self.normalize_course_code(course["courseTitle"].split("—")[0].strip())
-            if norm_code in completed_set:
-                print(f"Skipping {norm_code} because it's already completed.")
-                continue
-            if required_courses and norm_code not in required_courses:
-                print(f"Skipping {norm_code} because it is not in required courses.")
-                continue
-            if norm_code in self.course_prereq_dict:
-                req_text = self.course_prereq_dict[norm_code]["requisites"]
-                if self.is_only_grad_standing(req_text):
-                    print(f"Skipping {norm_code} because its prerequisite is only graduate/professional standing.")
-                    continue
-            filtered.append(course)
+        log_event(logger, "parsed_dars", completed=sorted(completed_set), required=sorted(required_courses))
+        filtered = self.filter_recommendations(recommended_courses, completed_set, required_courses)
         if len(filtered) < 3:
-            print("⚠ Less than 3 courses remain after filtering. Re-running with top_k=25.")
+            log_event(logger, "requery", level=logging.INFO, remaining=len(filtered), top_k=25)
+            # Same inputs, same vector: only the search is repeated.
             recommended_courses_2 = self.search_recommended_courses(
-                self.compute_combined_embedding(
-                    [self.generate_embedding(json.dumps(r)) for r in dars_reports],
-                    self.generate_embedding(interest_text),
-                    self.generate_required_course_embeddings(required_courses)
-                ), top_k=25)
+                combined_embedding, top_k=25, timeout=self._remaining(deadline)
+            )
             if not recommended_courses_2:
                 return []
-            filtered2 = []
-            for course in recommended_courses_2:
-                norm_code = self.normalize_course_code(course["courseTitle"].split("—")[0].strip())
-                if norm_code in completed_set:
-                    continue
-                if required_courses and norm_code not in required_courses:
-                    continue
-                filtered2.append(course)
-            filtered = filtered2
-        print("\n✅ Final Recommended Courses:")
-        for item in filtered:
-            print(f"🔹 {item['courseTitle']}")
+            filtered = self.filter_recommendations(
+                recommended_courses_2, completed_set, required_courses, skip_grad_only=False
+            )
+        if rank_by_unlocks:
+            filtered = self.sort_by_unlocks(filtered)
+        log_event(logger, "recommended", level=logging.INFO, courses=[item["courseTitle"] for item in filtered])
+        return filtered
+
+    async def arecommend_courses(self, dars_reports, interest_text, top_k=10, rank_by_unlocks=False,
+                                 deadline=None):
+        """
+        Async twin of recommend_courses. Every text is embedded in one batched
+        provider call (split and awaited concurrently if it is large); the
+        Weaviate query runs off-loop. `deadline` works as in recommend_courses.
+        """
+        deadline = self._deadline_at(deadline if deadline is not None else self.deadline)
+        parsed_dars = self.parse_multiple_dars_reports(dars_reports)
+        required_courses = parsed_dars["required"]
+        texts, table_vectors = self._query_texts(parsed_dars, dars_reports, interest_text)
+        vectors = await self.agenerate_embeddings(texts, timeout=self._remaining(deadline))
+        combined_embedding = self._combine(vectors, table_vectors, len(dars_reports))
+        candidates = self.lexical_candidates(interest_text, required_courses)
+        recommended_courses = await asyncio.to_thread(
+            self.search_recommended_courses, combined_embedding, top_k, candidates, self._remaining(deadline)
+        )
+        if recommended_courses is None:
+            return []
+        completed_set = parsed_dars["completed"]
+        filtered = self.filter_recommendations(recommended_courses, completed_set, required_courses)
+        if len(filtered) < 3:
+            # Same inputs give the same combined vector, so only the search is
+            # repeated, wider and without the lexical restriction.
+            recommended_courses_2 = await asyncio.to_thread(
+                self.search_recommended_courses, combined_embedding, 25, None, self._remaining(deadline)
+            )
+            if not recommended_courses_2:
+                return []
+            filtered = self.filter_recommendations(
+                recommended_courses_2, completed_set, required_courses, skip_grad_only=False
+            )
+        if rank_by_unlocks:
+            filtered = self.sort_by_unlocks(filtered)
         return filtered
 
+    def unlock_count(self, course):
+        """How many catalog courses this recommendation unlocks, directly or transitively."""
+        if self.unlocks is None:
+            return 0
+        return self.unlocks.count(self.normalize_course_code(course["courseTitle"].split("—")[0].strip()))
+
+    def sort_by_unlocks(self, courses):
+        """Most-unlocking first; ties keep their similarity order."""
+        return sorted(courses, key=self.unlock_count, reverse=True)
+
+    def iter_recommendations(self, dars_reports, interest_text, top_k=10, deadline=None):
+        """
+        Generator twin of recommend_courses: yields each course the moment it
+        passes the filters instead of returning the finished list. All texts
+        go out in one batched embedding call; if fewer than 3 courses survive
+        the first search, the wider re-query reuses the same vector and
+        yields only courses not already yielded. `deadline` (seconds, default
+        self.deadline) runs from the first next(); past it, TimeoutError.
+        """
+        deadline = self._deadline_at(deadline if deadline is not None else self.deadline)
+        parsed_dars = self.parse_multiple_dars_reports(dars_reports)
+        required_courses = parsed_dars["required"]
+        completed_set = parsed_dars["completed"]
+        combined_embedding, candidates = self._query_vector(parsed_dars, dars_reports, interest_text, deadline)
+        recommended_courses = self.search_recommended_courses(
+            combined_embedding, top_k, candidates, timeout=self._remaining(deadline)
+        )
+        if recommended_courses is None:
+            log_event(logger, "no_courses_retrieved", level=logging.WARNING)
+            return
+        yielded = set()
+        for course in recommended_courses:
+            if self.passes_filters(course, completed_set, required_courses):
+                yielded.add(course["courseTitle"])
+                yield course
+        if len(yielded) < 3:
+            log_event(logger, "requery", level=logging.INFO, remaining=len(yielded), top_k=25)
+            for course in self.search_recommended_courses(
+                combined_embedding, top_k=25, timeout=self._remaining(deadline)
+            ) or []:
+                if course["courseTitle"] in yielded:
+                    continue
+                if self.passes_filters(course, completed_set, required_courses, skip_grad_only=False):
+                    yielded.add(course["courseTitle"])
+                    yield course
+
+    def passes_filters(self, course, completed_set, required_courses, skip_grad_only=True):
+        """True unless the course is completed, not required, or (optionally) grad-standing only."""
+        norm_code = self.normalize_course_code(course["courseTitle"].split("—")[0].strip())
+        if norm_code in completed_set:
+            log_event(logger, "skip_course", sample=HOT_PATH_SAMPLE, course=norm_code, reason="completed")
+            return False
+        if required_courses and norm_code not in required_courses:
+            log_event(logger, "skip_course", sample=HOT_PATH_SAMPLE, course=norm_code, reason="not_required")
+            return False
+        if skip_grad_only and norm_code in self.course_prereq_dict:
+            req_text = self.course_prereq_dict[norm_code]["requisites"]
+            if self.is_only_grad_standing(req_text):
+                log_event(logger, "skip_course", sample=HOT_PATH_SAMPLE, course=norm_code, reason="grad_only")
+                return False
+        return True
+
+    def filter_recommendations(self, courses, completed_set, required_courses, skip_grad_only=True):
+        return [
+            course for course in courses
+            if self.passes_filters(course, completed_set, required_courses, skip_grad_only)
+        ]
+
     # --- Modified optimal_prereq_path: Immediate prerequisites only (no recursion) ---
     def optimal_prereq_path(self, course_code, completed, memo=None, visited=None):
-        print(f"[Modified] Computing immediate prerequisite path for {course_code}.")
+        log_event(logger, "prereq_path", sample=HOT_PATH_SAMPLE, course=course_code)
         # If already completed or no requisites provided, simply return the course itself
         if course_code in completed or course_code not in self.course_prereq_dict or not self.course_prereq_dict[course_code]["requisites"].strip() or self.is_only_grad_standing(self.course_prereq_dict[course_code]["requisites"]):
             return (0, [course_code])
@@ -470,10 +738,13 @@ class CourseSearchHelper:
             best_seq.append(course_code)
             return (cost, best_seq)
         except Exception as e:
-            print(f"Error parsing prerequisites for {course_code}: {e}")
+            log_event(logger, "prereq_parse_error", level=logging.WARNING, course=course_code, error=str(e))
             return (float('inf'), [course_code])
 
     def visualize_sequences_linear(self, sequences, target_course):
+        import matplotlib.pyplot as plt
+        import networkx as nx
+
         num_seq = len(sequences)
         cols = 2
         rows = (num_seq + 1) // cols
@@ -610,6 +881,7 @@ class CourseSearchHelper:
                 return CourseSearchHelper.LeafNode(token)
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
     helper = CourseSearchHelper(
         openai_api_key="",  # Replace with your actual API key.
         courses_csv_path="courses_output.csv"   # Ensure this CSV exists and is formatted.
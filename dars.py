@@ -1,7 +1,19 @@
 import re
+import os
 import json
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from datetime import date
 
+from tokens import estimate_tokens
+from tracing import traced
+
+# The second line of every audit: "Janaswamy,Anurag Catalog Year: 20231".
+# Registrar exports concatenate audits, so this is also where one ends and
+# the next begins (one line up: the report header).
+STUDENT_LINE = re.compile(r"^\S.*\sCatalog Year:")
+
+@traced("dars_parse")
 def parse_dars_report(dars_text):
     """
     Parses the DARS report into a structured JSON-like dict, following the pseudocode:
@@ -392,6 +404,145 @@ def parse_dars_report(dars_text):
     return data
 
 
+def iter_audit_texts(lines):
+    """
+    Split an export of concatenated audits into one text per audit, reading
+    `lines` (any iterable, e.g. an open file) lazily. Only the audit being
+    assembled is held in memory. Lines before the first audit are dropped;
+    text with no recognisable audit start is yielded whole.
+    """
+    current, prev, started = [], None, False
+    for raw in lines:
+        line = raw.rstrip("\r\n").replace("\f", "")
+        if prev is not None:
+            if STUDENT_LINE.match(line):
+                if started:
+                    yield "\n".join(current)
+                current, started = [], True
+            current.append(prev)
+        prev = line
+    if prev is not None:
+        current.append(prev)
+    if started or any(ln.strip() for ln in current):
+        yield "\n".join(current)
+
+
+def _parse_batch(texts):
+    return [parse_dars_report(t) for t in texts]
+
+
+_SEASONS = {"SP": 0, "SU": 1, "FA": 2}
+
+
+def _term_key(term):
+    """"FA24" -> (24, 2); unknown terms sort first."""
+    m = re.match(r"^([A-Z]{2})(\d{2})$", term or "")
+    if not m:
+        return (-1, -1)
+    return (int(m.group(2)), _SEASONS.get(m.group(1), -1))
+
+
+def _course_line(c):
+    return f"{c['course_code']} {c['course_name']}".strip()
+
+
+def _requirement_lines(sections):
+    """One line per subsection that still lists required courses; satisfied (status OK) sections are skipped."""
+    for name, info in sections.items():
+        if info.get("status") == "OK":
+            continue
+        for sub, subdata in info.get("subsections", {}).items():
+            needs = "; ".join(r.replace("SELECT FROM:", "from").strip() for r in subdata.get("required_courses", []))
+            if needs:
+                yield f"{name} / {sub}: {needs}"
+
+
+def compact_dars(report, token_budget=256):
+    """
+    A short, deterministic text for embedding a parsed audit instead of its
+    whole JSON: program and credit totals, then unmet requirements, courses
+    in progress and completed courses (most recent term first), added line
+    by line within `token_budget` tokens (tokens.estimate_tokens). Each
+    section may fill the budget up to its cumulative share, so long
+    requirement lists cannot crowd out recent courses; what a section does
+    not use passes to the next. The header line is always kept.
+    """
+    info = report.get("student_info", {})
+    credits = report.get("total_credits", {})
+    header = (
+        f"Program: {info.get('program') or 'unknown'} (catalog {info.get('catalog_year') or '?'}). "
+        f"Credits: {credits.get('earned', 0)} earned, {credits.get('needed', 0)} needed, "
+        f"{credits.get('in_progress', 0)} in progress."
+    )
+    # (title, lines, cumulative share of the budget left after the header)
+    sections = [
+        ("Remaining requirements:", _requirement_lines(report.get("major_requirements", {})), 0.45),
+        ("In progress:", (_course_line(c) for c in report.get("in_progress_courses", [])), 0.6),
+        ("Planned:", (_course_line(c) for c in report.get("upcoming_courses", [])), 0.7),
+        ("Recent courses:", (_course_line(c) for c in sorted(
+            report.get("completed_courses", []), key=lambda c: _term_key(c.get("term")), reverse=True)), 1.0),
+        ("General education remaining:", _requirement_lines(report.get("general_education", {})), 1.0),
+    ]
+    out = [header]
+    used = estimate_tokens(header)
+    body = max(0, token_budget - used)
+    for title, lines, share in sections:
+        cap = token_budget - body + int(share * body)
+        cost = estimate_tokens(title)
+        titled = False
+        for line in lines:
+            line = f"- {line}"
+            need = estimate_tokens(line) + (0 if titled else cost)
+            if used + need > cap:
+                break
+            if not titled:
+                out.append(title)
+                titled = True
+            out.append(line)
+            used += need
+    return "\n".join(out)
+
+
+def iter_dars_reports(source, workers=1, batch_size=16, max_pending=None):
+    """
+    Parse every audit in a multi-student export, one report at a time and in
+    input order. `source` is a path or a text file handle.
+
+    With workers > 1, audits are parsed in a process pool, `batch_size` per
+    task; at most `max_pending` batches (default 2 per worker) are in flight,
+    so memory stays flat however large the export is.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, encoding="utf-8", errors="replace") as fh:
+            yield from iter_dars_reports(fh, workers, batch_size, max_pending)
+        return
+
+    texts = iter_audit_texts(source)
+    if workers <= 1:
+        for text in texts:
+            yield parse_dars_report(text)
+        return
+
+    max_pending = max_pending or 2 * workers
+    pool = ProcessPoolExecutor(max_workers=workers)
+    pending = deque()
+    try:
+        batch = []
+        for text in texts:
+            batch.append(text)
+            if len(batch) == batch_size:
+                pending.append(pool.submit(_parse_batch, batch))
+                batch = []
+                if len(pending) >= max_pending:
+                    yield from pending.popleft().result()
+        if batch:
+            pending.append(pool.submit(_parse_batch, batch))
+        while pending:
+            yield from pending.popleft().result()
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
 if __name__ == "__main__":
     with open("dars_report_final_check.txt", "r", encoding="utf-8") as file:
         text = file.read()
@@ -0,0 +1,192 @@
+"""
+Bulk DARS ingestion: PDFs in, one parsed audit per line of JSON out.
+
+    python dars_ingest.py audits/ -o cohort.jsonl
+    python dars_ingest.py "exports/**/*.pdf" -o cohort.jsonl --workers 8 --with-text
+
+Text extraction (pdfplumber) and parsing (dars.parse_dars_report) run in a
+process pool. Every output line carries the file's SHA-256; files whose
+content is already in the output (under any name) are skipped, so an
+interrupted run picks up where it stopped when started again with the
+same -o. Failures are written too, as {"status": "error"}, and retried on
+the next run unless --skip-failed is given.
+
+Each line:
+    {"path", "sha256", "status": "ok"|"error", "pages", "extract_s",
+     "parse_s", "report": {...} | "error": "...", ["text": "..."]}
+"""
+from __future__ import annotations
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def available_cpus() -> int:
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0)) or 1
+    return os.cpu_count() or 1
+
+
+def discover(inputs: Iterable[str]) -> List[Path]:
+    """Files, directories (searched recursively for *.pdf) and glob patterns, deduplicated."""
+    found: Dict[Path, None] = {}
+    for spec in inputs:
+        path = Path(spec)
+        if path.is_dir():
+            matches = sorted(p for p in path.rglob("*") if p.suffix.lower() == ".pdf")
+        elif path.is_file():
+            matches = [path]
+        else:
+            matches = sorted(Path(p) for p in glob.glob(spec, recursive=True) if Path(p).is_file())
+        if not matches:
+            print(f"warning: {spec} matched no files", file=sys.stderr)
+        for p in matches:
+            found.setdefault(p.resolve(), None)
+    return list(found)
+
+
+def sha256_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_done(output: Path, *, skip_failed: bool) -> Set[str]:
+    """Hashes already in `output`; a torn last line from a killed run is cut off first."""
+    if not output.exists():
+        return set()
+    with open(output, "rb+") as fh:
+        data = fh.read()
+        if data and not data.endswith(b"\n"):
+            fh.truncate(data.rfind(b"\n") + 1)
+            data = data[:data.rfind(b"\n") + 1]
+    done = set()
+    for line in data.splitlines():
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue
+        if record.get("status") == "ok" or skip_failed:
+            done.add(record.get("sha256"))
+    return done
+
+
+def process(path: str, sha256: str, with_text: bool) -> dict:
+    """Runs in a worker: extract, parse, and time both. Never raises."""
+    record = {"path": path, "sha256": sha256}
+    try:
+        import pdfplumber
+
+        from dars import parse_dars_report
+
+        t0 = time.perf_counter()
+        pages = []
+        with pdfplumber.open(path) as pdf:
+            for page in pdf.pages:
+                txt = page.extract_text()
+                if txt:
+                    pages.append(txt)
+        text = "\n".join(pages).strip()
+        t1 = time.perf_counter()
+        report = parse_dars_report(text)
+        t2 = time.perf_counter()
+    except Exception as e:
+        return record | {"status": "error", "error": f"{type(e).__name__}: {e}"}
+    record |= {
+        "status": "ok",
+        "pages": len(pages),
+        "extract_s": round(t1 - t0, 4),
+        "parse_s": round(t2 - t1, 4),
+        "report": report,
+    }
+    if with_text:
+        record["text"] = text
+    return record
+
+
+def _pct(values: List[float], p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p * len(values)))] if values else 0.0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Extract and parse DARS PDFs in parallel into JSON Lines.")
+    ap.add_argument("inputs", nargs="+", help="PDF files, directories or glob patterns")
+    ap.add_argument("-o", "--output", type=Path, required=True, help="JSON Lines file (appended to; resumable)")
+    ap.add_argument("--workers", type=int, default=available_cpus())
+    ap.add_argument("--with-text", action="store_true", help="include the extracted text in each record")
+    ap.add_argument("--skip-failed", action="store_true", help="do not retry files that failed on a previous run")
+    ap.add_argument("-q", "--quiet", action="store_true", help="summary only, no per-file lines")
+    args = ap.parse_args(argv)
+
+    started = time.perf_counter()
+    files = discover(args.inputs)
+    done = load_done(args.output, skip_failed=args.skip_failed)
+
+    todo: Dict[str, Path] = {}
+    skipped = duplicates = 0
+    for path in files:
+        digest = sha256_file(path)
+        if digest in done:
+            skipped += 1
+        elif digest in todo:
+            duplicates += 1
+        else:
+            todo[digest] = path
+    print(f"{len(files)} files: {len(todo)} to process, {skipped} already in {args.output}, "
+          f"{duplicates} duplicate content", file=sys.stderr)
+
+    ok: List[dict] = []
+    failed: List[dict] = []
+    with open(args.output, "a", encoding="utf-8") as out, \
+            ProcessPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        futures = [pool.submit(process, str(p), digest, args.with_text) for digest, p in todo.items()]
+        try:
+            for n, future in enumerate(as_completed(futures), start=1):
+                record = future.result()
+                out.write(json.dumps(record) + "\n")
+                out.flush()
+                (ok if record["status"] == "ok" else failed).append(record)
+                if not args.quiet:
+                    if record["status"] == "ok":
+                        detail = f"extract {record['extract_s']:.3f}s  parse {record['parse_s']:.3f}s"
+                    else:
+                        detail = record["error"]
+                    print(f"[{n}/{len(futures)}] {record['status']:<5} {record['path']}  {detail}",
+                          file=sys.stderr)
+        except KeyboardInterrupt:
+            for f in futures:
+                f.cancel()
+            print("interrupted; rerun with the same -o to resume", file=sys.stderr)
+            return 130
+
+    wall = time.perf_counter() - started
+    extract = [r["extract_s"] for r in ok]
+    parse = [r["parse_s"] for r in ok]
+    print(f"\n{len(ok)} ok, {len(failed)} failed, {skipped} skipped in {wall:.2f}s "
+          f"({len(ok) / wall if wall else 0:.1f} files/s, {args.workers} workers)", file=sys.stderr)
+    if ok:
+        print(f"  extract  p50 {statistics.median(extract):.3f}s  p95 {_pct(extract, 0.95):.3f}s  "
+              f"total {sum(extract):.2f}s", file=sys.stderr)
+        print(f"  parse    p50 {statistics.median(parse):.3f}s  p95 {_pct(parse, 0.95):.3f}s  "
+              f"total {sum(parse):.2f}s", file=sys.stderr)
+    for r in failed:
+        print(f"  FAILED {r['path']}: {r['error']}", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
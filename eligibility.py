@@ -0,0 +1,175 @@
+"""
+Which catalog courses a student can take now, for the whole catalog at once.
+
+    index = EligibilityIndex(requisites, parse=parse, normalize=normalize)
+    index.eligible({"MATH 221", "COMP SCI 300"})      # ["COMP SCI 400", ...]
+    index.evaluate(index.masks([done_a, done_b]))      # (2, courses) bool
+
+Every course's requisite tree is compiled once into gates of one shared
+boolean circuit whose inputs are the bits of a completed-course mask over
+an integer-indexed universe (catalog courses plus any code a requisite
+mentions). Gates are grouped by depth, so evaluating the whole catalog for
+one or many students is one `reduceat` per depth level and operator
+instead of a parse and a tree walk per course.
+
+Leaves that are not course codes ("consent of instructor", "junior
+standing") are conditions a transcript cannot show: they count as unmet
+unless `assume_conditions=True`. A requisite that does not parse makes its
+course ineligible; an empty one makes it always eligible.
+"""
+from __future__ import annotations
+
+import re
+from typing import Callable, Dict, Iterable, List, Mapping, Sequence, Tuple
+
+import numpy as np
+
+_CODE_RE = re.compile(r"^[A-Z][A-Z &/.\-]* \d+[A-Z]?$")
+_BARE_NUMBER_RE = re.compile(r"^\d+[A-Z]?$")
+
+FALSE, TRUE, CONDITION = 0, 1, 2  # constant signals ahead of the course bits
+_CONSTANTS = 3
+
+
+class EligibilityIndex:
+    def __init__(
+        self,
+        requisites: Mapping[str, str],
+        *,
+        parse: Callable[[str], object],
+        normalize: Callable[[str], str],
+    ):
+        self.catalog: List[str] = list(requisites)
+        self.codes: List[str] = list(self.catalog)
+        self.index: Dict[str, int] = {c: i for i, c in enumerate(self.codes)}
+        self.unparsed: List[str] = []
+        # Course codes each requisite mentions (the edges of unlocks.UnlocksIndex).
+        self.prerequisites: Dict[str, Tuple[str, ...]] = {}
+        self._refs: List[str] = []
+        self._normalize = normalize
+        # gates[g] = (op, child refs); refs are ("const" | "code" | "gate", i)
+        # and become signal numbers in _finish, once the universe is complete.
+        self._gates: List[Tuple[str, List[object]]] = []
+        outputs = []
+        for code, text in requisites.items():
+            if not text.strip():
+                outputs.append(("const", TRUE))
+                continue
+            try:
+                tree = parse(text)
+            except Exception:
+                self.unparsed.append(code)
+                outputs.append(("const", FALSE))
+                continue
+            self._refs = []
+            outputs.append(self._compile(tree, [None]))
+            self.prerequisites[code] = tuple(dict.fromkeys(self._refs))
+        self._finish(outputs)
+
+    # ------------------------------------------------------------------ #
+    def _leaf(self, value: str, last_dept: list):
+        code = self._normalize(value).strip()
+        if _BARE_NUMBER_RE.match(code) and last_dept[0]:
+            code = f"{last_dept[0]} {code}"  # "MATH 221 or 217"
+        if not _CODE_RE.match(code):
+            return ("const", CONDITION)
+        last_dept[0] = code.rsplit(" ", 1)[0]
+        self._refs.append(code)
+        if code not in self.index:
+            self.index[code] = len(self.codes)
+            self.codes.append(code)
+        return ("code", self.index[code])
+
+    def _compile(self, node, last_dept: list):
+        children = getattr(node, "children", None)
+        if children is None:
+            return self._leaf(node.value, last_dept)
+        op = node.op
+        flat = []
+        for child in children:
+            sub = self._compile(child, last_dept)
+            # (a and (b and c)) -> one gate with three inputs
+            if sub[0] == "gate" and self._gates[sub[1]][0] == op:
+                flat.extend(self._gates[sub[1]][1])
+            else:
+                flat.append(sub)
+        self._gates.append((op, flat))
+        return ("gate", len(self._gates) - 1)
+
+    def _finish(self, outputs) -> None:
+        """Number every signal and group the gates into depth levels."""
+        n_codes = len(self.codes)
+        base = _CONSTANTS + n_codes
+
+        def signal(ref) -> int:
+            kind, i = ref
+            if kind == "const":
+                return i
+            if kind == "code":
+                return _CONSTANTS + i
+            return base + i
+
+        depth = np.zeros(len(self._gates), dtype=np.int64)
+        kids = []
+        for g, (op, children) in enumerate(self._gates):
+            kids.append([signal(c) for c in children])
+            below = [depth[c[1]] for c in children if c[0] == "gate"]
+            depth[g] = 1 + max(below, default=0)  # children always precede parents
+
+        self._levels = []
+        for level in range(1, int(depth.max(initial=0)) + 1):
+            for op, ufunc in (("and", np.logical_and), ("or", np.logical_or)):
+                gates = [g for g in np.flatnonzero(depth == level) if self._gates[g][0] == op]
+                if not gates:
+                    continue
+                flat = np.concatenate([kids[g] for g in gates]).astype(np.int64)
+                offsets = np.cumsum([0] + [len(kids[g]) for g in gates[:-1]]).astype(np.int64)
+                self._levels.append((ufunc, flat, offsets, base + np.asarray(gates, dtype=np.int64)))
+        self._outputs = np.array([signal(o) for o in outputs], dtype=np.int64)
+        self._catalog_bits = np.arange(len(self.catalog), dtype=np.int64)
+        self.n_signals = base + len(self._gates)
+        self._gates = None  # compiled; the nested lists are no longer needed
+
+    # ------------------------------------------------------------------ #
+    def masks(self, completed: Iterable[Iterable[str]]) -> np.ndarray:
+        """(students, universe) bool masks; codes outside the universe are ignored."""
+        rows = [list(c) for c in completed]
+        out = np.zeros((len(rows), len(self.codes)), dtype=bool)
+        for r, codes in enumerate(rows):
+            idx = [self.index[c] for c in codes if c in self.index]
+            out[r, idx] = True
+        return out
+
+    def mask(self, completed: Iterable[str]) -> np.ndarray:
+        return self.masks([completed])[0]
+
+    def evaluate(self, masks: np.ndarray, *, assume_conditions: bool = False) -> np.ndarray:
+        """Requisites met, per student and catalog course: (catalog,) for one mask, (students, catalog) for many."""
+        single = masks.ndim == 1
+        masks = np.atleast_2d(masks)
+        values = np.zeros((len(masks), self.n_signals), dtype=bool)
+        values[:, TRUE] = True
+        values[:, CONDITION] = assume_conditions
+        values[:, _CONSTANTS:_CONSTANTS + len(self.codes)] = masks
+        for ufunc, flat, offsets, targets in self._levels:
+            values[:, targets] = ufunc.reduceat(values[:, flat], offsets, axis=1)
+        met = values[:, self._outputs]
+        return met[0] if single else met
+
+    def eligible(self, completed: Iterable[str], *, include_completed: bool = False,
+                 assume_conditions: bool = False) -> List[str]:
+        """Catalog courses whose requisites `completed` satisfies, in catalog order."""
+        mask = self.mask(completed)
+        met = self.evaluate(mask, assume_conditions=assume_conditions)
+        if not include_completed:
+            met &= ~mask[self._catalog_bits]
+        return [self.catalog[i] for i in np.flatnonzero(met)]
+
+    def eligible_many(self, completed: Sequence[Iterable[str]], *,
+                      include_completed: bool = False,
+                      assume_conditions: bool = False) -> List[List[str]]:
+        masks = self.masks(completed)
+        met = self.evaluate(masks, assume_conditions=assume_conditions)
+        if not include_completed:
+            met &= ~masks[:, self._catalog_bits]
+        return [[self.catalog[i] for i in np.flatnonzero(row)] for row in met]
@@ -0,0 +1,577 @@
+"""
+Embedding providers shared by RAMatcher, ResearchMatcher and CourseSearchHelper.
+
+Every provider takes a batch of strings and returns an (n, dim) float32
+matrix, so callers can send everything they have in one go:
+
+    provider = make_provider("openai:text-embedding-3-large")
+    provider = make_provider("hashing:1024")      # local, offline, ~µs per text
+    vecs = provider.embed(["first text", "second text"])
+
+`provider_from_env("ra")` reads EMBEDDING_PROVIDER_RA (falling back to
+EMBEDDING_PROVIDER, then "openai") so each endpoint can trade quality for
+latency independently. Vectors from different providers are not comparable:
+whatever embedded the corpus must also embed the queries.
+
+Remote providers built that way are shared through one BatchingEmbeddings
+per model, which merges concurrent single-text calls from all requests
+into batched upstream calls under a shared rate budget.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import math
+import os
+import re
+import threading
+import time
+import weakref
+import zlib
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from tokens import estimate_tokens
+
+DEFAULT_OPENAI_MODEL = "text-embedding-3-large"
+
+
+class EmbeddingProvider:
+    """
+    Base class; subclasses implement `embed`. `timeout` (seconds) bounds a
+    call through the provider's own request timeout and raises TimeoutError
+    once it passes; local providers may ignore it.
+    """
+
+    name = "base"
+
+    def fit(self, corpus: Sequence[str]) -> "EmbeddingProvider":
+        """Let corpus-aware providers learn statistics (no-op by default)."""
+        return self
+
+    def embed(self, texts: Sequence[str], *, timeout: Optional[float] = None) -> np.ndarray:
+        raise NotImplementedError
+
+    async def aembed(self, texts: Sequence[str], *, timeout: Optional[float] = None) -> np.ndarray:
+        return await asyncio.to_thread(self.embed, texts, timeout=timeout)
+
+    def embed_one(self, text: str, *, timeout: Optional[float] = None) -> np.ndarray:
+        return self.embed([text], timeout=timeout)[0]
+
+
+# ───────────────────────────────────────────────────────────────────────────────
+#  OpenAI
+# ───────────────────────────────────────────────────────────────────────────────
+class OpenAIEmbeddings(EmbeddingProvider):
+    """Remote embeddings API; inputs are sent `batch_size` at a time."""
+
+    name = "openai"
+
+    def __init__(self, model: str = DEFAULT_OPENAI_MODEL, *, api_key: Optional[str] = None,
+                 batch_size: int = 256):
+        self.model = model
+        self.api_key = api_key
+        self.batch_size = batch_size
+        self._client = None
+        # One async client per event loop: its connection pool is bound to
+        # the loop it was first used on and breaks on any other.
+        self._aclients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, object]" = weakref.WeakKeyDictionary()
+
+    @property
+    def client(self):
+        if self._client is None:
+            from openai import OpenAI
+
+            self._client = OpenAI(api_key=self.api_key)
+        return self._client
+
+    @property
+    def aclient(self):
+        """The AsyncOpenAI client for the running event loop."""
+        loop = asyncio.get_running_loop()
+        client = self._aclients.get(loop)
+        if client is None:
+            from openai import AsyncOpenAI
+
+            client = self._aclients[loop] = AsyncOpenAI(api_key=self.api_key)
+        return client
+
+    def _batches(self, texts: Sequence[str]) -> Iterable[List[str]]:
+        texts = list(texts)
+        for i in range(0, len(texts), self.batch_size):
+            yield texts[i:i + self.batch_size]
+
+    @staticmethod
+    def _to_matrix(rows: List[List[float]]) -> np.ndarray:
+        return np.asarray(rows, dtype=np.float32)
+
+    @staticmethod
+    def _bounded(client, deadline: Optional[float]):
+        """`client` limited to the time left before `deadline`, without retries (they would overrun it)."""
+        if deadline is None:
+            return client
+        left = deadline - time.monotonic()
+        if left <= 0:
+            raise TimeoutError("embedding deadline exceeded")
+        return client.with_options(timeout=left, max_retries=0)
+
+    def embed(self, texts: Sequence[str], *, timeout: Optional[float] = None) -> np.ndarray:
+        from openai import APITimeoutError
+
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        rows: List[List[float]] = []
+        try:
+            for batch in self._batches(texts):
+                resp = self._bounded(self.client, deadline).embeddings.create(input=batch, model=self.model)
+                rows.extend(e.embedding for e in resp.data)
+        except APITimeoutError:
+            raise TimeoutError(f"OpenAI embeddings did not answer within {timeout:.1f}s") from None
+        return self._to_matrix(rows)
+
+    async def aembed(self, texts: Sequence[str], *, timeout: Optional[float] = None) -> np.ndarray:
+        from openai import APITimeoutError
+
+        client = self._bounded(self.aclient, time.monotonic() + timeout if timeout is not None else None)
+        try:
+            resps = await asyncio.gather(*(
+                client.embeddings.create(input=batch, model=self.model)
+                for batch in self._batches(texts)
+            ))
+        except APITimeoutError:
+            raise TimeoutError(f"OpenAI embeddings did not answer within {timeout:.1f}s") from None
+        return self._to_matrix([e.embedding for resp in resps for e in resp.data])
+
+
+# ───────────────────────────────────────────────────────────────────────────────
+#  Local hashing / TF-IDF projection
+# ───────────────────────────────────────────────────────────────────────────────
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+class HashingEmbeddings(EmbeddingProvider):
+    """
+    Signed feature hashing of word unigrams and bigrams into `dim` buckets,
+    with sublinear TF and (after `fit`) IDF weighting, L2-normalised.
+
+    Pure CPU, deterministic across processes, nothing to download. Good
+    enough to rank faculty by topical overlap; not a semantic model.
+    """
+
+    name = "hashing"
+
+    def __init__(self, dim: int = 1024, *, bigrams: bool = True):
+        self.dim = dim
+        self.bigrams = bigrams
+        self.idf = np.ones(dim, dtype=np.float32)
+
+    def _features(self, text: str) -> List[str]:
+        words = _TOKEN_RE.findall(text.lower())
+        if self.bigrams:
+            return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+        return words
+
+    def _hashed(self, text: str) -> dict:
+        counts: dict = {}
+        for feat in self._features(text):
+            h = zlib.crc32(feat.encode())
+            idx = h % self.dim
+            sign = 1.0 if (h >> 31) & 1 else -1.0
+            counts[idx] = counts.get(idx, 0.0) + sign
+        return counts
+
+    def fit(self, corpus: Sequence[str]) -> "HashingEmbeddings":
+        df = np.zeros(self.dim, dtype=np.float64)
+        for text in corpus:
+            for idx in self._hashed(text):
+                df[idx] += 1
+        n = len(corpus)
+        self.idf = (np.log((1 + n) / (1 + df)) + 1.0).astype(np.float32)
+        return self
+
+    def embed(self, texts: Sequence[str], *, timeout: Optional[float] = None) -> np.ndarray:
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for idx, value in self._hashed(text).items():
+                out[row, idx] = math.copysign(1.0 + math.log(abs(value)), value) if value else 0.0
+        out *= self.idf
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        np.divide(out, norms, out=out, where=norms > 0)
+        return out
+
+    async def aembed(self, texts: Sequence[str], *, timeout: Optional[float] = None) -> np.ndarray:
+        return self.embed(texts)  # microseconds per text; not worth a thread hop
+
+
+# ───────────────────────────────────────────────────────────────────────────────
+#  Content-hash cache
+# ───────────────────────────────────────────────────────────────────────────────
+class CachedEmbeddings(EmbeddingProvider):
+    """
+    Wraps another provider with an in-process LRU keyed by the SHA-256 of
+    each text. Only texts not seen before go to the inner provider, in one
+    batched call; duplicates within a batch are embedded once.
+
+    `fit` passes through and starts a new `generation`, since a re-fitted
+    provider (e.g. new IDF weights) no longer produces the cached vectors.
+    Keys carry the generation, so a call that began before the fit can
+    neither read nor store vectors across it.
+    """
+
+    def __init__(self, inner: EmbeddingProvider, *, max_entries: int = 10_000):
+        self.inner = inner
+        self.name = f"cached-{inner.name}"
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.generation = 0
+        self._lru: "OrderedDict[Tuple[int, bytes], np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(text: str) -> bytes:
+        return hashlib.sha256(text.encode("utf-8")).digest()
+
+    def fit(self, corpus: Sequence[str]) -> "CachedEmbeddings":
+        self.inner.fit(corpus)
+        with self._lock:
+            self.generation += 1
+            self._lru.clear()
+        return self
+
+    def clear(self) -> None:
+        with self._lock:
+            self._lru.clear()
+
+    def _split(self, texts: Sequence[str]):
+        """Cached vectors by position, plus the distinct texts still to embed."""
+        digests = [self.key(t) for t in texts]
+        found: Dict[int, np.ndarray] = {}
+        missing: Dict[Tuple[int, bytes], str] = {}
+        with self._lock:
+            keys = [(self.generation, d) for d in digests]
+            for i, (k, text) in enumerate(zip(keys, texts)):
+                vec = self._lru.get(k)
+                if vec is None:
+                    missing.setdefault(k, text)
+                else:
+                    self._lru.move_to_end(k)
+                    found[i] = vec
+            self.hits += len(found)
+            self.misses += len(missing)
+        return keys, found, missing
+
+    def _merge(self, keys, found, missing, vectors) -> np.ndarray:
+        fresh = {k: np.array(v) for k, v in zip(missing, vectors)}  # own rows, not views of the batch
+        with self._lock:
+            if keys[0][0] == self.generation:  # else embedded by a provider fitted since
+                self._lru.update(fresh)
+            while len(self._lru) > self.max_entries:
+                self._lru.popitem(last=False)
+        return np.stack([found[i] if i in found else fresh[k] for i, k in enumerate(keys)])
+
+    def embed(self, texts: Sequence[str], *, timeout: Optional[float] = None) -> np.ndarray:
+        if not texts:
+            return self.inner.embed(texts, timeout=timeout)
+        keys, found, missing = self._split(texts)
+        vectors = self.inner.embed(list(missing.values()), timeout=timeout) if missing else []
+        return self._merge(keys, found, missing, vectors)
+
+    async def aembed(self, texts: Sequence[str], *, timeout: Optional[float] = None) -> np.ndarray:
+        if not texts:
+            return await self.inner.aembed(texts, timeout=timeout)
+        keys, found, missing = self._split(texts)
+        vectors = await self.inner.aembed(list(missing.values()), timeout=timeout) if missing else []
+        return self._merge(keys, found, missing, vectors)
+
+
+# ───────────────────────────────────────────────────────────────────────────────
+#  Cross-request micro-batching
+# ───────────────────────────────────────────────────────────────────────────────
+class TokenBucket:
+    """Refills at `rate` units per second up to `capacity`; `acquire` blocks until enough are available."""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate
+        self._level = self.capacity
+        self._stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, amount: float = 1.0) -> float:
+        """
+        Take `amount`; returns seconds waited. More than `capacity` is taken
+        one full bucket at a time, so an oversized request still pays for
+        all of it instead of slipping through.
+        """
+        waited = 0.0
+        while amount > self.capacity:
+            waited += self._take(self.capacity)
+            amount -= self.capacity
+        return waited + self._take(amount)
+
+    def _take(self, amount: float) -> float:
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._level = min(self.capacity, self._level + (now - self._stamp) * self.rate)
+                self._stamp = now
+                if self._level >= amount:
+                    self._level -= amount
+                    return waited
+                delay = (amount - self._level) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+class _Waiter:
+    __slots__ = ("texts", "tokens", "done", "result", "error", "on_done")
+
+    def __init__(self, texts: List[str], on_done: Optional[Callable[[], None]] = None):
+        self.texts = texts
+        self.tokens = sum(estimate_tokens(t) for t in texts)
+        self.done = threading.Event()
+        self.result: Optional[np.ndarray] = None
+        self.error: Optional[BaseException] = None
+        self.on_done = on_done
+
+    def finish(self) -> None:
+        self.done.set()
+        if self.on_done is not None:
+            self.on_done()
+
+
+class BatchingEmbeddings(EmbeddingProvider):
+    """
+    Coalesces concurrent `embed` calls from every request thread into shared
+    upstream calls.
+
+    The first pending call opens a window of `max_wait_ms`. Every call that
+    arrives before the window closes joins the same batch, up to
+    `max_batch` inputs and `max_batch_tokens` estimated tokens. The batch
+    goes to the inner provider as one call, and each caller gets back its
+    own rows. At most `max_inflight` batches are outstanding at once. When
+    `requests_per_minute` / `tokens_per_minute` are set, every batch first
+    draws from shared token buckets, so the process as a whole stays
+    under the provider's rate limits instead of collecting 429s.
+
+    A call larger than a batch on its own goes out alone. `aembed` joins the
+    same batches without holding a thread while it waits: the batch wakes
+    the caller's event loop when its rows are ready. A caller's `timeout`
+    only bounds its own wait: the batch still finishes for everyone else.
+    """
+
+    def __init__(self, inner: EmbeddingProvider, *, max_wait_ms: float = 5.0, max_batch: int = 256,
+                 max_batch_tokens: int = 250_000, max_inflight: int = 4,
+                 requests_per_minute: Optional[float] = None, tokens_per_minute: Optional[float] = None):
+        from concurrent.futures import ThreadPoolExecutor
+
+        self.inner = inner
+        self.name = f"batched-{inner.name}"
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_batch = max_batch
+        self.max_batch_tokens = max_batch_tokens
+        self.request_bucket = TokenBucket(requests_per_minute / 60.0, requests_per_minute / 60.0 * 5) \
+            if requests_per_minute else None
+        self.token_bucket = TokenBucket(tokens_per_minute / 60.0, tokens_per_minute / 60.0 * 5) \
+            if tokens_per_minute else None
+        self.batches = 0
+        self.calls = 0
+        self._queue: List[_Waiter] = []
+        self._cond = threading.Condition()
+        self._slots = threading.BoundedSemaphore(max_inflight)
+        self._pool = ThreadPoolExecutor(max_workers=max_inflight, thread_name_prefix="embed-batch")
+        self._thread = threading.Thread(target=self._dispatch, name="embed-batcher", daemon=True)
+        self._thread.start()
+
+    def fit(self, corpus: Sequence[str]) -> "BatchingEmbeddings":
+        self.inner.fit(corpus)
+        return self
+
+    def embed(self, texts: Sequence[str], *, timeout: Optional[float] = None) -> np.ndarray:
+        texts = list(texts)
+        if not texts:
+            return self.inner.embed(texts)
+        waiter = _Waiter(texts)
+        self._enqueue(waiter)
+        if not waiter.done.wait(timeout):
+            raise TimeoutError(f"Embedding batch did not finish within {timeout:.1f}s")
+        if waiter.error is not None:
+            raise waiter.error
+        return waiter.result
+
+    async def aembed(self, texts: Sequence[str], *, timeout: Optional[float] = None) -> np.ndarray:
+        texts = list(texts)
+        if not texts:
+            return await self.inner.aembed(texts)
+        loop = asyncio.get_running_loop()
+        ready = loop.create_future()
+
+        def wake() -> None:
+            if not ready.done():  # the awaiting task may have been cancelled
+                ready.set_result(None)
+
+        def on_done() -> None:
+            try:
+                loop.call_soon_threadsafe(wake)
+            except RuntimeError:  # the loop closed while the batch ran
+                pass
+
+        waiter = _Waiter(texts, on_done)
+        self._enqueue(waiter)
+        try:
+            await asyncio.wait_for(ready, timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"Embedding batch did not finish within {timeout:.1f}s") from None
+        if waiter.error is not None:
+            raise waiter.error
+        return waiter.result
+
+    def _enqueue(self, waiter: _Waiter) -> None:
+        with self._cond:
+            self._queue.append(waiter)
+            self.calls += 1
+            self._cond.notify()
+
+    # ------------------------------------------------------------------ #
+    def _take_batch(self) -> List[_Waiter]:
+        """Block for the first waiter, then collect more until the window closes or the batch is full."""
+        with self._cond:
+            while not self._queue:
+                self._cond.wait()
+            closes = time.monotonic() + self.max_wait
+            while True:
+                size = sum(len(w.texts) for w in self._queue)
+                tokens = sum(w.tokens for w in self._queue)
+                remaining = closes - time.monotonic()
+                if size >= self.max_batch or tokens >= self.max_batch_tokens or remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            batch, size, tokens = [], 0, 0
+            while self._queue:
+                w = self._queue[0]
+                if batch and (size + len(w.texts) > self.max_batch or tokens + w.tokens > self.max_batch_tokens):
+                    break
+                batch.append(self._queue.pop(0))
+                size += len(w.texts)
+                tokens += w.tokens
+            return batch
+
+    def _dispatch(self) -> None:
+        while True:
+            batch = self._take_batch()
+            self._slots.acquire()
+            self._pool.submit(self._run, batch).add_done_callback(lambda _: self._slots.release())
+
+    def _embed_metered(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed `texts` one upstream request at a time (the inner provider's
+        batch_size, if it has one), charging each request and its tokens to
+        the rate budget before it is sent.
+        """
+        step = getattr(self.inner, "batch_size", None) or len(texts)
+        parts = []
+        for i in range(0, len(texts), step):
+            chunk = texts[i:i + step]
+            if self.request_bucket is not None:
+                self.request_bucket.acquire(1)
+            if self.token_bucket is not None:
+                self.token_bucket.acquire(sum(estimate_tokens(t) for t in chunk))
+            parts.append(self.inner.embed(chunk))
+            self.batches += 1
+        return np.concatenate(parts) if len(parts) > 1 else parts[0]
+
+    def _run(self, batch: List[_Waiter]) -> None:
+        try:
+            vectors = self._embed_metered([t for w in batch for t in w.texts])
+        except BaseException as e:
+            if len(batch) == 1:
+                batch[0].error = e
+                batch[0].finish()
+                return
+            # One bad input (too long, rejected) must not fail the requests
+            # that merely shared its window: retry each caller on its own.
+            for w in batch:
+                try:
+                    w.result = self._embed_metered(w.texts)
+                except BaseException as e:
+                    w.error = e
+                w.finish()
+            return
+        start = 0
+        for w in batch:
+            w.result = np.array(vectors[start:start + len(w.texts)])  # own rows, not views of the batch
+            start += len(w.texts)
+            w.finish()
+
+
+_SHARED_BATCHERS: Dict[str, BatchingEmbeddings] = {}
+_SHARED_LOCK = threading.Lock()
+
+
+def shared_batcher(provider: EmbeddingProvider, **kwargs) -> BatchingEmbeddings:
+    """
+    One BatchingEmbeddings per provider spec for the whole process, so the
+    RA matcher and the course helper share batches and rate budget when
+    they use the same model. `kwargs` apply when the batcher is first created.
+    """
+    spec = provider_spec(provider)
+    with _SHARED_LOCK:
+        if spec not in _SHARED_BATCHERS:
+            _SHARED_BATCHERS[spec] = BatchingEmbeddings(provider, **kwargs)
+        return _SHARED_BATCHERS[spec]
+
+
+# ───────────────────────────────────────────────────────────────────────────────
+#  Factory
+# ───────────────────────────────────────────────────────────────────────────────
+def make_provider(spec: Optional[str] = None, *, api_key: Optional[str] = None,
+                  default_model: str = DEFAULT_OPENAI_MODEL) -> EmbeddingProvider:
+    """
+    Build a provider from "kind[:arg]":
+
+        openai                         → OpenAIEmbeddings(default_model)
+        openai:text-embedding-3-small  → OpenAIEmbeddings("text-embedding-3-small")
+        hashing / hashing:2048         → HashingEmbeddings(dim)
+    """
+    kind, _, arg = (spec or "openai").partition(":")
+    kind = kind.strip().lower()
+    if kind == "openai":
+        return OpenAIEmbeddings(arg or default_model, api_key=api_key)
+    if kind == "hashing":
+        return HashingEmbeddings(int(arg) if arg else 1024)
+    raise ValueError(f"Unknown embedding provider {spec!r}")
+
+
+def provider_spec(provider: EmbeddingProvider) -> str:
+    """The make_provider spec that rebuilds `provider`; equal specs mean comparable vectors."""
+    if isinstance(provider, (CachedEmbeddings, BatchingEmbeddings)):
+        return provider_spec(provider.inner)
+    if isinstance(provider, OpenAIEmbeddings):
+        return f"openai:{provider.model}"
+    if isinstance(provider, HashingEmbeddings):
+        return f"hashing:{provider.dim}"
+    return provider.name
+
+
+def provider_from_env(endpoint: Optional[str] = None, **kwargs) -> EmbeddingProvider:
+    """
+    Remote providers go through the process-wide micro-batcher unless
+    EMBEDDING_BATCH_WAIT_MS=0; EMBEDDING_RPM / EMBEDDING_TPM set its shared
+    requests- and tokens-per-minute budget.
+    """
+    spec = None
+    if endpoint:
+        spec = os.environ.get(f"EMBEDDING_PROVIDER_{endpoint.upper()}")
+    provider = make_provider(spec or os.environ.get("EMBEDDING_PROVIDER"), **kwargs)
+    wait_ms = float(os.environ.get("EMBEDDING_BATCH_WAIT_MS", 5))
+    if isinstance(provider, OpenAIEmbeddings) and wait_ms > 0:
+        provider = shared_batcher(
+            provider,
+            max_wait_ms=wait_ms,
+            requests_per_minute=float(os.environ.get("EMBEDDING_RPM", 0)) or None,
+            tokens_per_minute=float(os.environ.get("EMBEDDING_TPM", 0)) or None,
+        )
+    return provider
@@ -0,0 +1,189 @@
+"""
+BM25 inverted index used to shortlist candidates before dense scoring.
+
+    lexical = BM25Index(texts)
+    idxs, scores = lexical.search(cv_text, top_n=200)     # best first
+    fused = fuse(dense_scores, scores, weight=0.3)         # optional hybrid
+
+Per-document term weights are precomputed at build time, so a query only
+walks the postings of its own terms and scores only the documents those
+postings touch (no per-corpus accumulator). The dense scoring that follows
+then only touches the shortlist, so match latency tracks the shortlist
+size rather than the corpus size.
+"""
+from __future__ import annotations
+
+import re
+from collections import Counter
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_COMPACT_MIN_DOCS = 256  # overlays smaller than this are never folded in
+_SPARSE_FACTOR = 8  # sparse accumulation while postings touched * this < documents
+
+STOPWORDS = frozenset("""
+a about an and are as at be been but by can for from has have i in into is it its
+my of on or our that the their this to was we were which will with you your
+""".split())
+
+
+def tokenize(text: str) -> list:
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in STOPWORDS and len(t) > 1]
+
+
+class BM25Index:
+    """
+    Edits (`edited`) encode only the changed documents into a small overlay
+    scored with the statistics (idf, average length) of the last full
+    build. The full build reruns once the overlay and the documents it
+    shadows exceed `compact_ratio` of the index, so its cost is spread
+    over many edits. The vocabulary is append-only and shared between
+    generations; edits must not run concurrently (RAMatcher serialises them).
+    """
+
+    def __init__(self, docs: Sequence[str], *, k1: float = 1.5, b: float = 0.75,
+                 compact_ratio: float = 0.1):
+        self.k1, self.b = k1, b
+        self.compact_ratio = compact_ratio
+        self._vocab: Dict[str, int] = {}
+        # Per document: (term ids, term frequencies). Kept so edits only
+        # re-tokenise the documents that changed.
+        self._build([self._encode(d) for d in docs])
+
+    def _encode(self, text: str) -> Tuple[np.ndarray, np.ndarray]:
+        counts = Counter(tokenize(text))
+        ids = np.fromiter((self._vocab.setdefault(t, len(self._vocab)) for t in counts),
+                          dtype=np.int64, count=len(counts))
+        return ids, np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+
+    def _build(self, docs: List[Tuple[np.ndarray, np.ndarray]]) -> None:
+        """Make `docs` (in logical order) the base, with an empty overlay."""
+        self._docs = docs
+        self.size = len(docs)
+        lengths = np.array([tf.sum() for _, tf in docs], dtype=np.float32)
+        self._avgdl = float(lengths.mean()) if self.size and lengths.mean() > 0 else 1.0
+        terms = np.concatenate([ids for ids, _ in docs] or [np.empty(0, np.int64)])
+        self._df = np.bincount(terms, minlength=len(self._vocab))
+        self._n = len(docs)
+        self._base = self._postings(docs)
+        self._extra_docs: List[Tuple[np.ndarray, np.ndarray]] = []
+        self._extra = None
+        self._phys: Optional[np.ndarray] = None  # logical doc -> doc of [base; extra]; None = identity
+        self._logical: Optional[np.ndarray] = None  # the inverse, -1 for shadowed docs
+        self._dead = 0
+
+    def _postings(self, docs) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Term-sorted (doc ids, weights, offsets) for `docs`, weighted with the base statistics."""
+        lengths = np.array([tf.sum() for _, tf in docs], dtype=np.float32)
+        norm = self.k1 * (1.0 - self.b + self.b * lengths / self._avgdl)
+
+        per_doc = np.array([len(ids) for ids, _ in docs], dtype=np.int64)
+        terms = np.concatenate([ids for ids, _ in docs] or [np.empty(0, np.int64)])
+        tf = np.concatenate([tf for _, tf in docs] or [np.empty(0, np.float32)])
+        doc_ids = np.repeat(np.arange(len(docs)), per_doc)
+
+        # All weights in one vectorised pass; postings of term t are the slice
+        # offsets[t]:offsets[t + 1] of the term-sorted arrays.
+        df = np.zeros(len(self._vocab), dtype=np.int64)
+        df[:len(self._df)] = self._df
+        idf = np.log1p((self._n - df + 0.5) / (df + 0.5)).astype(np.float32)
+        weights = idf[terms] * tf * (self.k1 + 1) / (tf + norm[doc_ids])
+        order = np.argsort(terms, kind="stable")
+        offsets = np.concatenate([[0], np.cumsum(np.bincount(terms, minlength=len(self._vocab)))])
+        return doc_ids[order], weights[order].astype(np.float32), offsets
+
+    def edited(
+        self,
+        *,
+        update: Optional[Dict[int, str]] = None,
+        append: Sequence[str] = (),
+        delete: Sequence[int] = (),
+    ) -> "BM25Index":
+        """Copy-on-write edit with the same row semantics as VectorIndex.edited."""
+        out = object.__new__(BM25Index)
+        out.__dict__.update(self.__dict__)
+        phys = np.arange(self.size, dtype=np.int64) if self._phys is None else self._phys.copy()
+        fresh = []
+        next_doc = len(self._docs) + len(self._extra_docs)
+        for row, text in (update or {}).items():
+            fresh.append(self._encode(text))
+            phys[row] = next_doc
+            next_doc += 1
+            out._dead += 1
+        if append:
+            fresh += [self._encode(text) for text in append]
+            phys = np.concatenate([phys, next_doc + np.arange(len(append))])
+        if len(delete):
+            phys = np.delete(phys, list(delete))
+            out._dead += len(set(delete))
+        out._phys = phys
+        out.size = len(phys)
+        if fresh:
+            out._extra_docs = self._extra_docs + fresh
+            out._extra = self._postings(out._extra_docs)
+        out._logical = np.full(len(self._docs) + len(out._extra_docs), -1, dtype=np.int64)
+        out._logical[phys] = np.arange(len(phys))
+        if len(out._extra_docs) + out._dead > max(_COMPACT_MIN_DOCS, self.compact_ratio * out.size):
+            every = self._docs + out._extra_docs
+            out._build([every[i] for i in phys])
+        return out
+
+    @staticmethod
+    def _touched(postings, terms: List[int], first_doc: int, docs: list, weights: list) -> None:
+        """Append the postings of `terms` (doc ids shifted by `first_doc`) to `docs` / `weights`."""
+        post_docs, post_weights, offsets = postings
+        for t in terms:
+            if t + 1 < len(offsets) and offsets[t] < offsets[t + 1]:
+                span = post_docs[offsets[t]:offsets[t + 1]]
+                docs.append(span + first_doc if first_doc else span)
+                weights.append(post_weights[offsets[t]:offsets[t + 1]])
+
+    def search(self, query: str, top_n: int = 100) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (doc indices, BM25 scores) of up to `top_n` matching docs, best first."""
+        empty = np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        terms = [t for t in (self._vocab.get(term) for term in set(tokenize(query))) if t is not None]
+        if not terms or top_n <= 0:
+            return empty
+
+        docs, weights = [], []
+        self._touched(self._base, terms, 0, docs, weights)
+        if self._extra_docs:
+            self._touched(self._extra, terms, len(self._docs), docs, weights)
+        if not docs:
+            return empty
+        docs, weights = np.concatenate(docs), np.concatenate(weights)
+        n = len(self._docs) + len(self._extra_docs)
+        if len(docs) * _SPARSE_FACTOR < n:
+            # Sparse accumulator: sum weights per touched doc only, so the
+            # cost follows the postings walked, not the corpus size.
+            ids, slot = np.unique(docs, return_inverse=True)
+            scores = np.bincount(slot, weights=weights).astype(np.float32)
+            nonzero = scores != 0
+            ids, scores = ids[nonzero], scores[nonzero]
+        else:
+            # The query's terms touch a good part of the corpus anyway: a
+            # dense accumulator beats sorting that many postings.
+            acc = np.bincount(docs, weights=weights, minlength=n)
+            ids = np.flatnonzero(acc)
+            scores = acc[ids].astype(np.float32)
+        if self._logical is not None:
+            ids = self._logical[ids]
+            live = ids >= 0
+            ids, scores = ids[live], scores[live]
+            by_row = np.argsort(ids, kind="stable")  # ties keep logical row order
+            ids, scores = ids[by_row], scores[by_row]
+        if top_n < len(ids):
+            part = np.argpartition(-scores, top_n - 1)[:top_n]
+        else:
+            part = np.arange(len(ids))
+        order = part[np.argsort(-scores[part], kind="stable")]
+        return ids[order], scores[order]
+
+
+def fuse(dense: np.ndarray, lexical: np.ndarray, weight: float) -> np.ndarray:
+    """Convex mix of cosine scores and max-normalised BM25 scores for the same rows."""
+    top = float(lexical.max()) if len(lexical) else 0.0
+    lex = lexical / top if top > 0 else np.zeros_like(lexical)
+    return (1.0 - weight) * dense + weight * lex
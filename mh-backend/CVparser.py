@@ -1,8 +1,6 @@
 from __future__ import annotations
 import pathlib
-from typing import Optional
-
-from PyPDF2 import PdfReader
+from typing import BinaryIO, Optional
 
 
 class ResumePDFParser:
@@ -18,14 +16,18 @@ class ResumePDFParser:
     >>> parser = ResumePDFParser("my_resume.pdf")
     >>> text = parser.text                  # raw text in memory
     >>> text = ResumePDFParser.parse("cv.pdf")  # one-liner
+
+    Pass `buffer=` (any seekable binary stream, e.g. an mmap of the saved
+    upload) to read embedded text from memory instead of reopening the file.
     """
 
     # -------- public API -------------------------------------------------
 
-    def __init__(self, pdf_path: str | pathlib.Path):
+    def __init__(self, pdf_path: str | pathlib.Path, *, buffer: Optional[BinaryIO] = None):
         self.pdf_path = pathlib.Path(pdf_path).expanduser().resolve()
         if not self.pdf_path.is_file():
             raise FileNotFoundError(f"No such PDF: {self.pdf_path}")
+        self._buffer = buffer
         self._text: Optional[str] = None  # lazily filled
 
     @property
@@ -55,7 +57,9 @@ class ResumePDFParser:
 
     def _read_embedded_text(self) -> str:
         """Extract text directly with PyPDF2."""
-        reader = PdfReader(str(self.pdf_path))
+        from PyPDF2 import PdfReader  # deferred: ~60 ms of import for every worker
+
+        reader = PdfReader(self._buffer if self._buffer is not None else str(self.pdf_path))
         return "\n".join(page.extract_text() or "" for page in reader.pages)
 
     def _ocr_text(self) -> str:
@@ -1,14 +1,15 @@
 from __future__ import annotations
 
 import os
-import uuid
+import hmac
+import json
 import logging
+from functools import wraps
 from pathlib import Path
 from datetime import datetime, timedelta
+from typing import BinaryIO
 
-import bcrypt
-import pdfplumber
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, Response, request, jsonify, send_from_directory, stream_with_context
 from flask_cors import CORS
 from flask_jwt_extended import (
     JWTManager,
@@ -16,15 +17,25 @@ from flask_jwt_extended import (
     create_refresh_token,
     get_jwt_identity,
     jwt_required,
+    verify_jwt_in_request,
 )
 from sqlalchemy.exc import IntegrityError, OperationalError
-from sqlalchemy import func
-from werkzeug.utils import secure_filename
+from sqlalchemy import func, text
 
 from models import SessionLocal, User, UserFiles, Base, engine
 from CVparser import ResumePDFParser
 from cache import user_cache
+from ingest import IngestedUpload, UploadRejected, UploadTooLarge, ingest_upload
+from metrics import init_metrics
+from passwords import HasherBusy, password_hasher
+from profiling import ProfileSettings, init_profiling
 from ra_matcher import RAMatcher
+from warmup import NotReady, Warmup
+import shared  # noqa: F401
+from course_search_algo import CourseSearchHelper
+from embeddings import provider_from_env
+from search_cache import SearchCache
+from tracing import span
 
 # ───────────────────────────────────────────────────────────────────────────────
 #  Init
@@ -34,31 +45,123 @@ UPLOAD_FOLDER.mkdir(exist_ok=True)
 
 ALLOWED_EXTENSIONS = {"pdf"}
 
+# Per-file cap enforced while streaming; the request-wide cap (CV + 4 DARS)
+# lets Werkzeug refuse oversized bodies before we read anything.
+MAX_UPLOAD_BYTES = int(os.environ.get("MAX_UPLOAD_BYTES", 10 * 1024 * 1024))
+
+# Admin/batch endpoints accept either a shared token (nightly jobs send it as
+# X-Admin-Token) or a logged-in user whose id is listed in ADMIN_USER_IDS.
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN")
+ADMIN_USER_IDS = {u.strip() for u in os.environ.get("ADMIN_USER_IDS", "").split(",") if u.strip()}
+
+# Batch RA matching: total items per request, and items embedded/scored per step.
+RA_BATCH_MAX = int(os.environ.get("RA_BATCH_MAX", 5000))
+RA_BATCH_CHUNK = int(os.environ.get("RA_BATCH_CHUNK", 64))
+
+# Course recommendations: the UWCourse Weaviate index and the catalog CSV
+# whose requisites drive the grad-standing filter (optional).
+WEAVIATE_URL = os.environ.get("WEAVIATE_URL", "http://localhost:8080/v1")
+COURSES_CSV = os.environ.get("COURSES_CSV") or None
+# Weaviate results are cached by query vector; 0 disables the cache. Each
+# worker has its own cache. DELETE /api/admin/courses/search-cache reaches
+# the others through COURSE_SEARCH_CACHE_VERSION_FILE (checked once a
+# second), which must be on a filesystem every worker shares.
+COURSE_SEARCH_CACHE_TTL = float(os.environ.get("COURSE_SEARCH_CACHE_TTL", 300))
+COURSE_SEARCH_CACHE_SIZE = int(os.environ.get("COURSE_SEARCH_CACHE_SIZE", 1024))
+COURSE_SEARCH_CACHE_VERSION_FILE = Path(os.environ.get("COURSE_SEARCH_CACHE_VERSION_FILE",
+                                                       "course_search_cache.version"))
+
+# Per-request profiles (X-Profile header from an admin, or sampled; see
+# profiling.py) are written here. PROFILE_SAMPLE_RATE=0 profiles nothing.
+# Only the newest PROFILE_MAX_FILES files, up to PROFILE_MAX_MB, are kept.
+PROFILE_DIR = Path(os.environ.get("PROFILE_DIR", "profiles"))
+PROFILE_SAMPLE_RATE = float(os.environ.get("PROFILE_SAMPLE_RATE", 0))
+PROFILE_MAX_FILES = int(os.environ.get("PROFILE_MAX_FILES", 200))
+PROFILE_MAX_MB = int(os.environ.get("PROFILE_MAX_MB", 256))
+
 app = Flask(__name__)
 app.config.update(
     UPLOAD_FOLDER=str(UPLOAD_FOLDER),
+    MAX_CONTENT_LENGTH=5 * MAX_UPLOAD_BYTES + 64 * 1024,
     JWT_SECRET_KEY=os.environ.get("JWT_SECRET_KEY", "dev-only-key"),
     JWT_ACCESS_TOKEN_EXPIRES=timedelta(hours=1),
     JWT_REFRESH_TOKEN_EXPIRES=timedelta(days=30),
 )
 
 # Updated CORS: allow Authorization header and credentials
+CORS_ORIGINS = ["http://localhost:5173"]
 CORS(
     app,
-    resources={r"/api/*": {"origins": ["http://localhost:5173"]}},
+    resources={r"/api/*": {"origins": CORS_ORIGINS}},
     supports_credentials=True,
     allow_headers=["Authorization", "Content-Type"],
 )
 
 jwt = JWTManager(app)
 
-logging.basicConfig(level=logging.DEBUG)
+logging.basicConfig(level=os.environ.get("LOG_LEVEL", "INFO").upper())
 logger = logging.getLogger("mh-backend")
 
 Base.metadata.create_all(engine)
-
-# Instantiate RA matcher once
-matcher = RAMatcher(db_path="data.db",)
+init_metrics(app, engine)
+
+# RA matcher (EMBEDDING_PROVIDER_RA=hashing runs it offline).
+# RA_INDEX_DIM / RA_INDEX_INT8 score on a truncated / int8 faculty matrix and
+# re-score the shortlist exactly. Memory only shrinks with RA_RERANK_PATH set
+# (float32 rows memory-mapped from disk); without it they stay in RAM next to
+# the compressed copy. RA_PREFILTER=N
+# scores only the N best BM25 matches; RA_HYBRID_WEIGHT mixes BM25 into ranks.
+# RA_CV_CHUNKING=mean|max embeds CVs per section chunk (cached by content hash).
+# Every worker replays the other workers' faculty edits from the
+# faculty_changes table each RA_SYNC_INTERVAL_S seconds.
+def build_matcher() -> RAMatcher:
+    return RAMatcher(
+        db_path="data.db",
+        provider=provider_from_env("ra", api_key=os.environ.get("OPENAI_API_KEY")),
+        index_dim=int(os.environ.get("RA_INDEX_DIM", 0)) or None,
+        quantize=os.environ.get("RA_INDEX_INT8", "").lower() in {"1", "true", "yes"},
+        rerank_path=os.environ.get("RA_RERANK_PATH") or None,
+        prefilter=int(os.environ.get("RA_PREFILTER", 0)) or None,
+        hybrid_weight=float(os.environ.get("RA_HYBRID_WEIGHT", 0)),
+        cv_chunking=os.environ.get("RA_CV_CHUNKING") or None,
+        cv_cache_size=int(os.environ.get("RA_CV_CACHE_SIZE", 10_000)),
+        sync_interval=float(os.environ.get("RA_SYNC_INTERVAL_S", 2)) or None,
+    )
+
+
+# Embedding the faculty table is one bulk upstream call: build it in the
+# background (retrying on failure) so the worker boots and answers health
+# checks at once. Routes that need it call ra_matcher.get() and answer 503
+# until /health/ready does.
+ra_matcher = Warmup(
+    "ra_matcher",
+    build_matcher,
+    retry_delay=float(os.environ.get("RA_WARMUP_RETRY_S", 5)),
+).start()
+
+
+# Query vectors must share the UWCourse index's embedding space, so
+# EMBEDDING_PROVIDER_COURSES should only be set to match how it was built.
+# COURSE_LEXICAL_PREFILTER=N restricts the first search to N BM25 candidates.
+# COURSE_RECOMMEND_DEADLINE (seconds, 0 = none) bounds one recommendation
+# run: the embedding call and the Weaviate searches share it.
+def build_course_helper() -> CourseSearchHelper:
+    return CourseSearchHelper(
+        openai_api_key=os.environ.get("OPENAI_API_KEY"),
+        weaviate_url=WEAVIATE_URL,
+        courses_csv_path=COURSES_CSV,
+        embedding_provider=provider_from_env("courses", api_key=os.environ.get("OPENAI_API_KEY")),
+        lexical_prefilter=int(os.environ.get("COURSE_LEXICAL_PREFILTER", 0)) or None,
+        course_embeddings=os.environ.get("COURSE_EMBEDDINGS") or None,
+        search_cache=SearchCache(max_entries=COURSE_SEARCH_CACHE_SIZE, ttl=COURSE_SEARCH_CACHE_TTL,
+                                 name="courses", version_file=COURSE_SEARCH_CACHE_VERSION_FILE)
+        if COURSE_SEARCH_CACHE_TTL > 0 else None,
+        dars_token_budget=int(os.environ.get("COURSE_DARS_TOKEN_BUDGET", 256)) or None,
+        deadline=float(os.environ.get("COURSE_RECOMMEND_DEADLINE", 30)) or None,
+    )
+
+
+course_helper = Warmup("course_helper", build_course_helper).start()
 
 # ───────────────────────────────────────────────────────────────────────────────
 #  Helpers
@@ -67,9 +170,78 @@ def allowed_file(name: str) -> bool:
     return "." in name and name.rsplit(".", 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
-def dars_to_text(pdf_path: Path) -> str:
+def is_admin() -> bool:
+    token = request.headers.get("X-Admin-Token")
+    if ADMIN_TOKEN and token and hmac.compare_digest(token, ADMIN_TOKEN):
+        return True
+    verify_jwt_in_request(optional=True)
+    return get_jwt_identity() in ADMIN_USER_IDS
+
+
+def admin_required(fn):
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        if not is_admin():
+            return jsonify(error="Admin access required"), 403
+        return fn(*args, **kwargs)
+    return wrapper
+
+
+profile_settings = init_profiling(app, authorized=is_admin, settings=ProfileSettings(
+    directory=PROFILE_DIR,
+    sample_rate=PROFILE_SAMPLE_RATE,
+    max_files=PROFILE_MAX_FILES,
+    max_bytes=PROFILE_MAX_MB * 1024 * 1024,
+))
+
+
+def query_flag(name: str) -> bool:
+    return request.args.get(name, "").lower() in {"1", "true", "yes"}
+
+
+def load_docs(uid: str) -> dict | None:
+    """CV + DARS texts for one user: cache first, then the DB (and re-cache)."""
+    docs = user_cache.get(uid)
+    if docs is None:
+        files = SessionLocal().get(UserFiles, uid)
+        if not files:
+            return None
+        docs = {"cv": files.cv_text, "dars": [
+            files.dars1_text,
+            files.dars2_text,
+            files.dars3_text,
+            files.dars4_text,
+        ]}
+        user_cache.set(uid, docs)
+    return docs
+
+
+def load_cvs(uids: list[str]) -> dict[str, str]:
+    """CV text per user id, from the cache where possible and one query for the rest."""
+    cvs: dict[str, str] = {}
+    missing = []
+    for uid in uids:
+        docs = user_cache.get(uid)
+        if docs is not None:
+            cvs[uid] = docs["cv"]
+        elif uid.isdigit():
+            missing.append(int(uid))
+    if missing:
+        session = SessionLocal()
+        try:
+            rows = session.query(UserFiles.id, UserFiles.cv_text).filter(UserFiles.id.in_(missing)).all()
+        finally:
+            session.close()
+        cvs.update({str(r.id): r.cv_text for r in rows})
+    return cvs
+
+
+def dars_to_text(source: Path | BinaryIO) -> str:
+    import pdfplumber  # deferred: ~100 ms of import that only signup needs
+
     out: list[str] = []
-    with pdfplumber.open(str(pdf_path)) as pdf:
+    with span("pdf_extract", kind="dars"), \
+            pdfplumber.open(str(source) if isinstance(source, Path) else source) as pdf:
         for page in pdf.pages:
             txt = page.extract_text()
             if txt:
@@ -85,10 +257,39 @@ def home():
     return "Flask backend running!", 200
 
 
+@app.errorhandler(NotReady)
+def not_ready(e):
+    return jsonify(error=str(e)), 503, {"Retry-After": "5"}
+
+
+# ----------  HEALTH  ----------------------------------------------------------
+@app.route("/health/live", methods=["GET"])
+def health_live():
+    """Liveness: the process is up and serving; never depends on upstreams."""
+    return jsonify(status="ok"), 200
+
+
+@app.route("/health/ready", methods=["GET"])
+def health_ready():
+    """
+    Readiness: 200 once everything request traffic needs has warmed up.
+    Warm-up errors are logged; the response only names them for admins.
+    """
+    parts = (ra_matcher, course_helper)
+    ready = all(p.ready for p in parts)
+    try:
+        detail = is_admin()
+    except Exception:  # e.g. an expired token: answer like any other caller
+        detail = False
+    body = {"status": "ready" if ready else "warming_up", **{p.name: p.status(detail=detail) for p in parts}}
+    return jsonify(body), 200 if ready else 503
+
+
 # ----------  SIGN-UP  ----------------------------------------------------------
 @app.route("/api/signup", methods=["POST"])
 def signup():
     session = SessionLocal()
+    uploads: list[IngestedUpload] = []
     try:
         username = request.form.get("username", "").strip().lower()
         email = request.form.get("email", "").strip().lower()
@@ -115,27 +316,32 @@ def signup():
         ).first():
             return jsonify(error="Username or email exists"), 409
 
-        cv_path = UPLOAD_FOLDER / f"{uuid.uuid4().hex}_{secure_filename(cv_file.filename)}"
-        cv_file.save(cv_path)
-
-        dars_paths: list[Path | None] = []
-        for f in dars_files:
-            p = UPLOAD_FOLDER / f"{uuid.uuid4().hex}_{secure_filename(f.filename)}"
-            f.save(p)
-            dars_paths.append(p)
-        dars_paths.extend([None] * (4 - len(dars_paths)))
+        # Stream every upload to disk once (magic bytes + size checked up
+        # front); the parsers then read the mapped copy, not the file again.
+        try:
+            for f in [cv_file, *dars_files]:
+                uploads.append(ingest_upload(f, UPLOAD_FOLDER, max_bytes=MAX_UPLOAD_BYTES))
+        except UploadTooLarge as e:
+            return jsonify(error=str(e)), 413
+        except UploadRejected as e:
+            return jsonify(error=str(e)), 400
+        cv_upload, dars_uploads = uploads[0], uploads[1:]
+        for u in uploads:
+            logger.debug("Stored upload %s (%d bytes, sha256=%s)", u.path.name, u.size, u.sha256)
 
         user = User(
             username=username,
             email=email,
-            password_hash=bcrypt.hashpw(pw.encode(), bcrypt.gensalt()).decode(),
+            password_hash=password_hasher.hash(pw),
             created_at=datetime.utcnow(),
         )
         session.add(user)
         session.flush()
 
-        cv_text = ResumePDFParser(cv_path).text
-        dars_text = [dars_to_text(p) if p else None for p in dars_paths]
+        with span("pdf_extract", kind="cv"):
+            cv_text = ResumePDFParser(cv_upload.path, buffer=cv_upload.buffer).text
+        dars_text = [dars_to_text(u.buffer) for u in dars_uploads]
+        dars_text.extend([None] * (4 - len(dars_text)))
 
         session.add(
             UserFiles(
@@ -149,7 +355,7 @@ def signup():
         )
         session.commit()
 
-        user_cache.set(user.id, {"cv": cv_text, "dars": dars_text})
+        user_cache.set(str(user.id), {"cv": cv_text, "dars": dars_text})
 
         return jsonify(
             username=username,
@@ -158,11 +364,16 @@ def signup():
             message="Signup successful!"
         ), 201
 
+    except HasherBusy as e:
+        session.rollback()
+        return jsonify(error=str(e)), 503, {"Retry-After": "1"}
     except Exception as e:
         session.rollback()
         logger.exception("Signup failed")
         return jsonify(error=str(e)), 500
     finally:
+        for u in uploads:
+            u.close()
         session.close()
 
 
@@ -175,14 +386,23 @@ def login():
         pw = request.form.get("password", "")
 
         user = session.query(User).filter(User.email == email).first()
-        if not user or not bcrypt.checkpw(pw.encode(), user.password_hash.encode()):
+        if not user or not password_hasher.verify(pw, user.password_hash):
             return jsonify(error="Invalid credentials"), 401
 
-        if user_cache.get(user.id) is None:
+        # Cost factor changed since this hash was made: upgrade it while we
+        # still have the plaintext. Skipped (and retried next login) if busy.
+        if password_hasher.needs_rehash(user.password_hash):
+            try:
+                user.password_hash = password_hasher.hash(pw)
+                session.commit()
+            except HasherBusy:
+                session.rollback()
+
+        if user_cache.get(str(user.id)) is None:
             files = SessionLocal().get(UserFiles, user.id)
             if files:
                 user_cache.set(
-                    user.id,
+                    str(user.id),
                     {"cv": files.cv_text, "dars": [
                         files.dars1_text,
                         files.dars2_text,
@@ -197,6 +417,8 @@ def login():
             refresh_token=create_refresh_token(identity=str(user.id)),
             message="Login successful!"
         )
+    except HasherBusy as e:
+        return jsonify(error=str(e)), 503, {"Retry-After": "1"}
     finally:
         session.close()
 
@@ -205,7 +427,7 @@ def login():
 @app.route("/api/faculty", methods=["GET"])
 @jwt_required()
 def faculty():
-    rows = SessionLocal().execute(
+    rows = SessionLocal().execute(text(
         """
         SELECT Name, Email, Faculty,
                "Summary of Research",
@@ -213,7 +435,7 @@ def faculty():
                "Link to Page"
         FROM faculty
         """
-    ).fetchall()
+    )).fetchall()
     return jsonify([dict(r._mapping) for r in rows]), 200
 
 
@@ -221,19 +443,9 @@ def faculty():
 @app.route("/api/user/documents", methods=["GET"])
 @jwt_required()
 def get_docs():
-    uid = get_jwt_identity()
-    docs = user_cache.get(uid)
+    docs = load_docs(get_jwt_identity())
     if docs is None:
-        files = SessionLocal().get(UserFiles, uid)
-        if not files:
-            return jsonify(error="No documents"), 404
-        docs = {"cv": files.cv_text, "dars": [
-            files.dars1_text,
-            files.dars2_text,
-            files.dars3_text,
-            files.dars4_text,
-        ]}
-        user_cache.set(uid, docs)
+        return jsonify(error="No documents"), 404
     return jsonify(docs), 200
 
 
@@ -241,6 +453,7 @@ def get_docs():
 @app.route("/api/ra/match", methods=["POST"])
 @jwt_required()
 def ra_match():
+    matcher = ra_matcher.get()
     uid = get_jwt_identity()
     docs = user_cache.get(uid)
     if docs is None:
@@ -249,6 +462,256 @@ def ra_match():
     return jsonify(top), 200
 
 
+@app.route("/api/ra/match/batch", methods=["POST"])
+@admin_required
+def ra_match_batch():
+    """
+    Body: {"user_ids": [...], "cv_texts": [...], "top_n": 5} (either list may
+    be omitted). Streams one JSON object per line, in input order: users as
+    {"user_id", "matches"}, then texts as {"index", "matches"}. Items that
+    cannot be matched (unknown user, empty or whitespace-only CV) get an
+    "error" instead of "matches".
+    """
+    body = request.get_json(silent=True) or {}
+    user_ids = body.get("user_ids") or []
+    cv_texts = body.get("cv_texts") or []
+    top_n = body.get("top_n", 5)
+    if not isinstance(user_ids, list) or not isinstance(cv_texts, list):
+        return jsonify(error="user_ids and cv_texts must be lists"), 400
+    if not all(isinstance(t, str) for t in cv_texts):
+        return jsonify(error="cv_texts must be strings"), 400
+    if not isinstance(top_n, int) or not 1 <= top_n <= 50:
+        return jsonify(error="top_n must be an integer between 1 and 50"), 400
+    if not user_ids and not cv_texts:
+        return jsonify(error="Nothing to match"), 400
+    if len(user_ids) + len(cv_texts) > RA_BATCH_MAX:
+        return jsonify(error=f"At most {RA_BATCH_MAX} items per request"), 413
+    user_ids = [str(u) for u in user_ids]
+    matcher = ra_matcher.get()
+
+    def match_chunk(texts: list[str]) -> list:
+        try:
+            return matcher.match_many(texts, top_n=top_n)
+        except Exception as e:
+            logger.exception("Batch RA match failed for %d items", len(texts))
+            return [e] * len(texts)
+
+    def line(key: str, value, matches) -> str:
+        if isinstance(matches, Exception):
+            return json.dumps({key: value, "error": str(matches)}) + "\n"
+        return json.dumps({key: value, "matches": matches}) + "\n"
+
+    def generate():
+        for start in range(0, len(user_ids), RA_BATCH_CHUNK):
+            chunk = user_ids[start:start + RA_BATCH_CHUNK]
+            cvs = load_cvs(chunk)
+            found = [uid for uid in chunk if uid in cvs and (cvs[uid] or "").strip()]
+            ranked = dict(zip(found, match_chunk([cvs[uid] for uid in found])))
+            for uid in chunk:
+                if uid in ranked:
+                    yield line("user_id", uid, ranked[uid])
+                else:
+                    error = "Empty CV" if uid in cvs else "No documents"
+                    yield json.dumps({"user_id": uid, "error": error}) + "\n"
+        for start in range(0, len(cv_texts), RA_BATCH_CHUNK):
+            chunk = cv_texts[start:start + RA_BATCH_CHUNK]
+            found = [i for i, text in enumerate(chunk) if text.strip()]
+            ranked = dict(zip(found, match_chunk([chunk[i] for i in found])))
+            for offset in range(len(chunk)):
+                if offset in ranked:
+                    yield line("index", start + offset, ranked[offset])
+                else:
+                    yield json.dumps({"index": start + offset, "error": "Empty CV text"}) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+
+# ----------  COURSE RECOMMENDATIONS  -----------------------------------------
+@app.route("/api/courses/recommend", methods=["POST"])
+@jwt_required()
+def recommend_courses():
+    """
+    Body: {"interests": "...", "top_k": 10}; interests default to the stored
+    CV. Runs against the user's stored DARS and streams one JSON object per
+    line: first {"dars": {"reports": n, "completed": n, "required": n}},
+    sent before any upstream call, then {"course": {...}, "rank": i,
+    "unlocks": n} as each candidate passes the filters, then {"done": true,
+    "count": n} (or {"error": ...} if the run fails). "unlocks" counts the
+    catalog courses it leads to.
+    """
+    helper = course_helper.get()
+    body = request.get_json(silent=True) or {}
+    top_k = body.get("top_k", 10)
+    if not isinstance(top_k, int) or not 1 <= top_k <= 50:
+        return jsonify(error="top_k must be an integer between 1 and 50"), 400
+    docs = load_docs(get_jwt_identity())
+    if docs is None:
+        return jsonify(error="No documents"), 404
+    interests = body.get("interests") or docs["cv"]
+    if not isinstance(interests, str) or not interests.strip():
+        return jsonify(error="interests must be a non-empty string"), 400
+    dars_reports = [helper.parse_dars_report(t) for t in docs["dars"] if t]
+    if not dars_reports:
+        return jsonify(error="No DARS on file"), 404
+
+    parsed = helper.parse_multiple_dars_reports(dars_reports)
+
+    def generate():
+        yield json.dumps({"dars": {
+            "reports": len(dars_reports),
+            "completed": len(parsed["completed"]),
+            "required": len(parsed["required"]),
+        }}) + "\n"
+        count = 0
+        try:
+            for course in helper.iter_recommendations(dars_reports, interests, top_k):
+                count += 1
+                yield json.dumps({
+                    "course": course, "rank": count, "unlocks": helper.unlock_count(course),
+                }) + "\n"
+        except Exception as e:
+            logger.exception("Course recommendation failed after %d results", count)
+            yield json.dumps({"error": str(e)}) + "\n"
+            return
+        yield json.dumps({"done": True, "count": count}) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson",
+                    headers={"X-Accel-Buffering": "no"})
+
+
+@app.route("/api/courses/eligible", methods=["GET"])
+@jwt_required()
+def eligible_courses():
+    """
+    Catalog courses whose requisites the user's stored DARS already satisfy.
+    ?in_progress=1 counts in-progress courses as done; ?assume_conditions=1
+    treats non-course requisites (standing, consent, ...) as met.
+    """
+    helper = course_helper.get()
+    if helper.eligibility is None:
+        return jsonify(error="No course catalog loaded"), 404
+    docs = load_docs(get_jwt_identity())
+    if docs is None:
+        return jsonify(error="No documents"), 404
+    reports = [helper.parse_dars_report(t) for t in docs["dars"] if t]
+    done = helper.parse_multiple_dars_reports(reports)["completed"]
+    if query_flag("in_progress"):
+        done |= {
+            helper.normalize_course_code(c["course_code"])
+            for r in reports for c in r.get("in_progress_courses", [])
+        }
+    with span("eligibility", op="evaluate"):
+        codes = helper.eligibility.eligible(done, assume_conditions=query_flag("assume_conditions"))
+    catalog = helper.course_prereq_dict
+    return jsonify(
+        completed=len(done),
+        count=len(codes),
+        courses=[
+            {"code": c, "title": catalog[c]["title"], "credits": catalog[c]["credits"]}
+            for c in codes
+        ],
+    ), 200
+
+
+@app.route("/api/courses/unlocks", methods=["GET"])
+@jwt_required()
+def course_unlocks():
+    """?code=COMP SCI 300: the courses it unlocks directly and transitively."""
+    helper = course_helper.get()
+    if helper.unlocks is None:
+        return jsonify(error="No course catalog loaded"), 404
+    code = helper.normalize_course_code(request.args.get("code", ""))
+    if not code:
+        return jsonify(error="code is required"), 400
+    if code not in helper.unlocks and code not in helper.course_prereq_dict:
+        return jsonify(error=f"Unknown course {code}"), 404
+    return jsonify(
+        code=code,
+        direct=sorted(helper.unlocks.direct(code)),
+        transitive=sorted(helper.unlocks.transitive(code)),
+        count=helper.unlocks.count(code),
+    ), 200
+
+
+# ----------  ADMIN: FACULTY INDEX  --------------------------------------------
+@app.route("/api/admin/faculty", methods=["GET"])
+@admin_required
+def faculty_index_status():
+    matcher = ra_matcher.get()
+    return jsonify(version=matcher.version, size=matcher.size), 200
+
+
+@app.route("/api/admin/faculty", methods=["PUT"])
+@admin_required
+def faculty_upsert():
+    """Body: {"faculty": [{"Email": ..., "Name": ..., "Summary of Research": ..., ...}]}"""
+    records = (request.get_json(silent=True) or {}).get("faculty")
+    if not isinstance(records, list) or not records:
+        return jsonify(error="faculty must be a non-empty list"), 400
+    if not all(isinstance(r, dict) and r.get("Email") for r in records):
+        return jsonify(error="Every faculty entry needs an Email"), 400
+    if len({r["Email"] for r in records}) < len(records):
+        return jsonify(error="Each Email may appear only once"), 400
+    if not all(r.get("Summary of Research") or r.get("Fields of Research") for r in records):
+        return jsonify(error="Every faculty entry needs research fields or a summary"), 400
+    matcher = ra_matcher.get()
+    try:
+        result = matcher.upsert_faculty(records)
+    except Exception as e:
+        logger.exception("Faculty upsert failed")
+        return jsonify(error=str(e)), 500
+    return jsonify(result), 200
+
+
+@app.route("/api/admin/faculty", methods=["DELETE"])
+@admin_required
+def faculty_delete():
+    """Body: {"emails": [...]}"""
+    emails = (request.get_json(silent=True) or {}).get("emails")
+    if not isinstance(emails, list) or not emails:
+        return jsonify(error="emails must be a non-empty list"), 400
+    return jsonify(ra_matcher.get().delete_faculty(emails)), 200
+
+
+@app.route("/api/admin/faculty/reload", methods=["POST"])
+@admin_required
+def faculty_reload():
+    matcher = ra_matcher.get()
+    try:
+        version = matcher.reload()
+    except Exception as e:
+        logger.exception("Faculty reload failed")
+        return jsonify(error=str(e)), 500
+    return jsonify(version=version, size=matcher.size), 200
+
+
+# ----------  ADMIN: PROFILING  ------------------------------------------------
+@app.route("/api/admin/profiling", methods=["GET", "PUT"])
+@admin_required
+def profiling_settings():
+    """PUT body: {"sample_rate": 0.01, "routes": ["/api/ra/match"] | null, "mode": "sample"}"""
+    if request.method == "PUT":
+        error = profile_settings.update(request.get_json(silent=True) or {})
+        if error:
+            return jsonify(error=error), 400
+    return jsonify(profile_settings.as_dict()), 200
+
+
+# ----------  ADMIN: COURSE SEARCH CACHE  -------------------------------------
+@app.route("/api/admin/courses/search-cache", methods=["GET"])
+@admin_required
+def course_search_cache_status():
+    cache = course_helper.get().search_cache
+    return jsonify(cache.status() if cache is not None else {"enabled": False}), 200
+
+
+@app.route("/api/admin/courses/search-cache", methods=["DELETE"])
+@admin_required
+def course_search_cache_invalidate():
+    """Call after rebuilding the UWCourse index."""
+    return jsonify(version=course_helper.get().invalidate_search_cache()), 200
+
+
 # ----------  STATIC UPLOAD SERVE (DEV)  --------------------------------------
 @app.route("/uploads/<path:filename>")
 def get_upload(filename):
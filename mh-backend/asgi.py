@@ -0,0 +1,171 @@
+"""
+ASGI entry point for the backend.
+
+    uvicorn asgi:application --workers 2
+
+Routes that spend most of their time waiting on upstream services are
+served natively on the event loop, so one worker can hold many of them in
+flight at once. Everything else is handed to the regular Flask app through
+asgiref's WSGI adapter (which runs it on a thread pool).
+
+Native routes honour X-Profile and the profiling sample rate like Flask
+routes do, but the profiler runs on the event-loop thread: it also sees
+other requests' coroutines running on the loop, and it misses work handed
+to threads (e.g. embedding calls through asyncio.to_thread). Use it for
+loop-side CPU; for the rest, profile the equivalent Flask route.
+"""
+from __future__ import annotations
+
+import asyncio
+import hmac
+import json
+import time
+from typing import Any, Awaitable, Callable
+
+from asgiref.wsgi import WsgiToAsgi
+from flask_jwt_extended import decode_token
+
+from app import ADMIN_TOKEN, ADMIN_USER_IDS, CORS_ORIGINS, app, logger, profile_settings, ra_matcher
+from cache import user_cache
+from metrics import HTTP_REQUESTS, HTTP_SECONDS
+from profiling import RequestProfile
+from warmup import NotReady
+
+Scope = dict[str, Any]
+Receive = Callable[[], Awaitable[dict]]
+Send = Callable[[dict], Awaitable[None]]
+
+flask_app = WsgiToAsgi(app)
+
+
+# ───────────────────────────────────────────────────────────────────────────────
+#  Helpers
+# ───────────────────────────────────────────────────────────────────────────────
+async def read_body(receive: Receive) -> bytes:
+    body = b""
+    while True:
+        message = await receive()
+        body += message.get("body", b"")
+        if not message.get("more_body"):
+            return body
+
+
+async def send_json(
+    scope: Scope, send: Send, payload: Any, status: int = 200, extra_headers: list | None = None
+) -> None:
+    body = json.dumps(payload).encode()
+    headers = [
+        (b"content-type", b"application/json"),
+        (b"content-length", str(len(body)).encode()),
+        *(extra_headers or []),
+    ]
+    # Mirror what Flask-CORS adds for /api/* on the WSGI side.
+    origin = dict(scope["headers"]).get(b"origin", b"").decode()
+    if origin in CORS_ORIGINS:
+        headers += [
+            (b"access-control-allow-origin", origin.encode()),
+            (b"access-control-allow-credentials", b"true"),
+            (b"vary", b"Origin"),
+        ]
+    await send({"type": "http.response.start", "status": status, "headers": headers})
+    await send({"type": "http.response.body", "body": body})
+
+
+def jwt_identity(scope: Scope) -> str | None:
+    """Return the access-token identity from the Authorization header, if valid."""
+    auth = dict(scope["headers"]).get(b"authorization", b"").decode()
+    if not auth.startswith("Bearer "):
+        return None
+    try:
+        with app.app_context():
+            claims = decode_token(auth[len("Bearer "):])
+    except Exception:
+        return None
+    if claims.get("type") != "access":
+        return None
+    return claims[app.config.get("JWT_IDENTITY_CLAIM", "sub")]
+
+
+def is_admin(scope: Scope) -> bool:
+    """app.is_admin for a raw ASGI request."""
+    token = dict(scope["headers"]).get(b"x-admin-token", b"").decode()
+    if ADMIN_TOKEN and token and hmac.compare_digest(token, ADMIN_TOKEN):
+        return True
+    return jwt_identity(scope) in ADMIN_USER_IDS
+
+
+# ───────────────────────────────────────────────────────────────────────────────
+#  Native async routes
+# ───────────────────────────────────────────────────────────────────────────────
+async def ra_match(scope: Scope, receive: Receive, send: Send) -> None:
+    await read_body(receive)
+    uid = jwt_identity(scope)
+    if uid is None:
+        return await send_json(scope, send, {"msg": "Missing or invalid access token"}, 401)
+    try:
+        matcher = ra_matcher.get()
+    except NotReady as e:
+        return await send_json(scope, send, {"error": str(e)}, 503, [(b"retry-after", b"5")])
+    docs = user_cache.get(uid)
+    if docs is None:
+        return await send_json(scope, send, {"error": "No CV in cache"}, 404)
+    try:
+        top = await matcher.amatch(docs["cv"], top_n=5)
+    except Exception as e:
+        logger.exception("Async RA match failed")
+        return await send_json(scope, send, {"error": str(e)}, 500)
+    await send_json(scope, send, top, 200)
+
+
+ROUTES: dict[tuple[str, str], Callable[[Scope, Receive, Send], Awaitable[None]]] = {
+    ("POST", "/api/ra/match"): ra_match,
+}
+
+
+async def timed_route(handler, scope: Scope, receive: Receive, send: Send) -> None:
+    """Same request metrics and profiling the Flask hooks provide, for native routes."""
+    status = 500
+    asked = dict(scope["headers"]).get(b"x-profile")
+    mode = profile_settings.pick(asked.decode() if asked is not None else None,
+                                 lambda: is_admin(scope), scope["path"])
+    profile = RequestProfile(mode, profile_settings.interval) if mode else None
+
+    async def send_wrapper(message: dict) -> None:
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+            if profile is not None:
+                message = {**message, "headers": [*message["headers"],
+                                                  (b"x-profile-id", profile.id.encode())]}
+        await send(message)
+
+    t0 = time.perf_counter()
+    try:
+        await handler(scope, receive, send_wrapper)
+    finally:
+        HTTP_SECONDS.observe(time.perf_counter() - t0, route=scope["path"])
+        HTTP_REQUESTS.inc(route=scope["path"], method=scope["method"], status=status)
+        if profile is not None:
+            profile.stop()
+            await asyncio.to_thread(profile.write, profile_settings, scope["path"], scope["method"])
+
+
+# ───────────────────────────────────────────────────────────────────────────────
+#  Application
+# ───────────────────────────────────────────────────────────────────────────────
+async def application(scope: Scope, receive: Receive, send: Send) -> None:
+    if scope["type"] == "lifespan":
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    if scope["type"] == "http":
+        handler = ROUTES.get((scope["method"], scope["path"]))
+        if handler is not None:
+            return await timed_route(handler, scope, receive, send)
+
+    await flask_app(scope, receive, send)
@@ -18,7 +18,12 @@ def convert_dars_pdf_to_text(pdf_path, output_txt_path):
 
     print(f"✅ Successfully converted {pdf_path} to {output_txt_path}")
 
-# Example usage
-pdf_path = "C://Users//anura//OneDrive//Desktop//Projects//ajanaswamy-DARSAUDIT-327189157-8903aa32-4747-439f-ab86-2d45b1095683.pdf"  # Update with actual DARS PDF file path
-output_txt_path = "dars_report_final_check.txt"
-convert_dars_pdf_to_text(pdf_path, output_txt_path)
+# Example usage (one file; for a whole directory use dars_ingest.py at the repo root)
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) < 2:
+        sys.exit(f"usage: python {sys.argv[0]} DARS.pdf [OUTPUT.txt]")
+    pdf_path = sys.argv[1]
+    output_txt_path = sys.argv[2] if len(sys.argv) > 2 else "dars_report_final_check.txt"
+    convert_dars_pdf_to_text(pdf_path, output_txt_path)
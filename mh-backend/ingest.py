@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import hashlib
+import mmap
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import BinaryIO, Optional
+
+from werkzeug.datastructures import FileStorage
+from werkzeug.utils import secure_filename
+
+PDF_MAGIC = b"%PDF-"
+CHUNK_SIZE = 64 * 1024
+
+
+class UploadRejected(ValueError):
+    """Upload failed validation (wrong type) before it was fully written."""
+
+
+class UploadTooLarge(UploadRejected):
+    """Upload exceeded the per-file size limit while streaming."""
+
+
+@dataclass
+class IngestedUpload:
+    """
+    A PDF that has been streamed to disk exactly once.
+
+    `buffer` is a read-only memory map of the saved file, so parsers can
+    seek/read it without a second trip through the filesystem and without
+    holding the whole document on the Python heap.
+    """
+
+    path: Path
+    sha256: str
+    size: int
+    _file: Optional[BinaryIO] = field(default=None, repr=False)
+    _map: Optional[mmap.mmap] = field(default=None, repr=False)
+
+    @property
+    def buffer(self) -> mmap.mmap:
+        if self._map is None:
+            self._file = open(self.path, "rb")
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._map.seek(0)
+        return self._map
+
+    def close(self) -> None:
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> "IngestedUpload":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def ingest_upload(
+    storage: FileStorage,
+    dest_dir: Path,
+    *,
+    max_bytes: int,
+    chunk_size: int = CHUNK_SIZE,
+) -> IngestedUpload:
+    """
+    Stream `storage` into `dest_dir` in fixed-size chunks.
+
+    The PDF signature is checked on the first bytes and the size limit is
+    enforced as data arrives, so bad uploads are rejected before they are
+    written out in full. The SHA-256 is computed on the same pass. Peak
+    memory is one chunk regardless of the upload size.
+    """
+    stream = storage.stream
+    head = stream.read(len(PDF_MAGIC))
+    if head != PDF_MAGIC:
+        raise UploadRejected(f"{storage.filename!r} is not a PDF")
+
+    dest = Path(dest_dir) / f"{uuid.uuid4().hex}_{secure_filename(storage.filename)}"
+    digest = hashlib.sha256(head)
+    size = len(head)
+    try:
+        with open(dest, "wb") as out:
+            out.write(head)
+            while True:
+                chunk = stream.read(chunk_size)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLarge(
+                        f"{storage.filename!r} exceeds {max_bytes:,} bytes"
+                    )
+                digest.update(chunk)
+                out.write(chunk)
+    except BaseException:
+        dest.unlink(missing_ok=True)
+        raise
+
+    return IngestedUpload(path=dest, sha256=digest.hexdigest(), size=size)
@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import time
+
+from flask import Flask, Response, g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+import shared  # noqa: F401
+from tracing import REGISTRY, STAGE_SECONDS
+
+HTTP_REQUESTS = REGISTRY.counter(
+    "mh_http_requests_total", "HTTP requests by route, method and status."
+)
+HTTP_SECONDS = REGISTRY.histogram(
+    "mh_http_request_duration_seconds", "HTTP request latency by route."
+)
+
+
+def _route() -> str:
+    return request.url_rule.rule if request.url_rule is not None else "<unmatched>"
+
+
+def init_metrics(app: Flask, engine: Engine) -> None:
+    """
+    Record per-request latency, time every SQL statement on `engine` as the
+    "db" stage, and serve everything in Prometheus text format at /metrics.
+    """
+
+    @app.before_request
+    def _start_timer():
+        g._mh_t0 = time.perf_counter()
+
+    @app.after_request
+    def _record_request(response):
+        t0 = g.pop("_mh_t0", None)
+        if t0 is not None:
+            route = _route()
+            HTTP_SECONDS.observe(time.perf_counter() - t0, route=route)
+            HTTP_REQUESTS.inc(route=route, method=request.method, status=response.status_code)
+        return response
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _db_start(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("_mh_t0", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _db_end(conn, cursor, statement, parameters, context, executemany):
+        t0 = conn.info["_mh_t0"].pop()
+        op = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "?"
+        STAGE_SECONDS.observe(time.perf_counter() - t0, stage="db", op=op)
+
+    @event.listens_for(engine, "handle_error")
+    def _db_error(ctx):
+        stack = ctx.connection.info.get("_mh_t0") if ctx.connection is not None else None
+        if stack:
+            stack.pop()
+
+    @app.route("/metrics")
+    def metrics():
+        return Response(REGISTRY.render(), mimetype="text/plain; version=0.0.4")
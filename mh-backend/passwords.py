@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Callable, Optional, TypeVar
+
+import bcrypt
+
+T = TypeVar("T")
+
+_COST_RE = re.compile(r"^\$2[abxy]?\$(\d{2})\$")
+
+
+class HasherBusy(RuntimeError):
+    """Raised when the hashing queue is full; callers should answer 503."""
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt on a small dedicated thread pool.
+
+    bcrypt releases the GIL while it works, so request threads that are not
+    doing auth keep running. Capping the pool (and the number of jobs allowed
+    to wait for it) keeps a login storm from eating every core: excess
+    requests fail fast with `HasherBusy` instead of queueing behind each other.
+    """
+
+    def __init__(
+        self,
+        *,
+        rounds: int = 12,
+        max_workers: int = 2,
+        max_pending: int = 16,
+        timeout: Optional[float] = 10.0,
+    ):
+        self.rounds = rounds
+        self.timeout = timeout
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bcrypt")
+        self._slots = threading.BoundedSemaphore(max_workers + max_pending)
+
+    # ------------------------------------------------------------------ #
+    def _run(self, fn: Callable[..., T], *args) -> T:
+        if not self._slots.acquire(blocking=False):
+            raise HasherBusy("Too many concurrent password operations")
+        try:
+            future = self._pool.submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            # The job keeps its slot until it finishes; the caller answers 503.
+            raise HasherBusy(f"Password operation did not finish within {self.timeout}s") from None
+
+    def hash(self, password: str) -> str:
+        salt = bcrypt.gensalt(rounds=self.rounds)
+        return self._run(bcrypt.hashpw, password.encode(), salt).decode()
+
+    def verify(self, password: str, hashed: str) -> bool:
+        return self._run(bcrypt.checkpw, password.encode(), hashed.encode())
+
+    def needs_rehash(self, hashed: str) -> bool:
+        """True if `hashed` was produced with a cost other than `self.rounds`."""
+        m = _COST_RE.match(hashed)
+        return m is None or int(m.group(1)) != self.rounds
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+# Create a singleton instance
+password_hasher = PasswordHasher(
+    rounds=int(os.environ.get("BCRYPT_ROUNDS", 12)),
+    max_workers=int(os.environ.get("BCRYPT_WORKERS", min(2, os.cpu_count() or 1))),
+    max_pending=int(os.environ.get("BCRYPT_MAX_PENDING", 16)),
+)
@@ -0,0 +1,217 @@
+from __future__ import annotations
+
+import cProfile
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+from typing import Callable, Dict, Optional, Set
+
+from flask import Flask, g, request
+
+logger = logging.getLogger(__name__)
+
+MODES = ("sample", "cprofile")
+
+
+class StackSampler:
+    """
+    Samples one thread's Python stack every `interval` seconds from a
+    background thread and counts identical stacks. `folded()` is the
+    collapsed-stack format flamegraph.pl, speedscope and inferno read.
+    """
+
+    def __init__(self, thread_id: int, interval: float = 0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def start(self) -> "StackSampler":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.samples[";".join(reversed(stack))] += 1
+
+    def folded(self) -> str:
+        return "".join(f"{stack} {n}\n" for stack, n in self.samples.most_common())
+
+
+class ProfileSettings:
+    """
+    Where profiles go and what the admin endpoint changes at runtime:
+    sampling rate, routes, and profiler mode. Only the newest `max_files`
+    profiles (and at most `max_bytes` of them) are kept in `directory`.
+    """
+
+    def __init__(self, *, directory: Path, sample_rate: float = 0.0, routes: Optional[Set[str]] = None,
+                 mode: str = "sample", interval: float = 0.005, max_files: int = 200,
+                 max_bytes: int = 256 * 1024 * 1024):
+        self.directory = Path(directory)
+        self.sample_rate = sample_rate
+        self.routes = routes
+        self.mode = mode
+        self.interval = interval
+        self.max_files = max_files
+        self.max_bytes = max_bytes
+
+    def as_dict(self) -> dict:
+        return {"sample_rate": self.sample_rate,
+                "routes": sorted(self.routes) if self.routes else None,
+                "mode": self.mode,
+                "directory": str(self.directory),
+                "max_files": self.max_files,
+                "max_bytes": self.max_bytes}
+
+    def update(self, body: Dict) -> Optional[str]:
+        """Apply a PUT body; returns an error message (and changes nothing) if it is invalid."""
+        rate = body.get("sample_rate", self.sample_rate)
+        routes = body.get("routes", sorted(self.routes) if self.routes else None)
+        mode = body.get("mode", self.mode)
+        if not isinstance(rate, (int, float)) or not 0 <= rate <= 1:
+            return "sample_rate must be between 0 and 1"
+        if routes is not None and (not isinstance(routes, list)
+                                   or not all(isinstance(r, str) for r in routes)):
+            return "routes must be a list of route rules or null"
+        if mode not in MODES:
+            return f"mode must be one of {', '.join(MODES)}"
+        self.sample_rate, self.routes, self.mode = float(rate), set(routes or ()) or None, mode
+        return None
+
+    def pick(self, asked: Optional[str], authorized: Callable[[], bool], rule: Optional[str]) -> Optional[str]:
+        """The mode to profile this request with, or None."""
+        if asked is not None:
+            mode = asked.strip().lower() or self.mode
+            try:
+                allowed = mode in MODES and authorized()
+            except Exception:  # e.g. an expired token: just don't profile
+                allowed = False
+            return mode if allowed else None
+        if self.sample_rate <= 0 or random.random() >= self.sample_rate:
+            return None
+        if self.routes and rule not in self.routes:
+            return None
+        return self.mode
+
+
+class RequestProfile:
+    """
+    One profiled request. Create it and call stop() on the thread doing the
+    work (cProfile only sees its own thread); write() can run anywhere.
+    """
+
+    def __init__(self, mode: str, interval: float):
+        self.id = uuid.uuid4().hex[:12]
+        self.mode = mode
+        self.t0 = time.perf_counter()
+        self.elapsed_ms = 0.0
+        if mode == "cprofile":
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+        else:
+            self.profiler = StackSampler(threading.get_ident(), interval).start()
+
+    def stop(self) -> None:
+        if self.mode == "cprofile":
+            self.profiler.disable()
+        else:
+            self.profiler.stop()
+        self.elapsed_ms = (time.perf_counter() - self.t0) * 1000
+
+    def write(self, settings: ProfileSettings, rule: str, method: str) -> Optional[Path]:
+        name = f"{self.id}-{_slug(rule)}-{method}-{self.elapsed_ms:.0f}ms"
+        try:
+            settings.directory.mkdir(parents=True, exist_ok=True)
+            if self.mode == "cprofile":
+                path = settings.directory / f"{name}.prof"
+                self.profiler.dump_stats(path)
+            else:
+                path = settings.directory / f"{name}.folded"
+                path.write_text(self.profiler.folded())
+            _prune(settings)
+        except OSError:
+            logger.exception("Could not write profile %s", name)
+            return None
+        logger.info("Profiled %s %s in %.0fms -> %s", method, rule, self.elapsed_ms, path)
+        return path
+
+
+def _slug(rule: str) -> str:
+    return re.sub(r"[^A-Za-z0-9]+", "_", rule).strip("_") or "root"
+
+
+def _prune(settings: ProfileSettings) -> None:
+    """Delete the oldest profiles beyond max_files / max_bytes."""
+    files = [e for e in os.scandir(settings.directory)
+             if e.is_file() and e.name.endswith((".folded", ".prof"))]
+    files.sort(key=lambda e: e.stat().st_mtime, reverse=True)
+    total = 0
+    for n, entry in enumerate(files):
+        total += entry.stat().st_size
+        if n >= settings.max_files or total > settings.max_bytes:
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:  # another worker pruned it first
+                pass
+
+
+def init_profiling(app: Flask, *, authorized: Callable[[], bool], settings: ProfileSettings) -> ProfileSettings:
+    """
+    Profile individual requests on demand and write one file per request to
+    `settings.directory`, named <id>-<route>-<method>-<ms>ms.folded (stack
+    samples) or .prof (cProfile/pstats).
+
+    A request is profiled when an `authorized()` caller sends
+    "X-Profile: sample|cprofile", or when it is picked by the sampling
+    rate (optionally only for some routes). A profiled response carries
+    X-Profile-Id. With no header and a zero rate, each request costs one
+    header lookup and one comparison. Routes served natively by asgi.py
+    use the same settings through RequestProfile.
+    """
+
+    @app.before_request
+    def _start_profile():
+        rule = request.url_rule.rule if request.url_rule is not None else None
+        mode = settings.pick(request.headers.get("X-Profile"), authorized, rule)
+        if mode is not None:
+            g._mh_profile = RequestProfile(mode, settings.interval)
+
+    @app.after_request
+    def _tag_profile(response):
+        profile = g.get("_mh_profile")
+        if profile is not None:
+            response.headers["X-Profile-Id"] = profile.id
+        return response
+
+    # Teardown, not after_request: a streamed response is still running
+    # when after_request fires.
+    @app.teardown_request
+    def _finish_profile(exc):
+        profile = g.pop("_mh_profile", None)
+        if profile is None:
+            return
+        profile.stop()
+        rule = request.url_rule.rule if request.url_rule is not None else "unmatched"
+        profile.write(settings, rule, request.method)
+
+    return settings
@@ -1,51 +1,415 @@
 from __future__ import annotations
 
+import logging
 import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence
+
 import numpy as np
-import pandas as pd
-from openai import OpenAI
-from sklearn.metrics.pairwise import cosine_similarity
+
+import shared  # noqa: F401
+from chunking import split_cv
+from embeddings import CachedEmbeddings, EmbeddingProvider, OpenAIEmbeddings
+from lexical_index import BM25Index, fuse
+from tracing import span, traced
+from vector_index import VectorIndex
+
+logger = logging.getLogger(__name__)
+
+FACULTY_COLUMNS = (
+    "Name",
+    "Email",
+    "Faculty",
+    "Summary of Research",
+    "Fields of Research",
+    "Link to Page",
+)
+
+
+def _dedupe(meta: List[dict]) -> List[dict]:
+    """One row per Email (the last); rows without an Email are kept as they are."""
+    last = {r["Email"]: i for i, r in enumerate(meta) if r["Email"]}
+    out = [r for i, r in enumerate(meta) if not r["Email"] or last[r["Email"]] == i]
+    if len(out) < len(meta):
+        logger.warning("faculty table has %d duplicate Email rows; indexing the last of each",
+                       len(meta) - len(out))
+    return out
+
+
+def faculty_text(record: dict) -> str:
+    """What gets embedded (and BM25-indexed) for one faculty row."""
+    return f"{record['Summary of Research'] or ''}. Fields: {record['Fields of Research'] or ''}"
+
+
+@dataclass(frozen=True)
+class FacultySnapshot:
+    """One immutable generation of the faculty index; swapped whole on every edit."""
+
+    version: int  # last faculty_changes.seq applied
+    meta: List[dict]
+    texts: List[str]
+    index: VectorIndex
+    lexical: Optional[BM25Index]
+    rows: Dict[str, int]  # Email -> row in meta / index
 
 
 class RAMatcher:
     """
     Pre-embeds all faculty once at start-up.
-    Call .match(cv_text, top_n) to get a ranked list.
+    Call .match(cv_text, top_n) to get a ranked list, or await
+    .amatch(cv_text, top_n) from async code. .match_many(cv_texts, top_n)
+    ranks a whole batch with one embedding call and one matrix product.
+
+    Embeddings come from `provider` (OpenAI `model` by default); pass a
+    local provider such as HashingEmbeddings to match fully offline.
+
+    `index_dim` / `quantize` keep the faculty matrix truncated and/or int8
+    in memory, with exact float32 re-ranking of the shortlist (see
+    vector_index.VectorIndex); `rerank_path` moves the float32 copy to disk.
+
+    `prefilter=N` first shortlists the N faculty whose research fields and
+    summary best match the CV under BM25 and scores only those densely;
+    `hybrid_weight` > 0 then ranks by a mix of cosine and BM25 scores.
+
+    CV embeddings are cached by content hash. With `cv_chunking` the CV is
+    split into section-aligned chunks (chunking.split_cv) that are embedded
+    and cached one by one, so an edited CV only pays for the chunks that
+    changed; "mean" pools the chunk vectors into one query, "max" scores
+    each faculty row by its best-matching chunk.
+
+    .upsert_faculty / .delete_faculty edit single rows (keyed by Email) in
+    the table and the index without a rebuild. Each edit publishes a new
+    FacultySnapshot; matches in flight finish on the one they started with.
+    Every edit (and reload) is also appended to the faculty_changes table in
+    the same transaction. .sync() replays changes made by other processes,
+    so all workers serving one database converge. With `sync_interval` set
+    it runs on a background thread. `version` is the last change applied,
+    so it means the same thing in every worker. The index holds one row per
+    Email; if the table has duplicate Emails, the last row wins.
     """
 
-    def __init__(self, db_path: str, *, api_key: str, model: str = "text-embedding-3-large"):
+    def __init__(
+        self,
+        db_path: str,
+        *,
+        api_key: Optional[str] = None,
+        model: str = "text-embedding-3-large",
+        provider: Optional[EmbeddingProvider] = None,
+        index_dim: Optional[int] = None,
+        quantize: bool = False,
+        rerank_path: Optional[str] = None,
+        prefilter: Optional[int] = None,
+        hybrid_weight: float = 0.0,
+        cv_chunking: Optional[str] = None,
+        cv_cache_size: int = 10_000,
+        sync_interval: Optional[float] = None,
+    ):
+        if cv_chunking not in (None, "mean", "max"):
+            raise ValueError(f"cv_chunking must be 'mean' or 'max', not {cv_chunking!r}")
         self.conn = sqlite3.connect(db_path, check_same_thread=False)
-        self.ai = OpenAI(api_key=api_key)
-        self.model = model
+        self.provider = provider or OpenAIEmbeddings(model, api_key=api_key)
+        self.cv_embedder = CachedEmbeddings(self.provider, max_entries=cv_cache_size)
+        self.cv_chunking = cv_chunking
+        self.index_options = dict(dim=index_dim, quantize=quantize, rerank_path=rerank_path)
+        self.prefilter = prefilter
+        self.hybrid_weight = hybrid_weight
+        self._write_lock = threading.Lock()
+        self._state: Optional[FacultySnapshot] = None
+        with self.conn:
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS faculty_changes (
+                    seq   INTEGER PRIMARY KEY AUTOINCREMENT,
+                    email TEXT,
+                    op    TEXT NOT NULL,
+                    at    TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
         self._load_faculty()
+        if sync_interval:
+            threading.Thread(target=self._sync_loop, args=(sync_interval,),
+                             name="faculty-sync", daemon=True).start()
+
+    @property
+    def version(self) -> int:
+        return self._state.version
+
+    @property
+    def size(self) -> int:
+        return len(self._state.meta)
 
     # ------------------------------------------------------------------ #
     def _load_faculty(self):
-        df = pd.read_sql("""
-            SELECT Name,
-                   Email,
-                   Faculty,
-                   "Summary of Research",
-                   "Fields of Research",
-                   "Link to Page"
-            FROM faculty
-        """, self.conn)
-
-        self.meta = df.to_dict(orient="records")
-        joined = (
-            df["Summary of Research"] + ". Fields: " + df["Fields of Research"]
-        ).tolist()
-
-        resp = self.ai.embeddings.create(input=joined, model=self.model)
-        self.embeds = [np.array(e.embedding) for e in resp.data]
+        # Edits wait for a rebuild (and vice versa) so none is lost; readers never do.
+        with self._write_lock:
+            self._rebuild()
+
+    def _rebuild(self):
+        with span("db", op="load_faculty"):
+            # Read the change position first: anything committed after it is
+            # replayed by the next sync, and replaying is idempotent.
+            seq = self._last_change()
+            cur = self.conn.execute("""
+                SELECT Name,
+                       Email,
+                       Faculty,
+                       "Summary of Research",
+                       "Fields of Research",
+                       "Link to Page"
+                FROM faculty
+            """)
+            columns = [c[0] for c in cur.description]
+            meta = _dedupe([dict(zip(columns, row)) for row in cur.fetchall()])
+
+        joined = [faculty_text(r) for r in meta]
+
+        with span("embedding", source="ra_faculty"):
+            # Fits self.provider and moves the CV cache to a new generation, so a
+            # match still running on the old fit cannot store its vectors.
+            self.cv_embedder.fit(joined)
+            vectors = self.provider.embed(joined)
+        self._publish(
+            meta,
+            joined,
+            VectorIndex(vectors, **self.index_options),
+            BM25Index(joined) if self.prefilter else None,
+            seq,
+        )
+
+    def reload(self) -> int:
+        """Full rebuild from the table (re-fits the provider) here and, via sync, in every worker."""
+        with self._write_lock:
+            with self.conn:
+                self.conn.execute("INSERT INTO faculty_changes (op) VALUES ('reload')")
+            self._rebuild()
+        return self.version
 
+    def _last_change(self) -> int:
+        return self.conn.execute("SELECT COALESCE(MAX(seq), 0) FROM faculty_changes").fetchone()[0]
+
+    def _publish(self, meta: List[dict], texts: List[str], index: VectorIndex,
+                 lexical: Optional[BM25Index], version: int) -> None:
+        """Swap in a new snapshot. Caller holds _write_lock."""
+        self._state = FacultySnapshot(
+            version=version,
+            meta=meta,
+            texts=texts,
+            index=index,
+            lexical=lexical,
+            rows={r["Email"]: i for i, r in enumerate(meta)},
+        )
+
+    # ------------------------------------------------------------------ #
+    def upsert_faculty(self, records: Sequence[dict]) -> dict:
+        """
+        Insert or update faculty rows by Email. Only these rows are embedded;
+        the table write and the index swap happen together under one lock.
+        """
+        records = [{col: r.get(col) or "" for col in FACULTY_COLUMNS} for r in records]
+        records = list({r["Email"]: r for r in records}.values())  # last one wins
+        if not records:
+            return {"version": self.version, "added": 0, "updated": 0}
+        texts = [faculty_text(r) for r in records]
+        with span("embedding", source="ra_faculty_edit"):
+            vectors = self.provider.embed(texts)
+
+        with self._write_lock:
+            added = 0
+            with span("db", op="upsert_faculty"), self.conn:
+                for record in records:
+                    values = [record[c] for c in FACULTY_COLUMNS]
+                    cur = self.conn.execute(
+                        'UPDATE faculty SET Name = ?, Email = ?, Faculty = ?, '
+                        '"Summary of Research" = ?, "Fields of Research" = ?, '
+                        '"Link to Page" = ? WHERE Email = ?',
+                        values + [record["Email"]],
+                    )
+                    if cur.rowcount == 0:
+                        self.conn.execute(
+                            'INSERT INTO faculty (Name, Email, Faculty, "Summary of Research", '
+                            '"Fields of Research", "Link to Page") VALUES (?, ?, ?, ?, ?, ?)',
+                            values,
+                        )
+                        added += 1
+                self.conn.executemany(
+                    "INSERT INTO faculty_changes (email, op) VALUES (?, 'upsert')",
+                    [(r["Email"],) for r in records],
+                )
+            self._sync_locked(known={r["Email"]: (t, v) for r, t, v in zip(records, texts, vectors)})
+            return {"version": self.version, "added": added, "updated": len(records) - added}
+
+    def delete_faculty(self, emails: Iterable[str]) -> dict:
+        emails = list(dict.fromkeys(emails))
+        with self._write_lock:
+            with span("db", op="delete_faculty"), self.conn:
+                deleted = sum(
+                    self.conn.execute("DELETE FROM faculty WHERE Email = ?", (e,)).rowcount > 0
+                    for e in emails
+                )
+                if deleted:
+                    self.conn.executemany(
+                        "INSERT INTO faculty_changes (email, op) VALUES (?, 'delete')",
+                        [(e,) for e in emails],
+                    )
+            self._sync_locked()
+            return {"version": self.version, "deleted": deleted}
+
+    # ------------------------------------------------------------------ #
+    def sync(self) -> int:
+        """Apply faculty edits made by other processes since this snapshot; returns the version."""
+        with self._write_lock:
+            self._sync_locked()
+        return self.version
+
+    def _sync_loop(self, interval: float) -> None:
+        while True:
+            time.sleep(interval)
+            try:
+                self.sync()
+            except Exception:
+                logger.exception("Faculty sync failed; retrying in %.1fs", interval)
+
+    def _sync_locked(self, known: Optional[Dict[str, tuple]] = None) -> None:
+        """
+        Replay faculty_changes past the current snapshot from the table's
+        current rows. `known` maps Email -> (text, vector) already embedded
+        by the caller. Caller holds _write_lock.
+        """
+        changes = self.conn.execute(
+            "SELECT seq, email, op FROM faculty_changes WHERE seq > ? ORDER BY seq",
+            (self._state.version,),
+        ).fetchall()
+        if not changes:
+            return
+        if any(op == "reload" for _, _, op in changes):
+            self._rebuild()
+            return
+        emails = list(dict.fromkeys(e for _, e, _ in changes if e))
+        current: Dict[str, dict] = {}
+        with span("db", op="sync_faculty"):
+            for i in range(0, len(emails), 500):
+                chunk = emails[i:i + 500]
+                cur = self.conn.execute(
+                    'SELECT Name, Email, Faculty, "Summary of Research", "Fields of Research", '
+                    '"Link to Page" FROM faculty WHERE Email IN (%s)' % ",".join("?" * len(chunk)),
+                    chunk,
+                )
+                columns = [c[0] for c in cur.description]
+                for row in cur.fetchall():
+                    record = dict(zip(columns, row))
+                    current[record["Email"]] = record  # duplicates: last row wins, as in _rebuild
+        upserts = [current[e] for e in emails if e in current]
+        texts = [faculty_text(r) for r in upserts]
+        known = known or {}
+        todo = [i for i, (r, t) in enumerate(zip(upserts, texts)) if known.get(r["Email"], (None,))[0] != t]
+        vectors = [known[r["Email"]][1] if i not in todo else None for i, r in enumerate(upserts)]
+        if todo:
+            with span("embedding", source="ra_faculty_edit"):
+                for i, vec in zip(todo, self.provider.embed([texts[i] for i in todo])):
+                    vectors[i] = vec
+        self._apply(upserts, texts, vectors, [e for e in emails if e not in current], changes[-1][0])
+
+    def _apply(self, records: List[dict], texts: List[str], vectors: List[np.ndarray],
+               deleted: List[str], version: int) -> None:
+        """Publish the current snapshot with rows upserted and deleted by Email. Caller holds _write_lock."""
+        state = self._state
+        update, append, meta, all_texts = {}, [], list(state.meta), list(state.texts)
+        new_texts, changed_texts = [], {}
+        for record, text, vec in zip(records, texts, vectors):
+            row = state.rows.get(record["Email"])
+            if row is None:
+                append.append(vec)
+                meta.append(record)
+                all_texts.append(text)
+                new_texts.append(text)
+            else:
+                update[row] = vec
+                meta[row] = record
+                all_texts[row] = text
+                changed_texts[row] = text
+        rows = sorted({state.rows[e] for e in deleted if e in state.rows})
+        if rows:
+            gone = set(rows)
+            meta = [m for i, m in enumerate(meta) if i not in gone]
+            all_texts = [t for i, t in enumerate(all_texts) if i not in gone]
+        index = state.index.edited(update=update, append=np.asarray(append) if append else None, delete=rows)
+        lexical = None
+        if state.lexical is not None:
+            lexical = state.lexical.edited(update=changed_texts, append=new_texts, delete=rows)
+        self._publish(meta, all_texts, index, lexical, version)
+
+    # ------------------------------------------------------------------ #
+    def _cv_inputs(self, text: str) -> List[str]:
+        return (split_cv(text) or [text]) if self.cv_chunking else [text]
+
+    def _pool(self, vectors: np.ndarray) -> np.ndarray:
+        """Chunk vectors → query: (dim,) for pooled scoring, (chunks, dim) for max-sim."""
+        if self.cv_chunking == "max":
+            return vectors
+        return vectors.mean(axis=0) if len(vectors) > 1 else vectors[0]
+
+    @traced("embedding", source="ra_cv")
     def _embed(self, text: str) -> np.ndarray:
-        resp = self.ai.embeddings.create(input=[text], model=self.model)
-        return np.array(resp.data[0].embedding)
+        return self._pool(self.cv_embedder.embed(self._cv_inputs(text)))
+
+    @traced("embedding", source="ra_cv")
+    async def _aembed(self, text: str) -> np.ndarray:
+        return self._pool(await self.cv_embedder.aembed(self._cv_inputs(text)))
+
+    @traced("embedding", source="ra_cv_batch")
+    def _embed_many(self, texts: Sequence[str]) -> List[np.ndarray]:
+        parts = [self._cv_inputs(t) for t in texts]
+        flat = self.cv_embedder.embed([chunk for p in parts for chunk in p])
+        queries, start = [], 0
+        for p in parts:
+            queries.append(self._pool(flat[start:start + len(p)]))
+            start += len(p)
+        return queries
 
     # ------------------------------------------------------------------ #
     def match(self, cv_text: str, *, top_n: int = 5):
-        v = self._embed(cv_text)
-        sims = [cosine_similarity([v], [e])[0][0] for e in self.embeds]
-        idxs = sorted(range(len(sims)), key=lambda i: sims[i], reverse=True)[: top_n]
-        return [self.meta[i] | {"score": sims[i]} for i in idxs]
\ No newline at end of file
+        return self._rank(self._embed(cv_text), top_n, cv_text)
+
+    async def amatch(self, cv_text: str, *, top_n: int = 5):
+        return self._rank(await self._aembed(cv_text), top_n, cv_text)
+
+    def match_many(self, cv_texts: Sequence[str], *, top_n: int = 5) -> List[list]:
+        """Ranked lists for each CV, in input order."""
+        if not cv_texts:
+            return []
+        queries = self._embed_many(cv_texts)
+        state = self._state
+        if state.lexical is not None or self.cv_chunking == "max":
+            # Per-CV shortlists or multi-vector queries: only the embedding call is shared.
+            return [self._rank(q, top_n, text, state) for q, text in zip(queries, cv_texts)]
+        return self._rank_many(np.stack(queries), top_n, state)
+
+    @traced("lexical", source="ra")
+    def _shortlist(self, lexical: BM25Index, cv_text: str):
+        return lexical.search(cv_text, self.prefilter)
+
+    @traced("similarity", source="ra")
+    def _rank(self, v: np.ndarray, top_n: int, cv_text: str = "",
+              state: Optional[FacultySnapshot] = None):
+        state = state or self._state
+        index = state.index
+        cand, lex = self._shortlist(state.lexical, cv_text) if state.lexical is not None else (None, None)
+        if cand is None or len(cand) < top_n:
+            # No prefilter, or too few lexical hits to fill the page: score everyone.
+            idxs, scores = index.search(v, top_n)
+        elif self.hybrid_weight > 0:
+            fused = fuse(index.scores(v, cand), lex, self.hybrid_weight)
+            order = np.argsort(-fused, kind="stable")[:top_n]
+            idxs, scores = cand[order], fused[order]
+        else:
+            idxs, scores = index.search(v, top_n, candidates=cand)
+        return [state.meta[i] | {"score": float(s)} for i, s in zip(idxs, scores)]
+
+    @traced("similarity", source="ra_batch")
+    def _rank_many(self, vectors: np.ndarray, top_n: int, state: FacultySnapshot) -> List[list]:
+        idxs, scores = state.index.search_many(vectors, top_n)
+        return [
+            [state.meta[i] | {"score": float(s)} for i, s in zip(row_idxs, row_scores)]
+            for row_idxs, row_scores in zip(idxs, scores)
+        ]
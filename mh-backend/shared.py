@@ -0,0 +1,16 @@
+"""
+Put the repo root on sys.path so the backend can import the shared,
+dependency-light modules that live there (tracing, course_search_algo, ...).
+
+Import this before any of those modules:
+
+    import shared  # noqa: F401
+    from tracing import span
+"""
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+if str(REPO_ROOT) not in sys.path:
+    sys.path.append(str(REPO_ROOT))
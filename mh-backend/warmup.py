@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from typing import Callable, Generic, Optional, TypeVar
+
+T = TypeVar("T")
+
+logger = logging.getLogger(__name__)
+
+
+class NotReady(RuntimeError):
+    """Raised while a component is still warming up (or failing to); callers should answer 503."""
+
+
+class Warmup(Generic[T]):
+    """
+    Builds an expensive object on a background thread.
+
+    The process can serve liveness checks and every route that does not need
+    the object straight away; routes that do call .get(), which raises
+    `NotReady` instead of blocking until the build finishes. A failed build
+    is logged and retried with exponential backoff, so a slow or flaky
+    upstream at boot delays readiness instead of crashing the worker.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        factory: Callable[[], T],
+        *,
+        retry_delay: float = 5.0,
+        max_retry_delay: float = 300.0,
+    ):
+        self.name = name
+        self._factory = factory
+        self._retry_delay = retry_delay
+        self._max_retry_delay = max_retry_delay
+        self._value: Optional[T] = None
+        self._ready = threading.Event()
+        self._error: Optional[str] = None
+        self._attempts = 0
+        self._started_at: Optional[float] = None
+        self._ready_after: Optional[float] = None
+        self._thread: Optional[threading.Thread] = None
+
+    # ------------------------------------------------------------------ #
+    def start(self) -> "Warmup[T]":
+        if self._thread is None:
+            self._started_at = time.monotonic()
+            self._thread = threading.Thread(target=self._run, name=f"warmup-{self.name}", daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self) -> None:
+        delay = self._retry_delay
+        while True:
+            self._attempts += 1
+            try:
+                value = self._factory()
+            except Exception as e:
+                self._error = f"{type(e).__name__}: {e}"
+                logger.exception("Warm-up of %s failed (attempt %d); retrying in %.1fs",
+                                 self.name, self._attempts, delay)
+                time.sleep(delay)
+                delay = min(delay * 2, self._max_retry_delay)
+                continue
+            self._value, self._error = value, None
+            self._ready_after = time.monotonic() - self._started_at
+            self._ready.set()
+            logger.info("%s ready after %.2fs", self.name, self._ready_after)
+            return
+
+    # ------------------------------------------------------------------ #
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until ready (for scripts and tests); False on timeout."""
+        return self._ready.wait(timeout)
+
+    def get(self) -> T:
+        if not self._ready.is_set():
+            raise NotReady(f"{self.name} is warming up")
+        return self._value
+
+    def status(self, *, detail: bool = False) -> dict:
+        """`detail` adds the last failure's exception text (it is always logged); keep it off public endpoints."""
+        out = {"ready": self.ready, "attempts": self._attempts}
+        if self._ready_after is not None:
+            out["ready_after_s"] = round(self._ready_after, 3)
+        if self._error is not None:
+            out["failing"] = True
+            if detail:
+                out["last_error"] = self._error
+        return out
@@ -0,0 +1,151 @@
+"""
+Result cache for vector searches, keyed by the query vector itself.
+
+    cache = SearchCache(max_entries=1024, ttl=300)
+    key = cache.key(vector, top_k=10, candidates=titles)
+    hits = cache.get(key)
+    if hits is None:
+        hits = run_search(...)
+        cache.put(key, hits)
+
+The vector is L2-normalised and rounded to a grid of `step` before hashing.
+Re-running the same recommendation hits the cache, and so does a query
+whose vector differs only by float noise. Entries expire after `ttl`
+seconds and the least recently used one is dropped once `max_entries` is
+reached. `invalidate()` empties the cache when the index behind it is
+rebuilt and bumps `version`, so a search that was already running when
+the rebuild happened cannot store its stale result.
+
+With several worker processes, give every worker's cache the same
+`version_file`. `invalidate()` appends one byte to it, and each cache
+compares the file's size with the last one it saw (at most every
+`check_interval` seconds, on `key()`). A change empties the cache, so an
+invalidation sent to one worker reaches all of them within that interval.
+"""
+from __future__ import annotations
+
+import copy
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Optional, Sequence, Tuple
+
+import numpy as np
+
+from tracing import REGISTRY
+
+SEARCH_CACHE = REGISTRY.counter(
+    "mh_search_cache_total", "Vector search cache lookups by outcome (hit, miss, expired)."
+)
+
+Key = Tuple[int, bytes]
+
+
+class SearchCache:
+    def __init__(self, *, max_entries: int = 1024, ttl: float = 300.0, step: float = 1e-3,
+                 name: str = "search", version_file: Optional[Path] = None, check_interval: float = 1.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.step = step
+        self.name = name
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self._lru: "OrderedDict[bytes, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.version_file = Path(version_file) if version_file else None
+        self.check_interval = check_interval
+        self._shared = self._shared_version()
+        self._checked = time.monotonic()
+
+    def _shared_version(self) -> int:
+        try:
+            return os.stat(self.version_file).st_size
+        except FileNotFoundError:
+            return 0
+
+    def _sync(self) -> None:
+        """Drop everything if another process invalidated since the last check."""
+        now = time.monotonic()
+        if now - self._checked < self.check_interval:
+            return
+        self._checked = now
+        shared = self._shared_version()
+        if shared != self._shared:
+            with self._lock:
+                self._shared = shared
+                self._lru.clear()
+                self.version += 1
+
+    def key(self, vector: Sequence[float], *, top_k: int, candidates: Optional[Sequence[str]] = None) -> Key:
+        if self.version_file is not None:
+            self._sync()
+        vec = np.asarray(vector, dtype=np.float64)
+        norm = np.linalg.norm(vec)
+        if norm > 0:
+            vec = vec / norm
+        grid = np.rint(vec / self.step).astype(np.int32)
+        digest = hashlib.sha256(grid.tobytes())
+        digest.update(json.dumps([top_k, sorted(candidates) if candidates else None]).encode("utf-8"))
+        return self.version, digest.digest()
+
+    def get(self, key: Key) -> Optional[Any]:
+        version, k = key
+        now = time.monotonic()
+        with self._lock:
+            entry = self._lru.get(k) if version == self.version else None
+            if entry is not None and entry[0] <= now:
+                del self._lru[k]
+                outcome, value = "expired", None
+            elif entry is None:
+                outcome, value = "miss", None
+            else:
+                self._lru.move_to_end(k)
+                outcome, value = "hit", entry[1]
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        SEARCH_CACHE.inc(cache=self.name, result=outcome)
+        # Callers may annotate the hits they get back; keep the cached copy clean.
+        return copy.deepcopy(value)
+
+    def put(self, key: Key, value: Any) -> None:
+        version, k = key
+        with self._lock:
+            if version != self.version:
+                return  # computed against an index that has since been rebuilt
+            self._lru[k] = (time.monotonic() + self.ttl, copy.deepcopy(value))
+            self._lru.move_to_end(k)
+            while len(self._lru) > self.max_entries:
+                self._lru.popitem(last=False)
+
+    def invalidate(self) -> int:
+        """Drop every entry (the index changed), here and via `version_file` everywhere; returns the new version."""
+        with self._lock:
+            if self.version_file is not None:
+                self.version_file.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.version_file, "ab") as fh:  # O_APPEND: safe across processes
+                    fh.write(b".")
+                self._shared = self._shared_version()
+            self._lru.clear()
+            self.version += 1
+            return self.version
+
+    def __len__(self) -> int:
+        return len(self._lru)
+
+    def status(self) -> dict:
+        return {
+            "version": self.version,
+            "entries": len(self._lru),
+            "max_entries": self.max_entries,
+            "ttl_s": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "shared_version": self._shared if self.version_file is not None else None,
+        }
@@ -0,0 +1,73 @@
+import asyncio
+import contextlib
+import io
+import threading
+import time
+
+import pytest
+
+from benchmarks import generators as gen
+from benchmarks.standins import FakeWeaviate
+from course_search_algo import CourseSearchHelper
+from embeddings import EmbeddingProvider, HashingEmbeddings
+
+SLOW_S = 2.0
+
+
+class SlowForSomeProvider(EmbeddingProvider):
+    """Takes SLOW_S for batches mentioning "slow" and honours `timeout` like a real client."""
+
+    name = "slow-for-some"
+
+    def __init__(self):
+        self.inner = HashingEmbeddings(64)
+
+    def embed(self, texts, *, timeout=None):
+        if any("slow" in t for t in texts):
+            if timeout is not None and timeout < SLOW_S:
+                time.sleep(timeout)
+                raise TimeoutError("upstream timed out")
+            time.sleep(SLOW_S)
+        return self.inner.embed(texts)
+
+
+@pytest.fixture(scope="module")
+def helper(tmp_path_factory):
+    csv = gen.write_catalog_csv(tmp_path_factory.mktemp("catalog") / "courses.csv", 300)
+    with FakeWeaviate() as weaviate, contextlib.redirect_stdout(io.StringIO()):
+        yield CourseSearchHelper(None, weaviate_url=weaviate.url, courses_csv_path=str(csv),
+                                 embedding_provider=SlowForSomeProvider(), deadline=0.5)
+
+
+def test_slow_requests_do_not_starve_the_next_one(helper):
+    reports = [helper.parse_dars_report(gen.dars_text(1, 3))]
+    errors = []
+
+    def slow():
+        try:
+            list(helper.iter_recommendations(reports, "slow interests", 5))
+        except TimeoutError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=slow) for _ in range(16)]
+    for t in threads:
+        t.start()
+    time.sleep(0.05)  # every slow request is now waiting on its upstream call
+
+    t0 = time.monotonic()
+    courses = list(helper.iter_recommendations(reports, "machine learning", 5))
+    assert courses
+    assert time.monotonic() - t0 < 0.5
+
+    for t in threads:
+        t.join()
+    assert len(errors) == len(threads)
+
+
+def test_async_path_enforces_the_deadline(helper):
+    reports = [helper.parse_dars_report(gen.dars_text(1, 3))]
+    t0 = time.monotonic()
+    with pytest.raises(TimeoutError):
+        asyncio.run(helper.arecommend_courses(reports, "slow interests", 5))
+    assert time.monotonic() - t0 < SLOW_S
+    assert asyncio.run(helper.arecommend_courses(reports, "machine learning", 5)) is not None
@@ -0,0 +1,54 @@
+import asyncio
+import threading
+
+import numpy as np
+
+from embeddings import BatchingEmbeddings, EmbeddingProvider, HashingEmbeddings
+
+
+class CountingProvider(EmbeddingProvider):
+    name = "counting"
+
+    def __init__(self):
+        self.inner = HashingEmbeddings(64)
+        self.calls = []
+
+    def embed(self, texts, *, timeout=None):
+        self.calls.append(len(texts))
+        return self.inner.embed(texts)
+
+
+def test_concurrent_aembed_shares_one_upstream_batch():
+    upstream = CountingProvider()
+    batcher = BatchingEmbeddings(upstream, max_wait_ms=200, max_batch=1000)
+    texts = [f"research interest {i}" for i in range(200)]
+    threads_before = threading.active_count()
+
+    async def run():
+        return await asyncio.gather(*(batcher.aembed([t]) for t in texts))
+
+    results = asyncio.run(run())
+
+    assert upstream.calls == [200]
+    assert batcher.batches == 1
+    assert threading.active_count() <= threads_before + 1  # the batcher's own pool thread
+    for text, rows in zip(texts, results):
+        np.testing.assert_allclose(rows[0], upstream.inner.embed([text])[0])
+
+
+def test_aembed_error_reaches_only_the_failing_caller():
+    class Picky(CountingProvider):
+        def embed(self, texts, *, timeout=None):
+            if "bad" in texts:
+                raise ValueError("rejected input")
+            return super().embed(texts, timeout=timeout)
+
+    batcher = BatchingEmbeddings(Picky(), max_wait_ms=100)
+
+    async def run():
+        return await asyncio.gather(batcher.aembed(["good"]), batcher.aembed(["bad"]),
+                                    return_exceptions=True)
+
+    good, bad = asyncio.run(run())
+    assert good.shape == (1, 64)
+    assert isinstance(bad, ValueError)
@@ -0,0 +1,45 @@
+import json
+
+import pytest
+
+from benchmarks.loadtest import seed_database
+
+
+@pytest.fixture(scope="module")
+def backend(tmp_path_factory):
+    workdir = tmp_path_factory.mktemp("backend")
+    seed_database(workdir, faculty=50)
+    with pytest.MonkeyPatch.context() as mp:
+        mp.chdir(workdir)
+        mp.setenv("ADMIN_TOKEN", "test-admin")
+        mp.setenv("EMBEDDING_PROVIDER_RA", "hashing")
+        mp.setenv("EMBEDDING_PROVIDER_COURSES", "hashing")
+        import app
+
+        assert app.ra_matcher.wait(60)
+        yield app
+
+
+def batch(backend, body):
+    response = backend.app.test_client().post(
+        "/api/ra/match/batch", json=body, headers={"X-Admin-Token": "test-admin"}
+    )
+    assert response.status_code == 200
+    return [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+
+def test_blank_cv_texts_get_an_error_line(backend):
+    lines = batch(backend, {"cv_texts": ["machine learning and robotics", "", "  \n\t"], "top_n": 3})
+    assert [line["index"] for line in lines] == [0, 1, 2]
+    assert len(lines[0]["matches"]) == 3
+    assert lines[1] == {"index": 1, "error": "Empty CV text"}
+    assert lines[2] == {"index": 2, "error": "Empty CV text"}
+
+
+def test_users_with_blank_cvs_get_an_error_line(backend):
+    backend.user_cache.set("9001", {"cv": "   ", "dars": []})
+    backend.user_cache.set("9002", {"cv": "quantum chemistry", "dars": []})
+    lines = batch(backend, {"user_ids": ["9001", "9002", "nobody"], "top_n": 2})
+    assert lines[0] == {"user_id": "9001", "error": "Empty CV"}
+    assert len(lines[1]["matches"]) == 2
+    assert lines[2] == {"user_id": "nobody", "error": "No documents"}
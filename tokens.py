@@ -0,0 +1,10 @@
+"""
+Local token estimates, for budgeting text before it goes to an embedding
+model. Standard library only, so parsing code (dars, dars_ingest workers)
+can use it without importing numpy or the embedding stack.
+"""
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough BPE token count (~4 characters per token), computed locally."""
+    return len(text) // 4 + 1
@@ -0,0 +1,174 @@
+"""
+Lightweight in-process tracing shared by the algorithms and the backend.
+
+  • span("embedding", source="ra")  – time a block into a per-stage histogram
+  • @traced("dars_parse")           – same thing as a decorator (sync or async)
+  • log_event(logger, "skip", ...)  – level-gated, optionally sampled,
+                                      one-line JSON log record
+  • REGISTRY.render()              – Prometheus text exposition format
+
+Stdlib only, so the CLI scripts keep working without extra installs.
+"""
+from __future__ import annotations
+
+import functools
+import inspect
+import json
+import logging
+import os
+import random
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, Iterator, Sequence, Tuple
+
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+# Fraction of per-item hot-path events (one per embedding, one per skipped
+# course, ...) that are actually logged once DEBUG is enabled.
+HOT_PATH_SAMPLE = float(os.environ.get("MH_EVENT_SAMPLE_RATE", "0.01"))
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, object]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _fmt_labels(key: LabelKey, extra: Sequence[Tuple[str, str]] = ()) -> str:
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    esc = lambda v: v.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+    return "{" + ",".join(f'{k}="{esc(v)}"' for k, v in pairs) + "}"
+
+
+class Counter:
+    def __init__(self, name: str, help: str):
+        self.name, self.help = name, help
+        self._values: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def collect(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            yield f"{self.name}{_fmt_labels(key)} {value}"
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name, self.help = name, help
+        self.buckets = tuple(sorted(buckets))
+        # per label set: [bucket counts..., +Inf count], sum
+        self._values: Dict[LabelKey, Tuple[list, list]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = _label_key(labels)
+        idx = bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0]))
+            counts[idx] += 1
+            total[0] += value
+
+    def collect(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            items = [(k, list(c), s[0]) for k, (c, s) in self._values.items()]
+        for key, counts, total in items:
+            running = 0
+            for bound, n in zip(self.buckets, counts):
+                running += n
+                yield f"{self.name}_bucket{_fmt_labels(key, [('le', repr(float(bound)))])} {running}"
+            running += counts[-1]
+            yield f"{self.name}_bucket{_fmt_labels(key, [('le', '+Inf')])} {running}"
+            yield f"{self.name}_sum{_fmt_labels(key)} {total}"
+            yield f"{self.name}_count{_fmt_labels(key)} {running}"
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, help: str) -> Counter:
+        with self._lock:
+            return self._metrics.setdefault(name, Counter(name, help))
+
+    def histogram(self, name: str, help: str, buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        with self._lock:
+            return self._metrics.setdefault(name, Histogram(name, help, buckets))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(line for m in metrics for line in m.collect()) + "\n"
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "mh_stage_duration_seconds", "Wall time spent in each pipeline stage."
+)
+STAGE_ERRORS = REGISTRY.counter(
+    "mh_stage_errors_total", "Pipeline stages that exited with an exception."
+)
+
+
+@contextmanager
+def span(stage: str, **labels):
+    """Time the enclosed block as `stage`; failures are also counted."""
+    t0 = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        STAGE_ERRORS.inc(stage=stage, **labels)
+        raise
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - t0, stage=stage, **labels)
+
+
+def traced(stage: str, **labels):
+    """Decorator form of `span`."""
+    def wrap(fn):
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_inner(*args, **kwargs):
+                with span(stage, **labels):
+                    return await fn(*args, **kwargs)
+            return async_inner
+
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            with span(stage, **labels):
+                return fn(*args, **kwargs)
+        return inner
+    return wrap
+
+
+def log_event(logger: logging.Logger, name: str, *, level: int = logging.DEBUG,
+              sample: float = 1.0, **fields) -> None:
+    """
+    Emit `name` plus `fields` as one JSON log line.
+
+    Cheap when disabled: the level check comes first and nothing is
+    formatted unless the record will actually be written.
+    """
+    if not logger.isEnabledFor(level):
+        return
+    if sample < 1.0 and random.random() >= sample:
+        return
+    fields["event"] = name
+    logger.log(level, "%s", json.dumps(fields, default=str, sort_keys=True))
@@ -0,0 +1,112 @@
+"""
+Reverse prerequisite index: which courses a course unlocks.
+
+    unlocks = UnlocksIndex(prerequisites)        # {course: codes its requisite mentions}
+    unlocks.direct("MATH 221")                   # frozenset of courses listing it
+    unlocks.transitive("MATH 221")               # ... and everything those unlock
+    unlocks.count("MATH 221")                    # size of the transitive set, O(1)
+
+Built once per catalog. Each course's transitive set is a bitset (a Python
+int over the course numbering) computed in one pass over the strongly
+connected components in reverse topological order, so requisite cycles in
+catalog data (A needs B, B needs A) are handled rather than recursed into.
+Sets are decoded from the bitset on request.
+"""
+from __future__ import annotations
+
+from typing import Dict, FrozenSet, Iterable, List, Mapping
+
+
+class UnlocksIndex:
+    def __init__(self, prerequisites: Mapping[str, Iterable[str]]):
+        codes: Dict[str, int] = {}
+        for course, reqs in prerequisites.items():
+            for c in (course, *reqs):
+                codes.setdefault(c, len(codes))
+        self.codes: List[str] = list(codes)
+        self._index = codes
+        # edges[p] = courses whose requisite mentions p
+        edges: List[set] = [set() for _ in self.codes]
+        for course, reqs in prerequisites.items():
+            for p in reqs:
+                if p != course:
+                    edges[codes[p]].add(codes[course])
+        self._direct: List[FrozenSet[str]] = [
+            frozenset(self.codes[c] for c in out) for out in edges
+        ]
+        self._reach = self._closure([sorted(out) for out in edges])
+        self._counts = [bin(r).count("1") for r in self._reach]
+
+    @staticmethod
+    def _closure(edges: List[List[int]]) -> List[int]:
+        """Reachability bitsets via iterative Tarjan SCC (emits components sinks first)."""
+        n = len(edges)
+        index = [-1] * n
+        low = [0] * n
+        on_stack = [False] * n
+        stack: List[int] = []
+        reach = [0] * n
+        counter = 0
+        for root in range(n):
+            if index[root] != -1:
+                continue
+            work = [(root, 0)]
+            while work:
+                v, i = work.pop()
+                if i == 0:
+                    index[v] = low[v] = counter
+                    counter += 1
+                    stack.append(v)
+                    on_stack[v] = True
+                if i < len(edges[v]):
+                    work.append((v, i + 1))
+                    w = edges[v][i]
+                    if index[w] == -1:
+                        work.append((w, 0))
+                    elif on_stack[w]:
+                        low[v] = min(low[v], index[w])
+                    continue
+                for w in edges[v]:
+                    if on_stack[w]:
+                        low[v] = min(low[v], low[w])
+                if low[v] != index[v]:
+                    continue
+                component = []
+                while True:
+                    w = stack.pop()
+                    on_stack[w] = False
+                    component.append(w)
+                    if w == v:
+                        break
+                # Successors outside the component are finished already.
+                bits = 0
+                for u in component:
+                    for w in edges[u]:
+                        bits |= (1 << w) | reach[w]
+                for u in component:
+                    reach[u] = bits & ~(1 << u)
+        return reach
+
+    # ------------------------------------------------------------------ #
+    def __contains__(self, code: str) -> bool:
+        return code in self._index
+
+    def direct(self, code: str) -> FrozenSet[str]:
+        i = self._index.get(code)
+        return self._direct[i] if i is not None else frozenset()
+
+    def count(self, code: str) -> int:
+        """Number of courses `code` unlocks, directly or transitively."""
+        i = self._index.get(code)
+        return self._counts[i] if i is not None else 0
+
+    def transitive(self, code: str) -> FrozenSet[str]:
+        i = self._index.get(code)
+        if i is None:
+            return frozenset()
+        bits, out = self._reach[i], []
+        while bits:
+            low = bits & -bits
+            out.append(self.codes[low.bit_length() - 1])
+            bits ^= low
+        return frozenset(out)
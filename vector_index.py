@@ -0,0 +1,294 @@
+"""
+In-memory cosine-similarity index with optional compressed storage.
+
+    index = VectorIndex(vectors)                        # exact, float32
+    index = VectorIndex(vectors, dim=256)               # Matryoshka truncation
+    index = VectorIndex(vectors, quantize=True)         # int8 scalar quantisation
+    index = VectorIndex(vectors, dim=512, quantize=True,
+                        rerank_path="faculty.f32.npy")  # full copy on disk
+
+    idxs, scores = index.search(query, top_n=5)
+
+When compressed, candidates are scored on the compressed copy and a
+shortlist of `rerank_factor * top_n` is re-scored exactly against the
+float32 rows. If `rerank_path` is given those rows live in a read-only
+memory map, so only the shortlisted pages are ever touched and resident
+memory is just the compressed matrix. Without it the float32 rows stay in
+RAM for re-ranking, so compression adds the compressed copy on top of them:
+it speeds up scoring but uses more memory, not less.
+
+Edits (`edited`) never copy the matrix. Changed and added rows go to a
+small overlay and a logical-to-physical row map points past the rows they
+replace. Once the overlay and the rows it shadows exceed `compact_ratio`
+of the index, the next edit folds everything into a fresh base. The cost
+of that rebuild is spread over the edits that led up to it.
+"""
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+_BLOCK_ROWS = 2048  # int8 rows widened to float32 per step when scoring
+_COMPACT_MIN_ROWS = 256  # overlays smaller than this are never folded in
+
+
+def _normalise(m: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(m, axis=-1, keepdims=True)
+    return np.divide(m, norms, out=np.zeros_like(m), where=norms > 0)
+
+
+def _top_k_rows(scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Per-row top-k of an (m, n) score matrix: (m, k) column indices and scores, best first."""
+    if k < scores.shape[1]:
+        part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    else:
+        part = np.broadcast_to(np.arange(scores.shape[1]), scores.shape)
+    vals = np.take_along_axis(scores, part, axis=1)
+    order = np.argsort(-vals, axis=1, kind="stable")
+    return np.take_along_axis(part, order, axis=1), np.take_along_axis(vals, order, axis=1)
+
+
+class VectorIndex:
+    def __init__(
+        self,
+        vectors: Sequence[np.ndarray] | np.ndarray,
+        *,
+        dim: Optional[int] = None,
+        quantize: bool = False,
+        rerank_factor: int = 10,
+        rerank_path: Optional[str | Path] = None,
+        compact_ratio: float = 0.1,
+    ):
+        full = np.asarray(vectors, dtype=np.float32)
+        full = _normalise(full.reshape(len(full), -1) if len(full) else full.reshape(0, dim or 0))
+        self.size, self.full_dim = full.shape
+        self.dim = min(dim, self.full_dim) if dim else self.full_dim
+        self.quantize = quantize
+        self.rerank_factor = rerank_factor
+        self.rerank_path = rerank_path
+        self.compressed = self.quantize or self.dim < self.full_dim
+        self.compact_ratio = compact_ratio
+        self._set_base(full)
+
+    def _set_base(self, full: np.ndarray) -> None:
+        """Make `full` (normalised, in logical order) the base, with an empty overlay."""
+        self.size = len(full)
+        self.full = self._store(full)
+        self.codes, self.scales = self._encode(full)
+        self._extra = np.empty((0, self.full_dim), dtype=np.float32)
+        self._extra_codes, self._extra_scales = self._encode(self._extra)
+        self._phys: Optional[np.ndarray] = None  # logical row -> row of [full; _extra]; None = identity
+        self._dead = 0  # physical rows no logical row points at
+
+    def _store(self, full: np.ndarray) -> np.ndarray:
+        if not (self.compressed and self.rerank_path is not None):
+            return full
+        # Write beside the target and rename over it: readers of an older
+        # index keep their mapping of the previous file.
+        path = Path(self.rerank_path)
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "wb") as fh:  # a path would get ".npy" appended
+            np.save(fh, full)
+        tmp.replace(path)
+        return np.load(path, mmap_mode="r")
+
+    def _encode(self, full: np.ndarray):
+        """Compressed (codes, scales) for normalised float32 rows; (None, None) if uncompressed."""
+        if not self.compressed:
+            return None, None
+        reduced = _normalise(full[:, : self.dim]) if self.dim < self.full_dim else full
+        if not self.quantize:
+            return np.ascontiguousarray(reduced), None
+        scales = np.abs(reduced).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        return np.rint(reduced / scales[:, None]).astype(np.int8), scales.astype(np.float32)
+
+    def edited(
+        self,
+        *,
+        update: Optional[Dict[int, np.ndarray]] = None,
+        append: Optional[np.ndarray] = None,
+        delete: Optional[Sequence[int]] = None,
+    ) -> "VectorIndex":
+        """
+        Copy-on-write edit. Returns a new index with `update` rows replaced,
+        `append` rows added at the end and then `delete` rows removed; only
+        those rows are normalised and encoded, into the overlay. This index
+        is untouched, so searches already holding it carry on undisturbed.
+        """
+        base_rows = len(self.full)
+        phys = np.arange(self.size, dtype=np.int64) if self._phys is None else self._phys.copy()
+        dead = self._dead
+        fresh = []
+        next_row = base_rows + len(self._extra)
+        if update:
+            rows = np.fromiter(update, dtype=np.int64, count=len(update))
+            fresh.append(_normalise(np.asarray(list(update.values()), dtype=np.float32)))
+            phys[rows] = next_row + np.arange(len(rows))
+            next_row += len(rows)
+            dead += len(rows)
+        if append is not None and len(append):
+            fresh.append(_normalise(np.asarray(append, dtype=np.float32).reshape(len(append), self.full_dim)))
+            phys = np.concatenate([phys, next_row + np.arange(len(append))])
+            next_row += len(append)
+        if delete is not None and len(delete):
+            phys = np.delete(phys, delete)
+            dead += len(set(delete))
+
+        out = object.__new__(VectorIndex)
+        out.__dict__.update(self.__dict__)
+        out.size = len(phys)
+        out._dead = dead
+        out._phys = phys
+        if fresh:
+            new = np.concatenate(fresh)
+            codes, scales = self._encode(new)
+            out._extra = np.concatenate([self._extra, new])
+            if codes is not None:
+                out._extra_codes = np.concatenate([self._extra_codes, codes])
+                if scales is not None:
+                    out._extra_scales = np.concatenate([self._extra_scales, scales])
+        if len(out._extra) + out._dead > max(_COMPACT_MIN_ROWS, self.compact_ratio * out.size):
+            out._set_base(out._full_rows(phys))
+        return out
+
+    def _physical(self, rows: np.ndarray) -> np.ndarray:
+        return rows if self._phys is None else self._phys[rows]
+
+    def _full_rows(self, phys: np.ndarray) -> np.ndarray:
+        """float32 rows by physical number, from the base or the overlay."""
+        base_rows = len(self.full)
+        if not len(self._extra):
+            return self.full[phys]
+        out = np.empty((len(phys), self.full_dim), dtype=np.float32)
+        in_base = phys < base_rows
+        out[in_base] = self.full[phys[in_base]]
+        out[~in_base] = self._extra[phys[~in_base] - base_rows]
+        return out
+
+    def _logical(self, physical_scores: np.ndarray) -> np.ndarray:
+        """Scores over [base; overlay] rows -> scores over logical rows."""
+        return physical_scores if self._phys is None else physical_scores[self._phys]
+
+    # ------------------------------------------------------------------ #
+    @property
+    def nbytes(self) -> int:
+        """Bytes held in RAM (memory-mapped full rows are not counted)."""
+        total = 0 if isinstance(self.full, np.memmap) else self.full.nbytes
+        total += self._extra.nbytes + (self._phys.nbytes if self._phys is not None else 0)
+        for codes, scales in ((self.codes, self.scales), (self._extra_codes, self._extra_scales)):
+            if codes is not None:
+                total += codes.nbytes + (scales.nbytes if scales is not None else 0)
+        return total
+
+    def _approx_scores(self, q: np.ndarray) -> np.ndarray:
+        """Scores on the compressed copy; `q` is (dim,) or (m, dim), result (n,) or (n, m)."""
+        qr = _normalise(q[..., : self.dim]).T
+        out = self._approx_block(self.codes, self.scales, qr)
+        if len(self._extra):
+            out = np.concatenate([out, self._approx_block(self._extra_codes, self._extra_scales, qr)])
+        return self._logical(out)
+
+    @staticmethod
+    def _approx_block(codes: np.ndarray, scales: Optional[np.ndarray], qr: np.ndarray) -> np.ndarray:
+        if scales is None:
+            return codes @ qr
+        out = np.empty((len(codes),) + qr.shape[1:], dtype=np.float32)
+        for start in range(0, len(codes), _BLOCK_ROWS):
+            block = codes[start:start + _BLOCK_ROWS].astype(np.float32)
+            out[start:start + _BLOCK_ROWS] = block @ qr
+        return out * (scales if out.ndim == 1 else scales[:, None])
+
+    @staticmethod
+    def _query(query: np.ndarray) -> np.ndarray:
+        q = np.asarray(query, dtype=np.float32)
+        return _normalise(q if q.ndim == 2 else q.ravel())
+
+    @staticmethod
+    def _max_sim(scores: np.ndarray) -> np.ndarray:
+        """(rows, m) scores of a multi-vector query → best score per row."""
+        return scores.max(axis=1) if scores.ndim == 2 else scores
+
+    def _exact_all(self, q: np.ndarray) -> np.ndarray:
+        """Exact scores of every logical row: (n,) for one query, (n, m) for m."""
+        out = np.asarray(self.full @ q.T)
+        if len(self._extra):
+            out = np.concatenate([out, self._extra @ q.T])
+        return self._logical(out)
+
+    def _exact(self, q: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        if rows is None:
+            return self._max_sim(self._exact_all(q))
+        return self._max_sim(np.asarray(self._full_rows(self._physical(rows)) @ q.T))
+
+    def scores(self, query: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """Exact cosine similarity of `query` against every row, or just `rows`."""
+        return self._exact(self._query(query), rows)
+
+    def search(
+        self,
+        query: np.ndarray,
+        top_n: int = 5,
+        *,
+        candidates: Optional[np.ndarray] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Return (row indices, cosine scores) of the `top_n` best rows, best first.
+        With `candidates` only those rows are considered, and scored exactly.
+
+        An (m, dim) `query` is a multi-vector query (e.g. one vector per CV
+        chunk): each row scores as its best match among the m (max-sim).
+        """
+        q = self._query(query)
+        if candidates is not None:
+            candidates = np.unique(np.asarray(candidates, dtype=np.int64))
+        top_n = min(top_n, self.size if candidates is None else len(candidates))
+        if top_n <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        if candidates is not None:
+            cand = candidates
+            exact = self._exact(q, cand)
+        elif self.compressed:
+            approx = self._max_sim(self._approx_scores(q))
+            k = min(self.size, max(top_n, top_n * self.rerank_factor))
+            cand = np.argpartition(-approx, k - 1)[:k] if k < self.size else np.arange(self.size)
+            cand.sort()  # ascending rows → sequential reads from the memmap
+            exact = self._exact(q, cand)
+        else:
+            cand = np.arange(self.size)
+            exact = self._exact(q)
+
+        if top_n < len(cand):
+            part = np.argpartition(-exact, top_n - 1)[:top_n]
+        else:
+            part = np.arange(len(cand))
+        order = part[np.argsort(-exact[part], kind="stable")]
+        return cand[order], exact[order]
+
+    def search_many(self, queries: np.ndarray, top_n: int = 5) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        `search` for an (m, dim) batch of queries in one matrix-matrix product.
+        Returns (m, top_n) row indices and scores, each row best first.
+        """
+        qs = np.asarray(queries, dtype=np.float32)
+        top_n = min(top_n, self.size)
+        if top_n <= 0 or not len(qs):
+            return np.empty((len(qs), 0), dtype=np.int64), np.empty((len(qs), 0), dtype=np.float32)
+        qs = _normalise(qs.reshape(len(qs), -1))
+
+        if not self.compressed:
+            return _top_k_rows(self._exact_all(qs).T, top_n)
+
+        k = min(self.size, max(top_n, top_n * self.rerank_factor))
+        shortlist, _ = _top_k_rows(self._approx_scores(qs).T, k)
+        idxs = np.empty((len(qs), top_n), dtype=np.int64)
+        scores = np.empty((len(qs), top_n), dtype=np.float32)
+        for row, (q, cand) in enumerate(zip(qs, shortlist)):
+            cand = np.sort(cand)  # ascending rows → sequential reads from the memmap
+            rows = self._full_rows(self._physical(cand))
+            (order,), (best,) = _top_k_rows(np.asarray(rows @ q)[None, :], top_n)
+            idxs[row], scores[row] = cand[order], best
+        return idxs, scores